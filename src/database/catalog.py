@@ -0,0 +1,97 @@
+from database.db_obj import DB
+from util.obj import SingletonDecorator
+
+
+# ----- Constants -----
+
+# Small lookup tables which don't change while the App is running
+REFERENCE_TABLES = (
+    'exercise_type',
+    'body_part',
+    'muscle_group',
+    'equipment',
+    'plan_type',
+)
+
+
+@SingletonDecorator
+class ReferenceCatalog:
+    """In-memory copy of lookup tables(see 'REFERENCE_TABLES')
+
+    Every table is selected from database once(on first use) and then
+    served from memory. Catalog is invalidated by <DB> when schema is
+    migrated or when a lookup table is updated.
+    """
+
+    def __init__(self):
+        self._db = None  # <DB> which catalog is loaded from
+        self._id_name_dicts = {}  # Key=%table name%, Value={%id%: %name%}
+        self._plan_type_icons = {}  # Key=%plan type name%, Value=%icon bytes%
+
+    def get_id_name_dict(self, table_name):
+        """Returns all rows of lookup table as dict
+
+        Returned dict is a copy, so widgets can keep(or change) it.
+
+        :param table_name <str> One of 'REFERENCE_TABLES'
+        :return <dict> {%id%: %name%}
+        """
+        return dict(self._get_id_name_dict(table_name))
+
+    def get_name(self, table_name, id_):
+        """Returns column 'name' of row with id
+
+        :param table_name <str> One of 'REFERENCE_TABLES'
+        :param id_ <int>
+        :return <str>
+        """
+        return self._get_id_name_dict(table_name)[id_]
+
+    def get_id(self, table_name, name):
+        """Returns id of row with name
+
+        :param table_name <str> One of 'REFERENCE_TABLES'
+        :param name <str>
+        :return <int> or None
+        """
+        for id_, _name in self._get_id_name_dict(table_name).items():
+            if _name == name:
+                return id_
+        return None
+
+    def get_plan_type_icon(self, plan_type_name):
+        """Returns icon bytes of plan(or workout) type
+
+        :param plan_type_name <str>
+        :return <bytes>
+        """
+        db = self._get_db()
+        if not self._plan_type_icons:
+            self._plan_type_icons = dict(db.select_from_table('plan_type', ('name', 'icon')))
+        return self._plan_type_icons[plan_type_name]
+
+    def invalidate(self):
+        """Drops all loaded tables(they are selected again on next use)"""
+        self._id_name_dicts.clear()
+        self._plan_type_icons = {}
+
+    def _get_db(self):
+        db = DB()
+        if db is not self._db:
+            # First use or database was reopened(e.g. App restart)
+            self.invalidate()
+            self._db = db
+            db.add_data_change_callback(self._data_changed)
+        return db
+
+    def _data_changed(self, table_names):
+        if table_names is None or set(table_names) & set(REFERENCE_TABLES):
+            self.invalidate()
+
+    def _get_id_name_dict(self, table_name):
+        if table_name not in REFERENCE_TABLES:
+            raise ValueError(f'Table "{table_name}" is not a reference table')
+        db = self._get_db()
+        if table_name not in self._id_name_dicts:
+            self._id_name_dicts[table_name] = dict(db.select_from_table(table_name, ('id', 'name')))
+        return self._id_name_dicts[table_name]
@@ -0,0 +1,73 @@
+import sqlite3
+import logging
+import threading
+
+
+# ----- Constants -----
+
+# Size of sqlite3 compiled statement cache(per connection)
+CACHED_STATEMENTS = 256
+# Pragmas that are set on every new connection
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -16000),  # Negative value is in KiB -> ~16 MB
+    ('mmap_size', 268435456),  # 256 MB
+)
+
+
+class ConnectionManager:
+    """Keeps long-lived SQLite connections for one database file
+
+    Every thread gets its own connection, which is created on first use
+    and reused for all next statements executed in that thread.
+    Connections are opened in autocommit mode(isolation_level=None), so
+    every statement is committed on its own.
+    """
+
+    def __init__(self, db_path):
+        """
+        :param db_path <str> Database filepath
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def get_connection(self):
+        """Returns connection of the current thread(creates it if needed)
+
+        :return <sqlite3.Connection>
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        """Closes connections of all threads"""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as ex:
+                    logging.error('(Database) Failed closing connection', exc_info=ex)
+            numb_closed = len(self._connections)
+            self._connections.clear()
+            # New thread local object drops references in every thread
+            self._local = threading.local()
+        if numb_closed:
+            logging.info(f'(Database) Closed {numb_closed} connection(s) to "{self.db_path}"')
+
+    def _create_connection(self):
+        # 'check_same_thread' is disabled only so that method 'close_all'
+        # can close connections of other threads
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+        for pragma, value in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
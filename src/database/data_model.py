@@ -1,5 +1,6 @@
 import io
 import pickle
+import hashlib
 from enum import Enum
 from PIL import Image
 from collections import namedtuple
@@ -8,23 +9,65 @@ from PyQt5.QtCore import QAbstractListModel, QAbstractTableModel, Qt, QModelInde
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
+from settings import Settings, ICON_SIZES
 from util import images
+from util.cache import LRUCache
 from util.value import convert_to_title_format, wrap_text, pad_text
 from gui.flags import AlignFlag, ItemFlag, ImageFp, TableRowType
 
 
+# ----- Icon cache -----
+
+# Max memory(in bytes) of decoded pixmaps kept in icon cache
+ICON_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Process-wide cache of decoded icons(shared by all list and table models)
+icon_cache = LRUCache(maxbytes=ICON_CACHE_MAX_BYTES)
+
+
+def exercise_icon_key(exer_id):
+    """Returns icon cache key for exercise icon of set icon size
+
+    :param exer_id <int>
+    :return <tuple>
+    """
+    return 'exercise', exer_id, Settings().getValue('icon_size')[0]
+
+
+def invalidate_exercise_icon(exer_id):
+    """Removes all cached icons(of all sizes) of exercise
+
+    Must be called when exercise icon is changed in database.
+
+    :param exer_id <int>
+    """
+    for icon_width, _ in ICON_SIZES:
+        icon_cache.invalidate(('exercise', exer_id, icon_width))
+
+
 # ----- Methods used in this module -----
 
-def _get_icon_from_bytes(image_bytes):
-    """Creates and returns icon object from image bytes
+def _get_icon_from_bytes(image_bytes, exer_id=None):
+    """Returns icon object from image bytes
+
+    Icons are decoded only once and cached in 'icon_cache', keyed by
+    exercise id(and icon size) or by hash of image bytes.
 
     :param image_bytes <bytes> Image bytes
+    :param exer_id <int> or None If icon is an exercise icon of set icon size
     :return <QtGui.QIcon>
     """
-    qicon = QtGui.QIcon()
-    pixmap = QtGui.QPixmap()
-    pixmap.loadFromData(image_bytes)
-    qicon.addPixmap(pixmap)
+    if exer_id is not None:
+        key = exercise_icon_key(exer_id)
+    else:
+        key = 'content', hashlib.blake2b(image_bytes, digest_size=16).digest()
+    qicon = icon_cache.get(key)
+    if qicon is None:
+        qicon = QtGui.QIcon()
+        pixmap = QtGui.QPixmap()
+        pixmap.loadFromData(image_bytes)
+        qicon.addPixmap(pixmap)
+        icon_cache.put(key, qicon, cost=pixmap.width() * pixmap.height() * pixmap.depth() // 8)
     return qicon
 
 
@@ -47,9 +90,93 @@ NewExerciseData = namedtuple('NewExerciseData',
                               'icons_dict_bytes', 'instructions', 'favorite', 'link',
                               'user_permission'])
 
+# ----- For storing workout rows in DB(table 'workout_row') -----
+# Columns of table 'workout_row' that hold serialized row data(see 'to_data' of table rows)
+WORKOUT_ROW_DATA_COLUMNS = ('row_type', 'exercise_id', 'exercise_name', 'superset_numb',
+                            'sets', 'reps', 'pause', 'on_reps')
+
+
+def row_data_to_columns(row_data):
+    """Returns values of 'WORKOUT_ROW_DATA_COLUMNS' from serialized table row data
+
+    :param row_data <tuple> Data returned from method 'to_data' of table row
+    :return <tuple>
+    """
+    row_type = row_data[0]
+    if row_type == str(TableRowType.EXER_EXEC):
+        _, exer_id, name, sets, reps, pause, on_reps = row_data
+        return row_type, exer_id, name, None, sets, reps, pause, int(on_reps)
+    elif row_type == str(TableRowType.SS_TOP):
+        return row_type, None, None, row_data[1], None, None, None, None
+    elif row_type == str(TableRowType.SS_BOTTOM):
+        _, numb, sets, pause = row_data
+        return row_type, None, None, numb, sets, None, pause, None
+    raise ValueError(f'Unknown table row type "{row_type}"')
+
+
+def row_data_from_columns(columns):
+    """Returns serialized table row data from values of 'WORKOUT_ROW_DATA_COLUMNS'
+
+    :param columns <tuple>
+    :return <tuple> Same as data returned from method 'to_data' of table row
+    """
+    row_type, exer_id, name, numb, sets, reps, pause, on_reps = columns
+    if row_type == str(TableRowType.EXER_EXEC):
+        return row_type, exer_id, name, sets, reps, pause, bool(on_reps)
+    elif row_type == str(TableRowType.SS_TOP):
+        return row_type, numb
+    elif row_type == str(TableRowType.SS_BOTTOM):
+        return row_type, numb, sets, pause
+    raise ValueError(f'Unknown table row type "{row_type}"')
+
+
+class LazyBlob:
+    """Handle of BLOB value, which is read(by loader) on first access"""
+
+    def __init__(self, loader):
+        """
+        :param loader <callable> Function without params which returns <bytes> or None
+        """
+        self._loader = loader
+
+    def read(self):
+        return self._loader()
+
+
+class _LazyBlobAttribute:
+    """Attribute which value can be set as <LazyBlob>
+
+    Handle is replaced with read value on first access.
+    """
+
+    def __set_name__(self, owner, name):
+        self.value_attr_name = '_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.value_attr_name)
+        if isinstance(value, LazyBlob):
+            value = value.read()
+            setattr(obj, self.value_attr_name, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.value_attr_name, value)
+
 
 class ExerciseData:
-    """Used for storing and displaying all exercise data"""
+    """Used for storing and displaying all exercise data
+
+    Image attributes can be set as <LazyBlob> handles, so they are read
+    from DB only when accessed(see 'DB.select_exercise_data').
+    """
+
+    # ----- Image attributes -----
+    main_muscle_group_image = _LazyBlobAttribute()
+    minor_muscle_group_image = _LazyBlobAttribute()
+    pos1_image = _LazyBlobAttribute()
+    pos2_image = _LazyBlobAttribute()
 
     def __init__(self, exer_id, name, exer_type, body_part, main_muscle_group, minor_muscle_group,
                  equipment, main_muscle_group_image, minor_muscle_group_image, pos1_image, pos2_image,
@@ -62,10 +189,10 @@ class ExerciseData:
         :param main_muscle_group: <str>
         :param minor_muscle_group: <str>
         :param equipment: <str>
-        :param main_muscle_group_image: <bytes>
-        :param minor_muscle_group_image: <bytes> or None
-        :param pos1_image: <bytes>
-        :param pos2_image: <bytes>
+        :param main_muscle_group_image: <bytes> or <LazyBlob>
+        :param minor_muscle_group_image: <bytes> or <LazyBlob> or None
+        :param pos1_image: <bytes> or <LazyBlob>
+        :param pos2_image: <bytes> or <LazyBlob> or None
         :param instructions: <str>
         :param icon_bytes: <bytes>
         :param link: <str> or <None>
@@ -86,7 +213,7 @@ class ExerciseData:
         self.pos1_image = pos1_image
         self.pos2_image = pos2_image
         self.instructions = instructions
-        self.icon = _get_icon_from_bytes(self.icon_bytes)
+        self.icon = _get_icon_from_bytes(self.icon_bytes, exer_id if exer_id > 0 else None)
         self.favorite = True if favorite else False
         self.link = link
         self.user_permission = user_permission
@@ -101,15 +228,19 @@ class ExerciseData:
 # ---------- Data Model Rows ----------
 
 class ExerciseListRow:
-    """Exercise data row for <ExerciseListModel> """
+    """Exercise data row for <ExerciseListModel>
 
-    def __init__(self, exer_id, name, icon_bytes):
+    If row is created without icon bytes, icon is loaded by the model
+    when row is shown.
+    """
+
+    def __init__(self, exer_id, name, icon_bytes=None):
         # Data attributes
         self.icon_bytes = icon_bytes
         # Data model attributes
         self.exer_id = exer_id
         self.name = name
-        self.icon = _get_icon_from_bytes(icon_bytes)
+        self.icon = _get_icon_from_bytes(icon_bytes, exer_id) if icon_bytes else None
 
 
 class _TableRow:
@@ -199,7 +330,7 @@ class ExerciseExecutionRow(_TableRow):
         self.on_reps = on_reps
         self.superset_numb = None
         # ----- Row Data(displayed in table) ----
-        self.icon_and_name = (_get_icon_from_bytes(icon_bytes), name)
+        self.icon_and_name = (_get_icon_from_bytes(icon_bytes, exer_id), name)
         self.sets = sets
         self.reps = reps
         self.pause = pause
@@ -275,14 +406,26 @@ class WorkoutListRow:
 # ----- Data Models -----
 
 class ExerciseListModel(QAbstractListModel):
-    """ Data model class for list <ExerciseListView>"""
+    """ Data model class for list <ExerciseListView>
+
+    Rows without icon get their icon from 'icon_cache'. Icons missing in
+    cache are loaded(with 'icon_loader') for a window of rows at once,
+    starting with the first row that is shown, or for all rows before
+    they are shown(see 'prefetch_icons'). Exercise without icon is cached
+    as null icon, so it's not loaded again on every repaint.
+    """
+
+    ICON_FETCH_WINDOW = 50
 
-    def __init__(self, exercise_rows):
+    def __init__(self, exercise_rows, icon_loader=None):
         """
         :param exercise_rows: [<ExerciseListRow>, ]
+        :param icon_loader: <function> or None Takes list of exercise ids and
+                            returns dict Key=%exercise id%, Value=%icon bytes%
         """
         super().__init__()
         self.rows = exercise_rows
+        self.icon_loader = icon_loader
 
     def data(self, index, role):
         if role == Qt.ItemDataRole.DisplayRole:
@@ -291,8 +434,51 @@ class ExerciseListModel(QAbstractListModel):
 
         if role == Qt.ItemDataRole.DecorationRole:
             row = self.rows[index.row()]
+            if row.icon is None:
+                return self._get_cached_icon(index.row())
             return row.icon
 
+    def prefetch_icons(self):
+        """Loads icons(missing in cache) of all rows with one 'icon_loader' call"""
+        if self.icon_loader is not None:
+            self._load_icons(self.rows)
+
+    def _get_cached_icon(self, row_index):
+        if self.icon_loader is None:
+            return None
+        exer_id = self.rows[row_index].exer_id
+        icon = icon_cache.get(exercise_icon_key(exer_id))
+        if icon is None:
+            self._load_icons(self.rows[row_index:row_index + self.ICON_FETCH_WINDOW])
+            icon = icon_cache.get(exercise_icon_key(exer_id))
+        return icon
+
+    def _load_icons(self, rows):
+        missing_ids = [row.exer_id for row in rows
+                       if row.icon is None and exercise_icon_key(row.exer_id) not in icon_cache]
+        if not missing_ids:
+            return
+        icons_bytes = self.icon_loader(missing_ids)
+        for exer_id in missing_ids:
+            if exer_id in icons_bytes:
+                _get_icon_from_bytes(icons_bytes[exer_id], exer_id)
+            else:
+                icon_cache.put(exercise_icon_key(exer_id), QtGui.QIcon())
+
+    def refresh_row(self, exer_id, name):
+        """Sets new name of row and reloads its icon
+
+        :param exer_id <int>
+        :param name <str>
+        """
+        invalidate_exercise_icon(exer_id)
+        for row_index, row in enumerate(self.rows):
+            if row.exer_id == exer_id:
+                row.name = name
+                index = self.index(row_index)
+                self.dataChanged.emit(index, index)
+                break
+
     def setData(self, index, value, role):
         if role == Qt.ItemDataRole.EditRole:
             self.rows[index.row()] = value
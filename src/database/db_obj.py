@@ -1,20 +1,50 @@
+import re
 import pickle
 import sqlite3
 import logging
+import threading
 from pathlib import Path
 from contextlib import contextmanager
-from functools import wraps
+from functools import wraps, partial
 
+from database import query, migration
+from database.connection import ConnectionManager
+from database.exceptions import DuplicateNameError
+from database.query_cache import QueryCache
 from database.data_model import (
-    ExerciseData, ExerciseListRow, PlanListRow, ExerciseExecutionRow, TableRowType,
-    SupersetTopRow, SupersetBottomRow, WorkoutListRow
+    ExerciseData, LazyBlob, ExerciseListRow, PlanListRow, ExerciseExecutionRow, TableRowType,
+    SupersetTopRow, SupersetBottomRow, WorkoutListRow, WorkoutData, invalidate_exercise_icon,
+    WORKOUT_ROW_DATA_COLUMNS, row_data_to_columns, row_data_from_columns
 )
 from config import DAYS, DB_PATH
 from settings import Settings
 from util import images
 from util.obj import SingletonDecorator
 from util.value import wrap_text
-from gui.flags import TableRowType
+
+
+# ----- Constants -----
+
+# Max number of ids bound in one 'IN (...)' statement
+MAX_IN_PARAMS = 500
+# Error message of violated unique name index(see 'migration.UNIQUE_NAME_TABLES')
+_UNIQUE_NAME_ERROR_PATTERN = re.compile(r'UNIQUE constraint failed: (\w+)\.name')
+# Weights of FTS5 columns(name, instructions) used for ranking search results
+SEARCH_RANK = 'bm25(exercises_fts, 10.0, 1.0)'
+# Images of <ExerciseData>, which are read on first access if not prefetched(see 'select_exercise_data')
+# Key=%ExerciseData attribute%, Value=%column with image hash%
+EXERCISE_DATA_IMAGES = {
+    'main_muscle_group_image': 'muscle_group.image_hash',
+    'minor_muscle_group_image': 'mg2.image_hash',
+    'pos1_image': 'position_1_hash',
+    'pos2_image': 'position_2_hash',
+}
+# Image columns of table 'exercises' written by callers(images are stored in table 'image')
+# Key=%image column%, Value=%column with image hash%
+EXERCISE_IMAGE_COLUMNS = {
+    blob_column: hash_column for table_name, blob_column, hash_column in migration.IMAGE_REFERENCES
+    if table_name == 'exercises'
+}
 
 
 @SingletonDecorator
@@ -22,159 +52,554 @@ class DB:
 
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
+        self.connection_manager = ConnectionManager(db_path)
+        self._transaction_state = threading.local()
+        # Opt-in cache of SELECT result sets(see parameter 'cached' of 'execute_statement')
+        self.query_cache = QueryCache()
+        # Functions called with changed table names(or None if all may be changed)
+        self._data_change_callbacks = []
         # Attribute for development
         self.exercises_table = 'exercises'
 
-    def execute_statement(self, statement, params=None):
-        """Executes SQL statement"""
+    def close(self):
+        """Closes all open connections to database"""
+        self.connection_manager.close_all()
+
+    def migrate_schema(self):
+        """Applies schema migrations that are missing in database
+
+        :return <bool> False if some migration failed
+        """
+        migrated = migration.run_migrations(self.connection_manager.get_connection())
+        self._data_changed()
+        return migrated
+
+    def add_data_change_callback(self, callback):
+        """Registers function which is called when data in database is changed
+
+        :param callback <function> Called with <tuple(<str>)> of changed table
+                                   names, or None if any table may be changed
+        """
+        self._data_change_callbacks.append(callback)
+
+    def _data_changed(self, table_names=None):
+        self.query_cache.tables_changed(table_names)
+        for callback in self._data_change_callbacks:
+            callback(table_names)
+
+    def _statement_executed(self, statement):
+        """Notifies about changed tables if statement writes to a table(see '_data_changed')"""
+        table_name = query.get_written_table(statement)
+        if table_name:
+            table_names = (table_name, ) + migration.TRIGGER_WRITTEN_TABLES.get(table_name, ())
+            # Tables written in transaction are notified again when it ends(see 'transaction')
+            written_tables = getattr(self._transaction_state, 'written_tables', None)
+            if written_tables is not None:
+                written_tables.update(table_names)
+            self._data_changed(table_names)
+
+    @contextmanager
+    def transaction(self):
+        """Executes all statements in 'with' block as one unit of work
+
+        Transaction is committed at the end of the block. It is rolled back
+        if an exception is raised or if any statement in the block failed.
+        Nested transactions are joined with the outer transaction.
+        Tables written in transaction are notified as changed(see '_data_changed')
+        also after COMMIT/ROLLBACK, because result sets read by other connections
+        while transaction was open are stale once it ends.
+
+        :return <bool> (as 'with' target) True if transaction is the outer one
+        """
+        conn = self.connection_manager.get_connection()
+        if conn.in_transaction:
+            yield False
+            return
+        self._transaction_state.failed = False
+        self._transaction_state.written_tables = set()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield True
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            if conn.in_transaction:
+                if self._transaction_state.failed:
+                    conn.execute('ROLLBACK')
+                    logging.error('(Database) Transaction rolled back')
+                else:
+                    conn.execute('COMMIT')
+            self._transaction_state.failed = False
+            written_tables = self._transaction_state.written_tables
+            self._transaction_state.written_tables = None
+            if written_tables:
+                self._data_changed(tuple(sorted(written_tables)))
+
+    def execute_statement(self, statement, params=None, cached=False):
+        """Executes SQL statement
+
+        :param statement <str>
+        :param params <tuple> or None
+        :param cached <bool> If True, result set of SELECT statement is served from
+                             query cache(until a table it reads from is written to)
+        :raises DuplicateNameError If statement violates unique name index
+        """
         # ----- Statement checks -----
         if statement.split(' ')[0] not in \
                 ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'VACUUM'):
             raise NotImplementedError('Implement return value for this SQL statement type')
         if '?' in statement and params is None:
             raise ValueError('Parameters are not provided')
+        # ----- Get cached result set -----
+        is_select = statement.startswith('SELECT')
+        if cached and is_select:
+            params = tuple(params) if params else None
+            read_tables = query.get_read_tables(statement)
+            result_set = self.query_cache.get(statement, params, read_tables)
+            if result_set is not None:
+                return result_set
+            stamp = self.query_cache.get_stamp(read_tables)
         # ----- Execute SQL statement -----
-        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            conn = self.connection_manager.get_connection()
             if params:
-                cursor.execute(statement, params)
+                cursor = conn.execute(statement, params)
             else:
-                cursor.execute(statement)
-            if statement.startswith('SELECT'):
+                cursor = conn.execute(statement)
+            if is_select:
                 _return_value = cursor.fetchall()
+                # Result set read inside transaction may be rolled back
+                if cached and not conn.in_transaction:
+                    self.query_cache.put(statement, params, stamp, _return_value)
             else:
-                cursor.execute('SELECT changes();')
-                res = cursor.fetchall()
-                numb_of_changes = True if res[0][0] > 0 else False
-                _return_value = True if numb_of_changes > 0 else False
-            conn.commit()
+                _return_value = True if cursor.rowcount > 0 else False
             return _return_value
+        except sqlite3.IntegrityError as ex:
+            self._transaction_state.failed = True
+            self._raise_duplicate_name_error(ex)
+            logging.error(f'(Database) Failed execution:\n'
+                          f'  -> Statement:\n{wrap_text(statement, 100)}\n'
+                          f'  -> Params: {params}', exc_info=ex)
+            return False
         except sqlite3.Error as ex:
+            self._transaction_state.failed = True
             logging.error(f'(Database) Failed execution:\n'
                           f'  -> Statement:\n{wrap_text(statement, 100)}\n'
                           f'  -> Params: {params}', exc_info=ex)
             return False
         except OSError as ex:
+            self._transaction_state.failed = True
             logging.error(f'(Database) Failed execution statement:\n{wrap_text(statement, 100)}', exc_info=ex)
             return False
         finally:
-            if conn:
-                conn.close()
+            if not is_select:
+                self._statement_executed(statement)
+
+    def execute_many(self, statement, params_seq):
+        """Executes SQL statement(INSERT, UPDATE or DELETE) for every params in sequence
+
+        All statements are executed in one transaction.
+
+        :param statement <str>
+        :param params_seq <list(<tuple>)>
+        :return <int> or False Number of changed rows
+        :raises DuplicateNameError If statement violates unique name index
+        """
+        if statement.split(' ')[0] not in ('INSERT', 'UPDATE', 'DELETE'):
+            raise NotImplementedError('Only statements INSERT, UPDATE and DELETE can be executed in batch')
+        try:
+            with self.transaction():
+                conn = self.connection_manager.get_connection()
+                cursor = conn.executemany(statement, params_seq)
+                return cursor.rowcount
+        except sqlite3.Error as ex:
+            self._transaction_state.failed = True
+            if isinstance(ex, sqlite3.IntegrityError):
+                self._raise_duplicate_name_error(ex)
+            logging.error(f'(Database) Failed batch execution:\n'
+                          f'  -> Statement:\n{wrap_text(statement, 100)}\n'
+                          f'  -> Number of params: {len(params_seq)}', exc_info=ex)
+            return False
+        finally:
+            self._statement_executed(statement)
 
     @staticmethod
-    def _create_filter_statement(filters):
-        """Creates filter segment of statement
-
-        :param filters <dict> Format= Key<str>:Value<object>
-        """
-        statement_filter = ' WHERE'
-        counter = 1
-        params = []
-        for column_name, column_value in filters.items():
-            statement_filter += ' AND' if counter > 1 else ''
-            if type(column_value) == str and '%' in column_value:
-                statement_filter += f' {column_name} LIKE ?'
-                params.append(column_value)
-            else:
-                statement_filter += f' {column_name} = ?'
-                params.append(column_value)
-            counter += 1
-        return statement_filter, tuple(params)
+    def _raise_duplicate_name_error(integrity_error):
+        """Raises <DuplicateNameError> if integrity error is caused by unique name index"""
+        match = _UNIQUE_NAME_ERROR_PATTERN.search(str(integrity_error))
+        if match:
+            raise DuplicateNameError(match.group(1)) from integrity_error
+
+    def _select_existing_ids(self, table_name, ids):
+        """Returns set of ids(from given ids) which exist in table
+
+        :param table_name <str>
+        :param ids <list(<int>)> or <set(<int>)>
+        :return <set(<int>)>
+        """
+        ids = list(ids)
+        existing_ids = set()
+        for i in range(0, len(ids), MAX_IN_PARAMS):
+            chunk = tuple(ids[i:i + MAX_IN_PARAMS])
+            stat = f'SELECT id FROM {table_name} WHERE id IN ({", ".join("?" * len(chunk))})'
+            result_set = self.execute_statement(stat, params=chunk)
+            existing_ids.update(res[0] for res in result_set or [])
+        return existing_ids
+
+    def existing_exercise_ids(self, exer_ids):
+        """Returns ids(from given ids) of exercises which exist in database
+
+        Only column 'id' is read(no BLOBs), with one query per 500 ids.
+
+        :param exer_ids <Iterable(<int>)>
+        :return <set(<int>)>
+        """
+        return self._select_existing_ids(self.exercises_table, set(exer_ids))
 
-    def _select_exercises(self, columns, filters=None, order_by=None):
+    def _last_insert_rowid(self):
+        """Returns row id of the last inserted row(in current thread connection)"""
+        conn = self.connection_manager.get_connection()
+        return conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+
+    def _select_exercises(self, columns, filters=None, order_by=None, icon_size=None, cached=False):
         """ Selects rows from table 'exercises'.
 
         :param columns: <list(<str>)> or <tuple(<str>)>
         :param filters: <dict> Example - 'exercise_type.name: Strength'
         :param order_by: <str> or None
+        :param icon_size: <int> or None If set, table 'exercise_icon' is joined
+                          with icons of that size(column 'exercise_icon.bytes')
+        :param cached: <bool> See 'execute_statement'
         :return: <tuple(lists)>
         """
-        column_names_str = ', '.join(columns)
-        statement = f'SELECT {column_names_str} ' \
-                    f'FROM {self.exercises_table} ' \
-                    f'INNER JOIN exercise_type ON exercise_type.id = {self.exercises_table}.type_id ' \
-                    f'INNER JOIN body_part ON body_part.id = {self.exercises_table}.body_part_id ' \
-                    f'INNER JOIN muscle_group ON {self.exercises_table}.main_muscle_group_id = muscle_group.id ' \
-                    f'LEFT JOIN muscle_group mg2 ON {self.exercises_table}.minor_muscle_group_id = mg2.id ' \
-                    f'INNER JOIN equipment ON {self.exercises_table}.equipment_id = equipment.id'
-        params = None
-        if filters:
-            statement_filter, params = self._create_filter_statement(filters)
-            statement += statement_filter
-        if order_by:
-            statement += f' ORDER BY {order_by} ASC'
-        result_set = self.execute_statement(statement, params=params)
+        statement, params = self.get_select_exercises_statement(columns, filters, order_by, icon_size)
+        result_set = self.execute_statement(statement, params=params or None, cached=cached)
         return result_set
 
+    def get_select_exercises_statement(self, columns, filters=None, order_by=None, icon_size=None):
+        """Returns statement and params used by method '_select_exercises'
+
+        :param columns: <list(<str>)> or <tuple(<str>)>
+        :param filters: <dict> or None
+        :param order_by: <str> or None
+        :param icon_size: <int> or None
+        :return: <tuple(<str>, <tuple>)>
+        """
+        from_clause = f'{self.exercises_table} ' \
+                      f'INNER JOIN exercise_type ON exercise_type.id = {self.exercises_table}.type_id ' \
+                      f'INNER JOIN body_part ON body_part.id = {self.exercises_table}.body_part_id ' \
+                      f'INNER JOIN muscle_group ON {self.exercises_table}.main_muscle_group_id = muscle_group.id ' \
+                      f'LEFT JOIN muscle_group mg2 ON {self.exercises_table}.minor_muscle_group_id = mg2.id ' \
+                      f'INNER JOIN equipment ON {self.exercises_table}.equipment_id = equipment.id'
+        if icon_size:
+            from_clause += f' INNER JOIN exercise_icon ON exercise_icon.exercise_id = {self.exercises_table}.id'
+            filters = dict(filters or {})
+            filters['exercise_icon.size'] = icon_size
+        filter_shape, params = query.get_filter_shape(filters)
+        statement = query.select_statement(from_clause, tuple(columns), filter_shape, order_by)
+        return statement, params
+
     @staticmethod
-    def get_icon_bytes_from_icons_dict(icons_dict_bytes):
-        """Returns icon of set icon size from 'icons_dict' row in DB
+    def get_icon_size():
+        """Returns set icon size(width) used as column 'size' in table 'exercise_icon'
+
+        :return <int>
+        """
+        return Settings().getValue('icon_size')[0]
+
+    def _insert_exercise_icons(self, exer_id, icons_dict_bytes):
+        """Replaces all icon sizes of exercise in table 'exercise_icon'
+
+        Icons of sizes which are not in icons dict(e.g. after 'ICON_SIZES' changed) are deleted.
 
-        :param icons_dict_bytes <bytes> Serialized dict containing 3 <QtGui.QIcon> objects
-        :return <bytes> Icon image bytes
+        :param exer_id <int>
+        :param icons_dict_bytes <bytes> Serialized dict Key=%icon size%, Value=%icon bytes%
+        :return <bool>
         """
+        # Cached(decoded) icons of exercise are not valid anymore
+        invalidate_exercise_icon(exer_id)
         icons_dict = pickle.loads(icons_dict_bytes)
-        return icons_dict[Settings().getValue('icon_size')[0]]
+        stat = 'INSERT OR REPLACE INTO exercise_icon(exercise_id, size, bytes) VALUES(?, ?, ?)'
+        params_seq = [(exer_id, size, icon_bytes) for size, icon_bytes in icons_dict.items()]
+        with self.transaction():
+            sizes = tuple(icons_dict.keys())
+            # Returns False also if no icon was deleted, so failure is checked in transaction state
+            self.execute_statement(
+                f'DELETE FROM exercise_icon WHERE exercise_id = ? AND size NOT IN ({", ".join("?" * len(sizes))})',
+                params=(exer_id, ) + sizes)
+            if self._transaction_state.failed:
+                return False
+            return self.execute_many(stat, params_seq) is not False
 
     def select_exercise_list_rows(self, filters=None):
         """Select exercise list rows using set filters
 
         :param filters <dict> or None
         """
+        result_set = self.select_exercise_list_data(filters)
+        if result_set:
+            exer_list_rows = [ExerciseListRow(*row) for row in result_set]
+            return exer_list_rows
+        return False
+
+    def select_exercise_list_data(self, filters=None):
+        """Select data for exercise list rows using set filters
+
+        Returns only ids and names(icons are loaded per visible page with
+        'select_exercise_icons'). No Qt objects are created, so it can be
+        called from worker thread.
+
+        :param filters <dict> or None
+        :return list(<tuple(<int>, <str>)>) or False
+        """
         columns = [
             f'{self.exercises_table}.id',
             f'{self.exercises_table}.name',
-            f'{self.exercises_table}.icons_dict'
         ]
         result_set = self._select_exercises(columns, filters=filters,
                                             order_by=f'{self.exercises_table}.name')
+        return result_set
+
+    def search_exercises(self, search_text, filters=None):
+        """Searches exercise names and instructions and returns ranked exercise list rows
+
+        Every word in search text is matched as prefix(full-text search on
+        table 'exercises_fts'). Results are ranked with bm25, where match in
+        exercise name weights more than match in instructions.
+
+        :param search_text <str> Text typed by user
+        :param filters <dict> or None Same filters as in 'select_exercise_list_rows'
+        :return list(<ExerciseListRow>) or False
+        """
+        result_set = self.search_exercise_list_data(search_text, filters)
         if result_set:
-            exer_list_rows = []
-            for row in result_set:
-                _icon_bytes = self.get_icon_bytes_from_icons_dict(row[2])
-                exer_list_rows.append(ExerciseListRow(row[0], row[1], _icon_bytes))
+            exer_list_rows = [ExerciseListRow(*row) for row in result_set]
             return exer_list_rows
         return False
 
-    def select_exercise_data(self, exer_id, get_none=False):
+    def search_exercise_list_data(self, search_text, filters=None):
+        """Searches exercises and returns data for ranked exercise list rows
+
+        Returns only ids and names, same as 'select_exercise_list_data'.
+
+        :param search_text <str> Text typed by user
+        :param filters <dict> or None
+        :return list(<tuple(<int>, <str>)>) or False
+        """
+        match_expression = query.fts_match_expression(search_text)
+        if match_expression is None:
+            return self.select_exercise_list_data(filters)
+        statement, params = self.get_search_exercises_statement(match_expression, filters)
+        result_set = self.execute_statement(statement, params=params)
+        return result_set
+
+    def get_search_exercises_statement(self, match_expression, filters=None):
+        """Returns statement and params used by method 'search_exercises'
+
+        :param match_expression <str> FTS5 expression returned from 'query.fts_match_expression'
+        :param filters <dict> or None
+        :return: <tuple(<str>, <tuple>)>
+        """
+        columns = (
+            f'{self.exercises_table}.id',
+            f'{self.exercises_table}.name',
+        )
+        from_clause = f'exercises_fts ' \
+                      f'INNER JOIN {self.exercises_table} ON {self.exercises_table}.id = exercises_fts.rowid'
+        filter_shape, params = query.get_filter_shape(filters)
+        filter_shape = (('exercises_fts', query.MATCH_OPERATOR), ) + filter_shape
+        params = (match_expression, ) + params
+        statement = query.select_statement(from_clause, columns, filter_shape,
+                                           order_by=f'{SEARCH_RANK}, {self.exercises_table}.name')
+        return statement, params
+
+    def select_exercise_data(self, exer_id, get_none=False, prefetch=()):
         """Gets exercise data.
 
+        Images which are not prefetched are set as <LazyBlob> handles, so
+        they are read(from table 'image') only if they are accessed.
+
         :param exer_id <int> Exercise id
         :param get_none <bool> If True return None when no results
+        :param prefetch <Iterable(<str>)> Image attributes(keys of 'EXERCISE_DATA_IMAGES')
+                        selected together with exercise data
         :return <ExerciseData>
         """
-        columns = [
+        prefetch = set(prefetch)
+        if not prefetch.issubset(EXERCISE_DATA_IMAGES):
+            raise ValueError(f'Unknown exercise images: {prefetch.difference(EXERCISE_DATA_IMAGES)}')
+        info_columns = [
             f'{self.exercises_table}.id', f'{self.exercises_table}.name', 'exercise_type.name',
-            'body_part.name', 'muscle_group.name', 'mg2.name', 'equipment.name',
-            'muscle_group.image', 'mg2.image', 'position_1', 'position_2',
-            'instructions', 'icons_dict', 'favorite', 'link', 'user_permission'
+            'body_part.name', 'muscle_group.name', 'mg2.name', 'equipment.name'
+        ]
+        columns = info_columns + list(EXERCISE_DATA_IMAGES.values()) + [
+            'instructions', 'exercise_icon.bytes', 'favorite', 'link', 'user_permission'
         ]
         filters = {f'{self.exercises_table}.id': exer_id}
-        result_set = self._select_exercises(columns, filters)
+        result_set = self._select_exercises(columns, filters, icon_size=self.get_icon_size(), cached=True)
         if not result_set:
             if get_none:
                 return None
             else:
                 raise ValueError(f'Exercise data not found for exer_id={exer_id}')
-        result_set = list(result_set[0])
-        _icon_index = columns.index('icons_dict')
-        result_set[_icon_index] = self.get_icon_bytes_from_icons_dict(result_set[_icon_index])
-        exercise_data = ExerciseData(*result_set)
+        exer_data_args = list(result_set[0])
+        images_start = len(info_columns)
+        image_hashes = dict(zip(EXERCISE_DATA_IMAGES, exer_data_args[images_start:]))
+        prefetched_images = self.select_images(
+            image_hash for attr_name, image_hash in image_hashes.items() if attr_name in prefetch)
+        for i, (attr_name, image_hash) in enumerate(image_hashes.items(), images_start):
+            if image_hash is None:
+                continue
+            if attr_name in prefetch:
+                exer_data_args[i] = prefetched_images.get(image_hash)
+            else:
+                exer_data_args[i] = LazyBlob(partial(self.select_image, image_hash))
+        exercise_data = ExerciseData(*exer_data_args)
         return exercise_data
 
-    def select_exercise_icon(self, exer_id):
-        stat = f'SELECT icons_dict FROM {self.exercises_table} WHERE id = ?'
-        params = (exer_id, )
-        result_set = self.execute_statement(stat, params=params)
-        if not result_set:
-            raise ValueError(f'Exercise with id "{exer_id}" not found')
-        icons_dict = result_set[0][0]
-        icon_bytes = self.get_icon_bytes_from_icons_dict(icons_dict)
-        return icon_bytes
+    def select_image(self, image_hash):
+        """Selects image from table 'image'(read by <LazyBlob> handles)
+
+        :param image_hash <str>
+        :return <bytes> or None
+        """
+        # Images are immutable(keyed by content), so they are always cached
+        result_set = self.execute_statement('SELECT bytes FROM image WHERE hash = ?',
+                                            params=(image_hash, ), cached=True)
+        return result_set[0][0] if result_set else None
+
+    def select_images(self, image_hashes):
+        """Selects images from table 'image'
+
+        :param image_hashes <Iterable(<str>)>
+        :return <dict> Key=%image hash%, Value=%image bytes%
+        """
+        image_hashes = list(set(image_hashes))
+        images_dict = {}
+        for i in range(0, len(image_hashes), MAX_IN_PARAMS):
+            chunk = tuple(image_hashes[i:i + MAX_IN_PARAMS])
+            stat = f'SELECT hash, bytes FROM image WHERE hash IN ({", ".join("?" * len(chunk))})'
+            result_set = self.execute_statement(stat, params=chunk)
+            images_dict.update(result_set or [])
+        return images_dict
+
+    def select_muscle_group_image(self, muscle_group_id):
+        """Selects muscle group diagram
+
+        :param muscle_group_id <int> or None
+        :return <bytes> or None
+        """
+        stat = 'SELECT image.bytes FROM muscle_group INNER JOIN image ON image.hash = muscle_group.image_hash ' \
+               'WHERE muscle_group.id = ?'
+        result_set = self.execute_statement(stat, params=(muscle_group_id, ), cached=True)
+        return result_set[0][0] if result_set else None
+
+    def _insert_images(self, images_bytes):
+        """Inserts images into table 'image'(if they are not stored yet)
 
-    def select_from_table(self, table_name, columns, filters=None, get_none=False):
+        Inserted image is deleted by garbage collection if it isn't referenced
+        (see 'delete_unreferenced_images').
+
+        :param images_bytes <list(<bytes> or None)>
+        :return <list(<str> or None)> or False Image hashes(in order of 'images_bytes')
+        """
+        image_hashes = [images.get_image_hash(image_bytes) if image_bytes else None
+                        for image_bytes in images_bytes]
+        params_seq = [(image_hash, image_bytes) for image_hash, image_bytes in zip(image_hashes, images_bytes)
+                      if image_hash]
+        if params_seq and self.execute_many(
+                'INSERT OR IGNORE INTO image(hash, bytes) VALUES(?, ?)', params_seq) is False:
+            return False
+        return image_hashes
+
+    def _store_exercise_images(self, column_values):
+        """Stores images of exercise columns in table 'image' and replaces them with image hashes
+
+        :param column_values <dict> Key=%column%, Value=%value%
+        :return <dict> or False Column values with image hash columns
+        """
+        image_columns = [column for column in column_values if column in EXERCISE_IMAGE_COLUMNS]
+        if not image_columns:
+            return column_values
+        image_hashes = self._insert_images([column_values[column] for column in image_columns])
+        if image_hashes is False:
+            return False
+        column_values = {column: value for column, value in column_values.items() if column not in image_columns}
+        for column, image_hash in zip(image_columns, image_hashes):
+            column_values[EXERCISE_IMAGE_COLUMNS[column]] = image_hash
+        return column_values
+
+    def delete_unreferenced_images(self):
+        """Deletes images which are not referenced by any row(garbage collection)
+
+        Images are deleted by triggers when their last reference is removed, so
+        only images inserted by failed(rolled back) writes can remain unreferenced.
+
+        :return <bool> True if some image was deleted
+        """
+        return self.execute_statement('DELETE FROM image WHERE ref_count <= 0')
+
+    def replace_images(self, images_bytes):
+        """Replaces stored images(e.g. re-encoded ones) and moves all references to them
+
+        Replaced image keeps its row(renamed to hash of new bytes), unless new
+        bytes are already stored; then references are moved to the stored image
+        and replaced image is deleted by triggers.
+
+        :param images_bytes <dict> Key=%hash of replaced image%, Value=%new image bytes%
+        :return <bool>
+        """
+        new_hashes = {old_hash: images.get_image_hash(image_bytes)
+                      for old_hash, image_bytes in images_bytes.items()}
+        new_hashes = {old_hash: new_hash for old_hash, new_hash in new_hashes.items() if new_hash != old_hash}
+        if not new_hashes:
+            return True
+        with self.transaction():
+            stored_hashes = set()
+            hashes = list(set(new_hashes.values()))
+            for i in range(0, len(hashes), MAX_IN_PARAMS):
+                chunk = tuple(hashes[i:i + MAX_IN_PARAMS])
+                stat = f'SELECT hash FROM image WHERE hash IN ({", ".join("?" * len(chunk))})'
+                stored_hashes.update(row[0] for row in self.execute_statement(stat, params=chunk) or [])
+            for old_hash, new_hash in new_hashes.items():
+                if new_hash in stored_hashes:
+                    continue
+                # References are counted again by triggers when they are moved below
+                self.execute_statement('UPDATE image SET hash = ?, ref_count = 0, bytes = ? WHERE hash = ?',
+                                       params=(new_hash, images_bytes[old_hash], old_hash))
+                stored_hashes.add(new_hash)
+            old_hashes = list(new_hashes)
+            chunk_size = MAX_IN_PARAMS // 3
+            for table, _, hash_column in migration.IMAGE_REFERENCES:
+                for i in range(0, len(old_hashes), chunk_size):
+                    chunk = old_hashes[i:i + chunk_size]
+                    cases = ' '.join('WHEN ? THEN ?' for _ in chunk)
+                    stat = f'UPDATE {table} SET {hash_column} = CASE {hash_column} {cases} END ' \
+                           f'WHERE {hash_column} IN ({", ".join("?" * len(chunk))})'
+                    params = tuple(value for old_hash in chunk for value in (old_hash, new_hashes[old_hash]))
+                    # Returns False also if no row references the images, so failure is checked in transaction state
+                    self.execute_statement(stat, params=params + tuple(chunk))
+            return not self._transaction_state.failed
+
+    def select_exercise_icons(self, exer_ids):
+        """Selects icons(of set icon size) for given exercises
+
+        :param exer_ids <list(<int>)>
+        :return <dict> Key=%exercise id%, Value=%icon bytes%
+        """
+        exer_ids = list(exer_ids)
+        icon_size = self.get_icon_size()
+        icons = {}
+        for i in range(0, len(exer_ids), MAX_IN_PARAMS):
+            chunk = tuple(exer_ids[i:i + MAX_IN_PARAMS])
+            stat = f'SELECT exercise_id, bytes FROM exercise_icon ' \
+                   f'WHERE size = ? AND exercise_id IN ({", ".join("?" * len(chunk))})'
+            result_set = self.execute_statement(stat, params=(icon_size, ) + chunk)
+            icons.update(result_set or [])
+        return icons
+
+    def select_from_table(self, table_name, columns, filters=None, get_none=False, cached=False):
         """Selects columns from any table with set filters
 
         If result set has 1 value, then it returns that result tuple
@@ -183,16 +608,14 @@ class DB:
         :param columns <str> or list(<str>) List of column names or column name
         :param filters: <dict> or None
         :param get_none: <bool>
+        :param cached: <bool> See 'execute_statement'
         :return List(<tuple<object>>) or <tuple<object>> or <object>
         """
-        columns = (columns,) if type(columns) not in (tuple, list) else columns
-        columns_str = ', '.join(columns)
-        statement = f'SELECT {columns_str} FROM {table_name}'
-        params = None
-        if filters:
-            statement_filter, params = self._create_filter_statement(filters)
-            statement += statement_filter
-        results_set = self.execute_statement(statement, params=params)
+        columns = (columns,) if type(columns) not in (tuple, list) else tuple(columns)
+        filter_shape, params = query.get_filter_shape(filters)
+        statement = query.select_statement(table_name, columns, filter_shape)
+        params = params or None
+        results_set = self.execute_statement(statement, params=params, cached=cached)
         if not results_set:
             if get_none:
                 return None
@@ -206,23 +629,127 @@ class DB:
             results_set = results_set[0]
         return results_set
 
+    def select_bookmarks(self):
+        """Returns bookmarked exercises in order in which they were bookmarked
+
+        :return <list(<tuple(<int>, <str>)>)> Exercise id and name
+        """
+        stat = 'SELECT exercises.id, exercises.name FROM bookmark ' \
+               'INNER JOIN exercises ON exercises.id = bookmark.exercise_id ' \
+               'ORDER BY bookmark.position'
+        return self.execute_statement(stat) or []
+
+    def insert_bookmark(self, exer_id):
+        """Bookmarks exercise(after all other bookmarks)
+
+        :param exer_id <int>
+        :return <bool> False if exercise is already bookmarked
+        """
+        stat = 'INSERT OR IGNORE INTO bookmark(exercise_id, position) ' \
+               'SELECT ?, COALESCE(MAX(position), -1) + 1 FROM bookmark'
+        return self.execute_statement(stat, params=(exer_id, ))
+
+    def delete_bookmark(self, exer_id):
+        """Removes exercise bookmark
+
+        :param exer_id <int>
+        :return <bool> False if exercise is not bookmarked
+        """
+        return self.execute_statement('DELETE FROM bookmark WHERE exercise_id = ?', params=(exer_id, ))
+
+    def select_names_with_prefix(self, table_name, prefix):
+        """Returns names(in lower case) that start with prefix(case-insensitive)
+
+        Names are selected with one query, which uses unique name index
+        (created with 'COLLATE NOCASE', so 'LIKE' can use it).
+
+        :param table_name <str> One of 'migration.UNIQUE_NAME_TABLES'
+        :param prefix <str>
+        :return <set(<str>)>
+        """
+        self._check_unique_name_table(table_name)
+        escaped_prefix = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        stat = f"SELECT name FROM {table_name} WHERE name LIKE ? ESCAPE '\\'"
+        result_set = self.execute_statement(stat, params=(escaped_prefix + '%', ))
+        return {name.lower() for name, in result_set or []}
+
+    def select_id_by_name(self, table_name, name):
+        """Returns id of row with name(compared case-insensitive, like in unique name index)
+
+        :param table_name <str> One of 'migration.UNIQUE_NAME_TABLES'
+        :param name <str>
+        :return <int> or None
+        """
+        self._check_unique_name_table(table_name)
+        stat = f'SELECT id FROM {table_name} WHERE name = ? COLLATE NOCASE'
+        result_set = self.execute_statement(stat, params=(name, ))
+        return result_set[0][0] if result_set else None
+
+    @staticmethod
+    def _check_unique_name_table(table_name):
+        if table_name not in migration.UNIQUE_NAME_TABLES:
+            raise ValueError(f'Table "{table_name}" has no unique names')
+
     def insert_exercise(self, exer_data):
         """Inserts exercise into table 'exercises'
-        :param exer_data <ExerciseData>
-        :returns <bool>
+        :param exer_data <NewExerciseData>
+        :returns <int> or False New exercise id
+        :raises DuplicateNameError If exercise name already exists
         """
         stat = f'INSERT INTO {self.exercises_table}(name, type_id, body_part_id, ' \
                f'main_muscle_group_id, minor_muscle_group_id, equipment_id, ' \
-               f'position_1, position_2, icons_dict, instructions, favorite, ' \
+               f'position_1_hash, position_2_hash, icons_dict, instructions, favorite, ' \
                f'link, user_permission) ' \
                'VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
-        params = (exer_data.name, exer_data.type_id, exer_data.body_part_id,
-                  exer_data.main_muscle_id, exer_data.minor_muscle_id,
-                  exer_data.equipment_id, exer_data.pos1, exer_data.pos2,
-                  exer_data.icons_dict_bytes, exer_data.instructions,
-                  exer_data.favorite, exer_data.link, exer_data.user_permission)
-        inserted = self.execute_statement(stat, params=params)
-        return inserted
+        with self.transaction():
+            image_hashes = self._insert_images([exer_data.pos1, exer_data.pos2])
+            if image_hashes is False:
+                return False
+            params = (exer_data.name, exer_data.type_id, exer_data.body_part_id,
+                      exer_data.main_muscle_id, exer_data.minor_muscle_id,
+                      exer_data.equipment_id, *image_hashes,
+                      exer_data.icons_dict_bytes, exer_data.instructions,
+                      exer_data.favorite, exer_data.link, exer_data.user_permission)
+            if not self.execute_statement(stat, params=params):
+                return False
+            new_exer_id = self._last_insert_rowid()
+            if not self._insert_exercise_icons(new_exer_id, exer_data.icons_dict_bytes):
+                return False
+        return new_exer_id
+
+    def insert_exercises(self, exers_data):
+        """Inserts exercises into table 'exercises' in one transaction
+
+        :param exers_data <list(<NewExerciseData>)>
+        :returns <list(<int>)> New exercise ids(in order of 'exers_data') or
+                               empty list if insertion failed
+        :raises DuplicateNameError If exercise name already exists(nothing is inserted)
+        """
+        if not exers_data:
+            return []
+        stat = f'INSERT INTO {self.exercises_table}(name, type_id, body_part_id, ' \
+               f'main_muscle_group_id, minor_muscle_group_id, equipment_id, ' \
+               f'position_1_hash, position_2_hash, icons_dict, instructions, favorite, ' \
+               f'link, user_permission) ' \
+               'VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+        with self.transaction():
+            image_hashes = self._insert_images(
+                [image_bytes for exer_data in exers_data for image_bytes in (exer_data.pos1, exer_data.pos2)])
+            if image_hashes is False:
+                return []
+            new_exer_ids = []
+            for i, exer_data in enumerate(exers_data):
+                params = (exer_data.name, exer_data.type_id, exer_data.body_part_id,
+                          exer_data.main_muscle_id, exer_data.minor_muscle_id,
+                          exer_data.equipment_id, *image_hashes[2 * i:2 * i + 2],
+                          exer_data.icons_dict_bytes, exer_data.instructions,
+                          exer_data.favorite, exer_data.link, exer_data.user_permission)
+                if not self.execute_statement(stat, params=params):
+                    return []
+                new_exer_ids.append(self._last_insert_rowid())
+                if not self._insert_exercise_icons(new_exer_ids[-1], exer_data.icons_dict_bytes):
+                    return []
+        return new_exer_ids
 
     def update_exercise(self, exer_id, new_column_values):
         """Updates exercise row in 'exercises'
@@ -230,29 +757,89 @@ class DB:
         :param exer_id <ExerciseData>
         :param new_column_values <dict> Key=%column%, Value=%value%
         :returns <bool>
+        :raises DuplicateNameError If exercise is renamed to existing exercise name
         """
-        keys = tuple(new_column_values.keys())
-        set_stat = f'SET {keys[0]} = ?'
-        for i in range(1, len(keys)):
-            set_stat += f', {keys[i]} = ?'
-        stat = f'UPDATE {self.exercises_table} ' + set_stat + ' WHERE id = ?'
-        params = tuple(new_column_values.values()) + (exer_id,)
-        updated = self.execute_statement(stat, params=params)
+        with self.transaction():
+            column_values = self._store_exercise_images(new_column_values)
+            if column_values is False:
+                return False
+            stat = query.update_statement(self.exercises_table, tuple(column_values.keys()))
+            params = tuple(column_values.values()) + (exer_id,)
+            updated = self.execute_statement(stat, params=params)
+            if updated and 'icons_dict' in new_column_values:
+                updated = self._insert_exercise_icons(exer_id, new_column_values['icons_dict'])
         return updated
 
+    def update_exercises(self, exers_column_values):
+        """Updates exercise rows in 'exercises' in one transaction
+
+        Rows with the same updated columns are updated in one batch.
+
+        :param exers_column_values <dict> Key=%exercise id%, Value=<dict> Key=%column%, Value=%value%
+        :returns <list(<bool>)> Per row result(in order of dict keys)
+        """
+        with self.transaction():
+            batches = {}
+            for exer_id, new_column_values in exers_column_values.items():
+                column_values = self._store_exercise_images(new_column_values)
+                if column_values is False:
+                    return [False] * len(exers_column_values)
+                params = tuple(column_values.values()) + (exer_id,)
+                batches.setdefault(tuple(column_values.keys()), []).append(params)
+            existing_ids = self._select_existing_ids(self.exercises_table, exers_column_values.keys())
+            for columns, params_seq in batches.items():
+                stat = query.update_statement(self.exercises_table, columns)
+                if self.execute_many(stat, params_seq) is False:
+                    return [False] * len(exers_column_values)
+            for exer_id, new_column_values in exers_column_values.items():
+                if exer_id in existing_ids and 'icons_dict' in new_column_values:
+                    if not self._insert_exercise_icons(exer_id, new_column_values['icons_dict']):
+                        return [False] * len(exers_column_values)
+        return [exer_id in existing_ids for exer_id in exers_column_values.keys()]
+
     def delete_exercise(self, exer_id):
+        invalidate_exercise_icon(exer_id)
         stat = 'DELETE FROM exercises WHERE id = ?'
         deleted = self.execute_statement(stat, params=(exer_id,))
         return deleted
 
+    def delete_exercises(self, exer_ids):
+        """Deletes exercises in one transaction
+
+        :param exer_ids <list(<int>)>
+        :returns <list(<bool>)> Per row result(in order of 'exer_ids')
+        """
+        for exer_id in exer_ids:
+            invalidate_exercise_icon(exer_id)
+        return self._delete_rows(self.exercises_table, exer_ids)
+
+    def _delete_rows(self, table_name, ids):
+        """Deletes rows with given ids from table in one transaction
+
+        :param table_name <str>
+        :param ids <list(<int>)>
+        :returns <list(<bool>)> Per row result(in order of 'ids')
+        """
+        stat = f'DELETE FROM {table_name} WHERE id = ?'
+        with self.transaction():
+            existing_ids = self._select_existing_ids(table_name, ids)
+            if self.execute_many(stat, [(id_,) for id_ in ids]) is False:
+                return [False] * len(ids)
+        return [id_ in existing_ids for id_ in ids]
+
     def update_table(self, table_name, column_values, exer_id):
-        statement = f"UPDATE {table_name} SET "
-        for i, column_name in enumerate(column_values.keys()):
-            statement += f"{column_name} = ?"
-            statement += ', ' if i < (len(column_values) - 1) else ' '
-        params = tuple([self._format_column_value(col_value) for col_value in column_values.values()])
-        statement += f'WHERE id = {exer_id};'
-        updated = self.execute_statement(statement, params=params)
+        with self.transaction():
+            if table_name == self.exercises_table:
+                stored_column_values = self._store_exercise_images(column_values)
+                if stored_column_values is False:
+                    return False
+            else:
+                stored_column_values = column_values
+            statement = query.update_statement(table_name, tuple(stored_column_values.keys()))
+            params = tuple(stored_column_values.values()) + (exer_id,)
+            updated = self.execute_statement(statement, params=params)
+            if updated and table_name == self.exercises_table and 'icons_dict' in column_values:
+                updated = self._insert_exercise_icons(exer_id, column_values['icons_dict'])
         return updated
 
     def select_week_plan_info(self, filters=None):
@@ -260,37 +847,55 @@ class DB:
                'plan_type.icon, week_plan.user_permission ' \
                'FROM week_plan ' \
                'LEFT JOIN plan_type ON week_plan.plan_type_id = plan_type.id '
-        params = None
-        if filters:
-            statement_filter, params = self._create_filter_statement(filters)
-            stat += statement_filter
-        result_set = self.execute_statement(stat, params=params)
+        filter_shape, params = query.get_filter_shape(filters)
+        stat += query.where_clause(filter_shape)
+        result_set = self.execute_statement(stat, params=params or None, cached=True)
         # assert result_set, 'Week plan doent exist!'
         week_plan_info = [PlanListRow(*res) for res in result_set] if result_set else []
         return week_plan_info
 
     def select_plan_workouts_data(self, plan_id):
-        stat = f'SELECT workouts FROM week_plan WHERE id = ?;'
-        params = (plan_id,)
-        result_set = self.execute_statement(stat, params=params)
-        assert result_set, 'Week plan doesnt exist!'
-        # week_plan_bytes = pickle.loads(result_set[0][0])
-        workouts_data = pickle.loads(result_set[0][0])
+        """Returns workouts of all plan days(selected with one join)
+
+        :param plan_id <int>
+        :return <list(<WorkoutData> or None)> One item per day(None if day has no workout)
+        """
+        stat = f'SELECT plan_day.day, plan_day.name, plan_day.type_id, plan_day.workout_time, ' \
+               f'{self._workout_row_columns} ' \
+               'FROM plan_day ' \
+               'LEFT JOIN workout_row ON workout_row.plan_day_id = plan_day.id ' \
+               'WHERE plan_day.week_plan_id = ? ' \
+               'ORDER BY plan_day.day, workout_row.position'
+        result_set = self.execute_statement(stat, params=(plan_id,))
+        assert result_set is not False, 'Week plan workouts couldn\'t be selected!'
+        days_data = {}  # Key=%day%, Value=(%workout header%, %rows data%)
+        for day, name, type_id, workout_time, *row_columns in result_set:
+            _, rows_data = days_data.setdefault(day, ((name, type_id, workout_time), []))
+            if row_columns[0] is not None:  # Day workout without rows
+                rows_data.append(row_data_from_columns(row_columns))
+        workouts_data = [None] * len(DAYS)
+        for day, ((name, type_id, workout_time), rows_data) in days_data.items():
+            workouts_data[day] = WorkoutData(name, type_id, tuple(rows_data), workout_time)
         return workouts_data
 
     def insert_into_week_plan(self, plan_data, user_permission):
-        """Inserts new plan into table 'week_plan'
+        """Inserts new plan into table 'week_plan'(and its workouts into 'plan_day' and 'workout_row')
 
         @:param plan_data: <PlanData>
+        :returns <int> or False New plan id
+        :raises DuplicateNameError If plan name already exists
         """
-        stat = f'INSERT INTO week_plan(name, plan_type_id, workouts, user_permission) ' \
-               f'VALUES(?, ?, ?, ?)'
-        workouts_data_bytes = pickle.dumps(plan_data.workouts_data)
-        params = (plan_data.name, plan_data.type_id, workouts_data_bytes, user_permission)
-        inserted = self.execute_statement(stat, params=params)
-        if inserted:
-            logging.info(f'New plan with name {plan_data.name} inserted!')
-        return inserted
+        stat = f'INSERT INTO week_plan(name, plan_type_id, user_permission) ' \
+               f'VALUES(?, ?, ?)'
+        params = (plan_data.name, plan_data.type_id, user_permission)
+        with self.transaction():
+            if not self.execute_statement(stat, params=params):
+                return False
+            new_plan_id = self._last_insert_rowid()
+            if not self._update_plan_days(new_plan_id, plan_data.workouts_data):
+                return False
+        logging.info(f'New plan with name {plan_data.name} inserted!')
+        return new_plan_id
 
     def delete_week_plan(self, plan_id):
         # TODO: maybe remove "plan_name"?
@@ -298,46 +903,66 @@ class DB:
         return self.execute_statement(stat, params=(plan_id,))
 
     def update_week_plan(self, plan_data):
+        """Updates plan and only changed days and rows of its workouts
+
+        @:param plan_data: <PlanData>
+        :raises DuplicateNameError If plan is renamed to existing plan name
+        """
         stat = 'UPDATE week_plan SET ' \
-               'name = ?, plan_type_id = ?, workouts = ? ' \
+               'name = ?, plan_type_id = ? ' \
                'WHERE id = ?;'
-        workouts_data_bytes = pickle.dumps(plan_data.workouts_data)
-        params = (plan_data.name, plan_data.type_id, workouts_data_bytes, plan_data.id)
-        updated = self.execute_statement(stat, params=params)
+        params = (plan_data.name, plan_data.type_id, plan_data.id)
+        with self.transaction():
+            updated = self.execute_statement(stat, params=params) and \
+                self._update_plan_days(plan_data.id, plan_data.workouts_data)
         return updated
 
     def insert_into_workout(self, workout_data, user_permission):
+        """Inserts new workout into table 'workout'(and its rows into 'workout_row')
+
+        :param workout_data <WorkoutData>
+        :param user_permission <bool>
+        :returns <int> or False New workout id
+        :raises DuplicateNameError If workout name already exists
+        """
         stat = f'INSERT INTO workout' \
-               f'(name, type_id, data, workout_time, user_permission) ' \
-               f'VALUES(?, ?, ?, ?, ?)'
-        workout_rows_bytes = pickle.dumps(workout_data.rows_data)
-        params = (workout_data.name, workout_data.type_id, workout_rows_bytes,
-                  workout_data.workout_time, user_permission)
-        inserted = self.execute_statement(stat, params=params)
-        return inserted
+               f'(name, type_id, workout_time, user_permission) ' \
+               f'VALUES(?, ?, ?, ?)'
+        params = (workout_data.name, workout_data.type_id, workout_data.workout_time, user_permission)
+        with self.transaction():
+            if not self.execute_statement(stat, params=params):
+                return False
+            new_workout_id = self._last_insert_rowid()
+            if not self._update_workout_rows('workout_id', new_workout_id, workout_data.rows_data):
+                return False
+        return new_workout_id
 
     def select_workout_info(self, filters=None):
         stat = 'SELECT workout.id, workout.name, plan_type.name, plan_type.icon, ' \
                'workout.user_permission ' \
                'FROM workout ' \
                'LEFT JOIN plan_type ON workout.type_id = plan_type.id '
-        params = None
-        if filters:
-            statement_filter, params = self._create_filter_statement(filters)
-            stat += statement_filter
-        result_set = self.execute_statement(stat, params=params)
+        filter_shape, params = query.get_filter_shape(filters)
+        stat += query.where_clause(filter_shape)
+        result_set = self.execute_statement(stat, params=params or None, cached=True)
         # assert result_set, 'Week plan doent exist!'
         workout_info = [WorkoutListRow(*res) for res in result_set] if result_set else []
         return workout_info
 
     def update_workout(self, workout_id, workout_data):
+        """Updates workout and only its changed rows
+
+        :param workout_id <int>
+        :param workout_data <WorkoutData>
+        :raises DuplicateNameError If workout is renamed to existing workout name
+        """
         stat = 'UPDATE workout SET ' \
-               'name = ?, type_id = ?, data = ?, workout_time = ? ' \
+               'name = ?, type_id = ?, workout_time = ? ' \
                'WHERE id = ?;'
-        workout_rows_bytes = pickle.dumps(workout_data.rows_data)
-        params = (workout_data.name, workout_data.type_id, workout_rows_bytes,
-                  workout_data.workout_time, workout_id)
-        updated = self.execute_statement(stat, params=params)
+        params = (workout_data.name, workout_data.type_id, workout_data.workout_time, workout_id)
+        with self.transaction():
+            updated = self.execute_statement(stat, params=params) and \
+                self._update_workout_rows('workout_id', workout_id, workout_data.rows_data)
         return updated
 
     def delete_workout(self, workout_id):
@@ -345,32 +970,147 @@ class DB:
         deleted = self.execute_statement(stat, params=(workout_id,))
         return deleted
 
+    def delete_workouts(self, workout_ids):
+        """Deletes workouts in one transaction
+
+        :param workout_ids <list(<int>)>
+        :returns <list(<bool>)> Per row result(in order of 'workout_ids')
+        """
+        return self._delete_rows('workout', workout_ids)
+
     def get_table_row_obj_from_data(self, table_row_data):
+        """Builds one table row object from serialized row data(see 'build_table_rows')"""
+        return self.build_table_rows([table_row_data])[0]
+
+    def build_table_rows(self, rows_data):
+        """Builds table row objects from serialized rows data
+
+        Icons of all exercises in rows are selected with one query.
+
+        :param rows_data <list(<tuple>)> Rows data returned from method 'to_data' of table rows
+        :return list(<ExerciseExecutionRow> or <SupersetTopRow> or <SupersetBottomRow>)
+        """
         row_type_str_to_class = {
             str(TableRowType.SS_TOP): SupersetTopRow,
             str(TableRowType.SS_BOTTOM): SupersetBottomRow,
             str(TableRowType.EXER_EXEC): ExerciseExecutionRow,
         }
-        table_row_class = row_type_str_to_class[table_row_data[0]]
-        if table_row_class == ExerciseExecutionRow:
-            exer_id = table_row_data[1]
-            icon_bytes = self.select_exercise_icon(exer_id)
-            table_row_data = (exer_id, icon_bytes) + table_row_data[2:]
-        else:
-            table_row_data = table_row_data[1:]
-        return table_row_class(*table_row_data)
+        exer_ids = {row_data[1] for row_data in rows_data if row_data[0] == str(TableRowType.EXER_EXEC)}
+        icons = self.select_exercise_icons(exer_ids) if exer_ids else {}
+        table_rows = []
+        for table_row_data in rows_data:
+            table_row_class = row_type_str_to_class[table_row_data[0]]
+            if table_row_class == ExerciseExecutionRow:
+                exer_id = table_row_data[1]
+                if exer_id not in icons:
+                    raise ValueError(f'Exercise with id "{exer_id}" not found')
+                table_row_data = (exer_id, icons[exer_id]) + tuple(table_row_data[2:])
+            else:
+                table_row_data = table_row_data[1:]
+            table_rows.append(table_row_class(*table_row_data))
+        return table_rows
 
     def select_workout_rows_data(self, workout_id):
-        stat = f'SELECT data ' \
-               'FROM workout ' \
-               'WHERE id = ?'
+        stat = f'SELECT {self._workout_row_columns} ' \
+               'FROM workout_row ' \
+               'WHERE workout_id = ? ' \
+               'ORDER BY position'
         params = (workout_id,)
         result_set = self.execute_statement(stat, params=params)
-        workout_rows_data = pickle.loads(result_set[0][0])
-        return workout_rows_data
+        assert result_set is not False, 'Workout rows couldn\'t be selected!'
+        return tuple(row_data_from_columns(row_columns) for row_columns in result_set)
 
-    @staticmethod
-    def _format_column_value(value):
-        if type(value) == str:
-            value = value.replace("'", "''")
-        return value
+    def select_exercise_usage(self, exer_id):
+        """Returns names of workouts and plans that use exercise
+
+        :param exer_id <int>
+        :return <tuple(<list(<str>)>, <list(<str>)>)> Workout names, plan names
+        """
+        stat = 'SELECT DISTINCT workout.name, week_plan.name ' \
+               'FROM workout_row ' \
+               'LEFT JOIN workout ON workout.id = workout_row.workout_id ' \
+               'LEFT JOIN plan_day ON plan_day.id = workout_row.plan_day_id ' \
+               'LEFT JOIN week_plan ON week_plan.id = plan_day.week_plan_id ' \
+               'WHERE workout_row.exercise_id = ?'
+        result_set = self.execute_statement(stat, params=(exer_id,)) or []
+        workout_names = sorted({workout_name for workout_name, _ in result_set if workout_name})
+        plan_names = sorted({plan_name for _, plan_name in result_set if plan_name})
+        return workout_names, plan_names
+
+    @property
+    def _workout_row_columns(self):
+        return ', '.join(f'workout_row.{col}' for col in WORKOUT_ROW_DATA_COLUMNS)
+
+    def _update_plan_days(self, plan_id, workouts_data):
+        """Inserts, updates or deletes plan days(and their rows) that differ from 'workouts_data'
+
+        Must be called inside transaction.
+
+        :param plan_id <int>
+        :param workouts_data <list(<WorkoutData> or None)> One item per day
+        :return <bool>
+        """
+        stat = 'SELECT day, id, name, type_id, workout_time FROM plan_day WHERE week_plan_id = ?'
+        result_set = self.execute_statement(stat, params=(plan_id,))
+        if result_set is False:
+            return False
+        saved_days = {day: (day_id, tuple(header)) for day, day_id, *header in result_set}
+        for day, workout_data in enumerate(workouts_data):
+            day_id, saved_header = saved_days.get(day, (None, None))
+            if not workout_data:
+                if day_id is not None and \
+                        not self.execute_statement('DELETE FROM plan_day WHERE id = ?', params=(day_id,)):
+                    return False
+                continue
+            header = (workout_data.name, workout_data.type_id, workout_data.workout_time)
+            if day_id is None:
+                stat = 'INSERT INTO plan_day(name, type_id, workout_time, week_plan_id, day) ' \
+                       'VALUES(?, ?, ?, ?, ?)'
+                if not self.execute_statement(stat, params=header + (plan_id, day)):
+                    return False
+                day_id = self._last_insert_rowid()
+            elif header != saved_header:
+                stat = 'UPDATE plan_day SET name = ?, type_id = ?, workout_time = ? WHERE id = ?'
+                if not self.execute_statement(stat, params=header + (day_id,)):
+                    return False
+            if not self._update_workout_rows('plan_day_id', day_id, workout_data.rows_data):
+                return False
+        return True
+
+    def _update_workout_rows(self, owner_column, owner_id, rows_data):
+        """Updates rows of workout(or plan day) in table 'workout_row' to match 'rows_data'
+
+        Only changed rows are updated, missing rows are inserted and
+        surplus rows are deleted. Must be called inside transaction.
+
+        :param owner_column <str> 'workout_id' or 'plan_day_id'
+        :param owner_id <int>
+        :param rows_data <list(<tuple>)> Rows data returned from method 'to_data' of table rows
+        :return <bool>
+        """
+        stat = f'SELECT position, id, {self._workout_row_columns} ' \
+               f'FROM workout_row WHERE {owner_column} = ?'
+        result_set = self.execute_statement(stat, params=(owner_id,))
+        if result_set is False:
+            return False
+        saved_rows = {position: (row_id, tuple(columns)) for position, row_id, *columns in result_set}
+        update_params, insert_params = [], []
+        for position, row_data in enumerate(rows_data):
+            columns = row_data_to_columns(row_data)
+            if position not in saved_rows:
+                insert_params.append((owner_id, position) + columns)
+            elif saved_rows[position][1] != columns:
+                update_params.append(columns + (saved_rows[position][0],))
+        delete_params = [(row_id,) for position, (row_id, _) in saved_rows.items() if position >= len(rows_data)]
+        data_columns = ', '.join(WORKOUT_ROW_DATA_COLUMNS)
+        statements = (
+            ('DELETE FROM workout_row WHERE id = ?', delete_params),
+            (f'UPDATE workout_row SET {" = ?, ".join(WORKOUT_ROW_DATA_COLUMNS)} = ? WHERE id = ?',
+             update_params),
+            (f'INSERT INTO workout_row({owner_column}, position, {data_columns}) '
+             f'VALUES(?, ?, {", ".join("?" * len(WORKOUT_ROW_DATA_COLUMNS))})', insert_params),
+        )
+        for stat, params_seq in statements:
+            if params_seq and self.execute_many(stat, params_seq) is False:
+                return False
+        return True
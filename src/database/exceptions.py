@@ -0,0 +1,16 @@
+class DatabaseError(Exception):
+    """Base class for errors raised by <DB>"""
+
+
+class DuplicateNameError(DatabaseError):
+    """Raised when inserted(or updated) name is already used in table with unique names
+
+    Names are compared case-insensitive(see 'migration.UNIQUE_NAME_TABLES').
+    """
+
+    def __init__(self, table_name):
+        """
+        :param table_name <str>
+        """
+        super().__init__(f'Name already exists in table "{table_name}"')
+        self.table_name = table_name
@@ -0,0 +1,553 @@
+"""Versioned schema migrations for database
+
+Schema version is stored in 'PRAGMA user_version'. On startup every
+migration with version higher than the stored one is applied in order.
+Every migration runs in its own transaction together with the version
+update, so database is never left between two versions.
+"""
+import time
+import pickle
+import sqlite3
+import logging
+from pathlib import Path
+from collections import namedtuple
+
+import config
+
+from database.data_model import WORKOUT_ROW_DATA_COLUMNS, row_data_to_columns
+from util.images import get_image_hash
+
+
+# ----- Constants -----
+
+# Tables that are leftovers from development and are not used by the App
+DEAD_TABLES = (
+    'exercises_orig',
+    'exercises_backup',
+    'exercises_old',
+    'muscle_group_old',
+    'week_plan_old',
+)
+
+# Columns of table 'exercises' that can be filtered by(in exercise list filter box)
+EXERCISES_FILTER_COLUMNS = (
+    'type_id',
+    'body_part_id',
+    'main_muscle_group_id',
+    'equipment_id',
+    'favorite',
+    'user_permission',
+)
+
+# Tables that are written to by triggers when table(key) is written to
+# (must be updated when migration adds a trigger)
+TRIGGER_WRITTEN_TABLES = {
+    'exercises': ('exercise_icon', 'exercises_fts', 'workout_row', 'bookmark', 'image'),
+    'workout': ('workout_row', ),
+    'week_plan': ('plan_day', 'workout_row'),
+    'plan_day': ('workout_row', ),
+    'muscle_group': ('image', ),
+    'body_part': ('image', ),
+}
+
+# Columns which reference images in table 'image' by content hash(migration 9)
+# Format: (%table name%, %replaced BLOB column%, %image hash column%)
+IMAGE_REFERENCES = (
+    ('exercises', 'position_1', 'position_1_hash'),
+    ('exercises', 'position_2', 'position_2_hash'),
+    ('muscle_group', 'image', 'image_hash'),
+    ('body_part', 'image', 'image_hash'),
+)
+
+# Tables with unique names(case-insensitive)
+UNIQUE_NAME_TABLES = ('exercises', 'workout', 'week_plan')
+
+Migration = namedtuple('Migration', ('version', 'description', 'apply', 'vacuum'))
+
+# Oldest SQLite version which supports all statements of migrations
+# (FTS5 tokenizer option 'remove_diacritics 2' was added in 3.27)
+MIN_SQLITE_VERSION = (3, 27, 0)
+
+
+# ----- Helpers -----
+
+def _drop_columns(conn, table_name, column_names):
+    """Drops columns from table by rebuilding the table
+
+    'ALTER TABLE ... DROP COLUMN' needs SQLite 3.35, so table is created again
+    (from 'table_info' and 'foreign_key_list' of the old table) without the
+    columns, rows are copied and indexes, triggers and AUTOINCREMENT sequence
+    of the old table are restored. Table CHECK and inline UNIQUE constraints
+    are not kept(tables of the App don't have them).
+
+    :param conn <sqlite3.Connection> Connection with open transaction
+    :param table_name <str>
+    :param column_names <tuple(<str>)>
+    """
+    table_sql, = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                              (table_name, )).fetchone()
+    # Row format: (cid, name, type, notnull, dflt_value, pk)
+    columns = [column for column in conn.execute(f'PRAGMA table_info({table_name})')
+               if column[1] not in column_names]
+    pk_columns = sorted((column for column in columns if column[5]), key=lambda column: column[5])
+    column_defs = []
+    for _, name, column_type, notnull, default, pk in columns:
+        column_def = f'{name} {column_type}'.rstrip()
+        if pk and len(pk_columns) == 1:
+            column_def += ' PRIMARY KEY'
+            if 'AUTOINCREMENT' in table_sql.upper():
+                column_def += ' AUTOINCREMENT'
+        if notnull:
+            column_def += ' NOT NULL'
+        if default is not None:
+            column_def += f' DEFAULT {default}'
+        column_defs.append(column_def)
+    if len(pk_columns) > 1:
+        column_defs.append(f'PRIMARY KEY ({", ".join(column[1] for column in pk_columns)})')
+    # Row format: (id, seq, table, from, to, on_update, on_delete, match)
+    for _, _, ref_table, from_column, to_column, on_update, on_delete, _ in \
+            conn.execute(f'PRAGMA foreign_key_list({table_name})').fetchall():
+        if from_column in column_names:
+            continue
+        foreign_key = f'FOREIGN KEY ({from_column}) REFERENCES {ref_table}' + (f'({to_column})' if to_column else '')
+        if on_delete != 'NO ACTION':
+            foreign_key += f' ON DELETE {on_delete}'
+        if on_update != 'NO ACTION':
+            foreign_key += f' ON UPDATE {on_update}'
+        column_defs.append(foreign_key)
+    schema_sqls = [sql for sql, in conn.execute("SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') "
+                                                'AND tbl_name = ? AND sql IS NOT NULL', (table_name, ))]
+    has_sequence = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone()
+    sequence = conn.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table_name, )).fetchone() \
+        if has_sequence else None
+    column_list = ', '.join(column[1] for column in columns)
+    conn.execute(f'CREATE TABLE {table_name}_rebuilt({", ".join(column_defs)})')
+    conn.execute(f'INSERT INTO {table_name}_rebuilt({column_list}) SELECT {column_list} FROM {table_name}')
+    conn.execute(f'DROP TABLE {table_name}')
+    # References in triggers of other tables are not checked(they point to the table name again after rename)
+    conn.execute('PRAGMA legacy_alter_table = ON')
+    try:
+        conn.execute(f'ALTER TABLE {table_name}_rebuilt RENAME TO {table_name}')
+    finally:
+        conn.execute('PRAGMA legacy_alter_table = OFF')
+    for sql in schema_sqls:
+        conn.execute(sql)
+    if sequence:
+        # Ids of deleted rows are not reused(copied rows could set lower sequence, or none if table is empty)
+        conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (table_name, ))
+        conn.execute('INSERT INTO sqlite_sequence(name, seq) VALUES(?, ?)', (table_name, sequence[0]))
+
+
+# ----- Migration functions -----
+# Every function gets connection with open transaction and must not commit
+
+def _create_base_schema(conn):
+    """Creates base tables(which already exist in shipped database)"""
+    conn.execute('CREATE TABLE IF NOT EXISTS exercise_type('
+                 'id INTEGER PRIMARY KEY, '
+                 'name TEXT NOT NULL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS body_part('
+                 'id INTEGER PRIMARY KEY, '
+                 'name TEXT NOT NULL, '
+                 'image BLOB NOT NULL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS muscle_group('
+                 'id INTEGER PRIMARY KEY, '
+                 'name TEXT NOT NULL, '
+                 'image BLOB NOT NULL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS equipment('
+                 'id INTEGER PRIMARY KEY, '
+                 'name TEXT NOT NULL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS plan_type('
+                 'id INTEGER PRIMARY KEY, '
+                 'name TEXT NOT NULL, '
+                 'icon BLOB NOT NULL)')
+    conn.execute('CREATE TABLE IF NOT EXISTS exercises('
+                 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'name TEXT NOT NULL, '
+                 'type_id INTEGER NOT NULL, '
+                 'body_part_id INTEGER NOT NULL, '
+                 'main_muscle_group_id INTEGER NOT NULL, '
+                 'minor_muscle_group_id INTEGER DEFAULT NULL, '
+                 'equipment_id INTEGER NOT NULL, '
+                 'position_1 BLOB NOT NULL, '
+                 'position_2 BLOB DEFAULT NULL, '
+                 'icons_dict BLOB NOT NULL, '
+                 'instructions TEXT NOT NULL, '
+                 'favorite INTEGER DEFAULT 0, '
+                 'link TEXT DEFAULT NULL, '
+                 'user_permission INTEGER DEFAULT 0, '
+                 'FOREIGN KEY (type_id) REFERENCES exercise_type(id), '
+                 'FOREIGN KEY (body_part_id) REFERENCES body_part(id), '
+                 'FOREIGN KEY (main_muscle_group_id) REFERENCES muscle_group(id), '
+                 'FOREIGN KEY (minor_muscle_group_id) REFERENCES muscle_group(id), '
+                 'FOREIGN KEY (equipment_id) REFERENCES equipment(id))')
+    conn.execute('CREATE TABLE IF NOT EXISTS week_plan('
+                 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'name TEXT NOT NULL, '
+                 'plan_type_id INTEGER NOT NULL, '
+                 'workouts BLOB NOT NULL, '
+                 'user_permission INTEGER DEFAULT 0, '
+                 'FOREIGN KEY (plan_type_id) REFERENCES plan_type(id))')
+    conn.execute('CREATE TABLE IF NOT EXISTS workout('
+                 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'name TEXT NOT NULL, '
+                 'type_id INT NOT NULL, '
+                 'data BLOB NOT NULL, '
+                 'workout_time INTEGER NOT NULL, '
+                 'user_permission INTEGER DEFAULT 0, '
+                 'FOREIGN KEY (type_id) REFERENCES plan_type(id))')
+
+
+def _create_exercise_icon_table(conn):
+    """Creates table 'exercise_icon' and fills it with icons from 'exercises.icons_dict'
+
+    Every exercise gets one row per icon size, so list queries can select
+    only the icon of the set size(and don't unpickle all icon sizes).
+    """
+    conn.execute('CREATE TABLE IF NOT EXISTS exercise_icon('
+                 'exercise_id INTEGER NOT NULL, '
+                 'size INTEGER NOT NULL, '
+                 'bytes BLOB NOT NULL, '
+                 'FOREIGN KEY (exercise_id) REFERENCES exercises(id) ON DELETE CASCADE)')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_exercise_icon_exercise_size '
+                 'ON exercise_icon(exercise_id, size)')
+    # Icons are deleted with exercise even if foreign keys are not enforced
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_delete_icons AFTER DELETE ON exercises '
+                 'BEGIN DELETE FROM exercise_icon WHERE exercise_id = old.id; END')
+    icon_rows = []
+    for exer_id, icons_dict_bytes in conn.execute('SELECT id, icons_dict FROM exercises'):
+        icons_dict = pickle.loads(icons_dict_bytes)
+        icon_rows += [(exer_id, size, icon_bytes) for size, icon_bytes in icons_dict.items()]
+    conn.executemany('INSERT OR IGNORE INTO exercise_icon(exercise_id, size, bytes) VALUES(?, ?, ?)',
+                     icon_rows)
+
+
+def _drop_dead_tables(conn):
+    """Drops tables that are not used by the App"""
+    for table_name in DEAD_TABLES:
+        conn.execute(f'DROP TABLE IF EXISTS {table_name}')
+
+
+def _create_exercises_filter_indexes(conn):
+    """Creates indexes on columns used for filtering exercises
+
+    Every filter column index ends with column 'name', so filtered
+    exercises are already read in order of 'ORDER BY exercises.name'.
+    """
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_exercises_name ON exercises(name)')
+    for column_name in EXERCISES_FILTER_COLUMNS:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_exercises_{column_name} '
+                     f'ON exercises({column_name}, name)')
+
+
+def _create_exercises_fts_table(conn):
+    """Creates FTS5 table 'exercises_fts' over exercise names and instructions
+
+    Table is an external content table(text is stored only in 'exercises')
+    and is kept in sync with triggers.
+    """
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5("
+                 "name, instructions, content='exercises', content_rowid='id', "
+                 "prefix='2 3', tokenize='unicode61 remove_diacritics 2')")
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_insert AFTER INSERT ON exercises BEGIN '
+                 'INSERT INTO exercises_fts(rowid, name, instructions) '
+                 'VALUES (new.id, new.name, new.instructions); END')
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_delete AFTER DELETE ON exercises BEGIN '
+                 "INSERT INTO exercises_fts(exercises_fts, rowid, name, instructions) "
+                 "VALUES ('delete', old.id, old.name, old.instructions); END")
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_fts_update '
+                 'AFTER UPDATE OF name, instructions ON exercises BEGIN '
+                 "INSERT INTO exercises_fts(exercises_fts, rowid, name, instructions) "
+                 "VALUES ('delete', old.id, old.name, old.instructions); "
+                 'INSERT INTO exercises_fts(rowid, name, instructions) '
+                 'VALUES (new.id, new.name, new.instructions); END')
+    conn.execute("INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')")
+
+
+def _create_workout_row_tables(conn):
+    """Creates tables 'plan_day' and 'workout_row' and moves pickled workouts into them
+
+    Rows of saved workouts('workout.data') and workouts of plan days
+    ('week_plan.workouts') were stored as pickled BLOBs. Now every table
+    row is one row in 'workout_row', owned by a workout or by a plan day.
+    Pickle columns are dropped after their data is moved.
+    """
+    conn.execute('CREATE TABLE IF NOT EXISTS plan_day('
+                 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'week_plan_id INTEGER NOT NULL, '
+                 'day INTEGER NOT NULL, '
+                 'name TEXT NOT NULL, '
+                 'type_id INTEGER NOT NULL, '
+                 'workout_time INTEGER NOT NULL, '
+                 'FOREIGN KEY (week_plan_id) REFERENCES week_plan(id) ON DELETE CASCADE, '
+                 'FOREIGN KEY (type_id) REFERENCES plan_type(id))')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_plan_day_plan_day ON plan_day(week_plan_id, day)')
+    conn.execute('CREATE TABLE IF NOT EXISTS workout_row('
+                 'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                 'workout_id INTEGER DEFAULT NULL, '
+                 'plan_day_id INTEGER DEFAULT NULL, '
+                 'position INTEGER NOT NULL, '
+                 'row_type TEXT NOT NULL, '
+                 'exercise_id INTEGER DEFAULT NULL, '
+                 'exercise_name TEXT DEFAULT NULL, '
+                 'superset_numb INTEGER DEFAULT NULL, '
+                 'sets INTEGER DEFAULT NULL, '
+                 'reps INTEGER DEFAULT NULL, '
+                 'pause INTEGER DEFAULT NULL, '
+                 'on_reps INTEGER DEFAULT NULL, '
+                 'CHECK ((workout_id IS NULL) <> (plan_day_id IS NULL)), '
+                 'FOREIGN KEY (workout_id) REFERENCES workout(id) ON DELETE CASCADE, '
+                 'FOREIGN KEY (plan_day_id) REFERENCES plan_day(id) ON DELETE CASCADE, '
+                 'FOREIGN KEY (exercise_id) REFERENCES exercises(id) ON DELETE SET NULL)')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_row_workout_position '
+                 'ON workout_row(workout_id, position)')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_row_plan_day_position '
+                 'ON workout_row(plan_day_id, position)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_workout_row_exercise ON workout_row(exercise_id)')
+    # Foreign key actions are done with triggers, because foreign keys are not enforced
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_workout_delete_rows AFTER DELETE ON workout '
+                 'BEGIN DELETE FROM workout_row WHERE workout_id = old.id; END')
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_week_plan_delete_days AFTER DELETE ON week_plan '
+                 'BEGIN DELETE FROM plan_day WHERE week_plan_id = old.id; END')
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_plan_day_delete_rows AFTER DELETE ON plan_day '
+                 'BEGIN DELETE FROM workout_row WHERE plan_day_id = old.id; END')
+    # Rows of deleted exercise are kept(with exercise name), so they can be reported as missing
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_delete_workout_rows AFTER DELETE ON exercises '
+                 'BEGIN UPDATE workout_row SET exercise_id = NULL WHERE exercise_id = old.id; END')
+    # ----- Move pickled workouts -----
+    insert_row_stat = f'INSERT INTO workout_row(workout_id, plan_day_id, position, ' \
+                      f'{", ".join(WORKOUT_ROW_DATA_COLUMNS)}) ' \
+                      f'VALUES(?, ?, ?, {", ".join("?" * len(WORKOUT_ROW_DATA_COLUMNS))})'
+    workout_rows = []
+    for workout_id, rows_data_bytes in conn.execute('SELECT id, data FROM workout'):
+        for position, row_data in enumerate(pickle.loads(rows_data_bytes)):
+            workout_rows.append((workout_id, None, position) + row_data_to_columns(row_data))
+    for plan_id, workouts_data_bytes in conn.execute('SELECT id, workouts FROM week_plan').fetchall():
+        for day, workout_data in enumerate(pickle.loads(workouts_data_bytes)):
+            if not workout_data:
+                continue
+            cursor = conn.execute('INSERT INTO plan_day(week_plan_id, day, name, type_id, workout_time) '
+                                  'VALUES(?, ?, ?, ?, ?)',
+                                  (plan_id, day, workout_data.name, workout_data.type_id,
+                                   workout_data.workout_time))
+            for position, row_data in enumerate(workout_data.rows_data):
+                workout_rows.append((None, cursor.lastrowid, position) + row_data_to_columns(row_data))
+    conn.executemany(insert_row_stat, workout_rows)
+    _drop_columns(conn, 'workout', ('data', ))
+    _drop_columns(conn, 'week_plan', ('workouts', ))
+
+
+def _create_unique_name_indexes(conn):
+    """Creates case-insensitive unique indexes on names of exercises, workouts and plans
+
+    Duplicated names(which differ only in case) are renamed first by
+    appending number in brackets, e.g. "Legs" -> "Legs (2)".
+    """
+    for table_name in UNIQUE_NAME_TABLES:
+        used_names = {name.lower() for name, in conn.execute(f'SELECT name FROM {table_name}')}
+        duplicates = conn.execute(f'SELECT id, name FROM {table_name} WHERE id NOT IN '
+                                  f'(SELECT MIN(id) FROM {table_name} GROUP BY name COLLATE NOCASE) '
+                                  f'ORDER BY id').fetchall()
+        for row_id, name in duplicates:
+            numb = 2
+            while f'{name} ({numb})'.lower() in used_names:
+                numb += 1
+            new_name = f'{name} ({numb})'
+            used_names.add(new_name.lower())
+            conn.execute(f'UPDATE {table_name} SET name = ? WHERE id = ?', (new_name, row_id))
+            logging.warning(f'(Database) Duplicated name "{name}" in table "{table_name}" '
+                            f'renamed to "{new_name}"')
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_name_nocase '
+                     f'ON {table_name}(name COLLATE NOCASE)')
+
+
+def _create_bookmark_table(conn):
+    """Creates table 'bookmark' and moves bookmarks from bookmarks file into it
+
+    Bookmarks of deleted exercises(which could remain in file) are skipped.
+    """
+    conn.execute('CREATE TABLE IF NOT EXISTS bookmark('
+                 'exercise_id INTEGER PRIMARY KEY, '
+                 'position INTEGER NOT NULL, '
+                 'FOREIGN KEY (exercise_id) REFERENCES exercises(id) ON DELETE CASCADE)')
+    conn.execute('CREATE TRIGGER IF NOT EXISTS trg_exercises_delete_bookmark AFTER DELETE ON exercises '
+                 'BEGIN DELETE FROM bookmark WHERE exercise_id = old.id; END')
+    bookmarks_file = Path(config.BOOKMARKS_FILE)
+    if not bookmarks_file.exists():
+        return
+    exer_ids = [int(line) for line in bookmarks_file.read_text().split() if line.isdigit()]
+    conn.executemany('INSERT OR IGNORE INTO bookmark(exercise_id, position) '
+                     'SELECT id, ? FROM exercises WHERE id = ?',
+                     [(position, exer_id) for position, exer_id in enumerate(exer_ids)])
+
+
+def _create_image_table(conn):
+    """Creates table 'image' and moves inline images into it(deduplicated)
+
+    Every image is stored once, keyed by hash of its content, and tables
+    reference it by hash(see 'IMAGE_REFERENCES'). Column 'ref_count'
+    is kept up to date by triggers, which also delete images that are
+    not referenced anymore.
+    """
+    # 'ref_count' is before 'bytes', so it's read without reading BLOB overflow pages
+    conn.execute('CREATE TABLE IF NOT EXISTS image('
+                 'hash TEXT PRIMARY KEY, '
+                 'ref_count INTEGER NOT NULL DEFAULT 0, '
+                 'bytes BLOB NOT NULL)')
+    for table_name, blob_column, hash_column in IMAGE_REFERENCES:
+        conn.execute(f'ALTER TABLE {table_name} ADD COLUMN {hash_column} TEXT DEFAULT NULL')
+        row_hashes = []
+        cursor = conn.execute(f'SELECT id, {blob_column} FROM {table_name} WHERE {blob_column} IS NOT NULL')
+        for row_id, image_bytes in cursor:
+            image_hash = get_image_hash(image_bytes)
+            conn.execute('INSERT OR IGNORE INTO image(hash, bytes) VALUES(?, ?)', (image_hash, image_bytes))
+            row_hashes.append((image_hash, row_id))
+        conn.executemany(f'UPDATE {table_name} SET {hash_column} = ? WHERE id = ?', row_hashes)
+    # Table is rebuilt once for all its image columns
+    blob_columns = {}
+    for table_name, blob_column, _ in IMAGE_REFERENCES:
+        blob_columns.setdefault(table_name, []).append(blob_column)
+    for table_name, column_names in blob_columns.items():
+        _drop_columns(conn, table_name, tuple(column_names))
+    for table_name, _, hash_column in IMAGE_REFERENCES:
+        conn.execute(f'UPDATE image SET ref_count = ref_count + '
+                     f'(SELECT COUNT(*) FROM {table_name} WHERE {hash_column} = image.hash)')
+        _create_image_reference_triggers(conn, table_name, hash_column)
+    numb_of_references = sum(ref_count for ref_count, in conn.execute('SELECT ref_count FROM image'))
+    numb_of_images = conn.execute('SELECT COUNT(*) FROM image').fetchone()[0]
+    logging.info(f'(Database) {numb_of_references} inline images moved to table "image" '
+                 f'as {numb_of_images} unique images')
+
+
+def _create_image_reference_triggers(conn, table_name, hash_column):
+    """Creates triggers which count references of images from column
+
+    Image is deleted when its last reference is deleted(or changed).
+    """
+    trigger_prefix = f'trg_{table_name}_{hash_column}'
+    increment = f'UPDATE image SET ref_count = ref_count + 1 WHERE hash = new.{hash_column};'
+    decrement = f'UPDATE image SET ref_count = ref_count - 1 WHERE hash = old.{hash_column}; ' \
+                f'DELETE FROM image WHERE hash = old.{hash_column} AND ref_count <= 0;'
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger_prefix}_insert AFTER INSERT ON {table_name} '
+                 f'WHEN new.{hash_column} IS NOT NULL BEGIN {increment} END')
+    # New image is referenced first, so image that stays referenced is never deleted
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger_prefix}_update '
+                 f'AFTER UPDATE OF {hash_column} ON {table_name} '
+                 f'WHEN new.{hash_column} IS NOT old.{hash_column} BEGIN {increment} {decrement} END')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS {trigger_prefix}_delete AFTER DELETE ON {table_name} '
+                 f'WHEN old.{hash_column} IS NOT NULL BEGIN {decrement} END')
+
+
+# Ordered list of all migrations. New migration is added at the end with next version.
+MIGRATIONS = (
+    Migration(1, 'Create base schema', _create_base_schema, False),
+    Migration(2, 'Create table "exercise_icon"', _create_exercise_icon_table, False),
+    Migration(3, 'Drop dead tables', _drop_dead_tables, True),
+    Migration(4, 'Create exercises filter indexes', _create_exercises_filter_indexes, False),
+    Migration(5, 'Create table "exercises_fts"', _create_exercises_fts_table, False),
+    Migration(6, 'Move pickled workout rows to tables "plan_day" and "workout_row"',
+              _create_workout_row_tables, True),
+    Migration(7, 'Create unique name indexes', _create_unique_name_indexes, False),
+    Migration(8, 'Create table "bookmark"', _create_bookmark_table, False),
+    Migration(9, 'Move images to content-addressed table "image"', _create_image_table, True),
+)
+
+
+# ----- Runner -----
+
+def get_schema_version(conn):
+    """Returns schema version of database
+
+    :param conn <sqlite3.Connection>
+    :return <int>
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migration(conn, migration):
+    """Applies one migration and sets schema version in the same transaction
+
+    :param conn <sqlite3.Connection> Connection in autocommit mode
+    :param migration <Migration>
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        migration.apply(conn)
+        # 'user_version' is a part of database header, so it's also rolled back on error
+        conn.execute(f'PRAGMA user_version = {int(migration.version)}')
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def optimize(conn, vacuum=False, analyze=True):
+    """Runs 'VACUUM' and/or 'ANALYZE' on database
+
+    Must be called outside transaction('VACUUM' can't run inside one).
+
+    :param conn <sqlite3.Connection> Connection in autocommit mode
+    :param vacuum <bool> Rebuilds database file(frees pages of dropped tables)
+    :param analyze <bool> Updates statistics used by query planner
+    """
+    start = time.perf_counter()
+    if vacuum:
+        conn.execute('VACUUM')
+    if analyze:
+        conn.execute('ANALYZE')
+    logging.info(f'(Database) Optimized database(vacuum={vacuum}, analyze={analyze}) '
+                 f'in {time.perf_counter() - start:.3f} s')
+
+
+def get_unsupported_features(conn):
+    """Returns SQLite features needed by migrations which linked SQLite library doesn't have
+
+    :param conn <sqlite3.Connection> Connection in autocommit mode
+    :return <list(<str>)> Empty if all features are supported
+    """
+    unsupported_features = []
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        unsupported_features.append(f'SQLite {".".join(map(str, MIN_SQLITE_VERSION))} or newer '
+                                    f'(found {sqlite3.sqlite_version})')
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_check USING fts5(text)')
+        conn.execute('DROP TABLE temp.fts5_check')
+    except sqlite3.OperationalError:
+        unsupported_features.append('FTS5 full-text search extension')
+    return unsupported_features
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Applies all migrations with version higher than database schema version
+
+    Migrations are applied in order. If one fails, it's rolled back and the
+    next ones are not applied(database stays on the last applied version).
+
+    :param conn <sqlite3.Connection> Connection in autocommit mode
+    :param migrations <tuple(<Migration>)> Ordered by version
+    :return <bool> False if some migration failed
+    """
+    schema_version = get_schema_version(conn)
+    pending = [migration for migration in migrations if migration.version > schema_version]
+    if not pending:
+        return True
+    # Checked up front, so database isn't migrated half way
+    unsupported_features = get_unsupported_features(conn)
+    if unsupported_features:
+        logging.error(f'(Database) Migrations not applied, SQLite library is missing: {unsupported_features}')
+        return False
+    start = time.perf_counter()
+    for migration in pending:
+        migration_start = time.perf_counter()
+        try:
+            apply_migration(conn, migration)
+        except Exception as ex:
+            logging.error(f'(Database) Migration {migration.version} '
+                          f'"{migration.description}" failed', exc_info=ex)
+            return False
+        logging.info(f'(Database) Applied migration {migration.version} "{migration.description}" '
+                     f'in {time.perf_counter() - migration_start:.3f} s')
+    optimize(conn, vacuum=any(migration.vacuum for migration in pending))
+    logging.info(f'(Database) Schema migrated from version {schema_version} to '
+                 f'{pending[-1].version} in {time.perf_counter() - start:.3f} s')
+    return True
@@ -0,0 +1,130 @@
+"""Builds canonical SQL statements for <DB> methods
+
+Statements are built from hashable keys(table, columns, filter shape) and
+memoized, so the same lookup always produces the same SQL text. This way
+the sqlite3 statement cache(per connection) reuses compiled statements.
+"""
+import re
+from functools import lru_cache
+
+
+# ----- Constants -----
+
+STATEMENT_CACHE_SIZE = 256
+
+LIKE_OPERATOR = 'LIKE'
+EQUAL_OPERATOR = '='
+MATCH_OPERATOR = 'MATCH'
+
+_FTS_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def get_filter_shape(filters):
+    """Splits filters into filter shape and statement parameters
+
+    Filter shape is a sorted tuple of (column name, operator) pairs, so
+    filters with the same columns always produce the same statement.
+    Column value which is a string containing '%' is filtered with 'LIKE'.
+
+    :param filters <dict> or None Format= Key<str>:Value<object>
+    :return <tuple(<tuple(<tuple(<str>, <str>)>)>, <tuple>)> Filter shape and params
+    """
+    if not filters:
+        return (), ()
+    filter_shape = []
+    params = []
+    for column_name in sorted(filters.keys()):
+        column_value = filters[column_name]
+        operator = LIKE_OPERATOR if type(column_value) == str and '%' in column_value \
+            else EQUAL_OPERATOR
+        filter_shape.append((column_name, operator))
+        params.append(column_value)
+    return tuple(filter_shape), tuple(params)
+
+
+def fts_match_expression(search_text):
+    """Returns FTS5 'MATCH' expression for text typed by user
+
+    Every word is quoted(so FTS5 syntax chars are not interpreted) and
+    matched as prefix. All words must match.
+    Example: 'bench pre' -> '"bench"* "pre"*'
+
+    :param search_text <str>
+    :return <str> or None If text has no words
+    """
+    tokens = _FTS_TOKEN_PATTERN.findall(search_text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def where_clause(filter_shape):
+    """Returns 'WHERE' segment of statement(or empty string for no filters)
+
+    :param filter_shape <tuple> Filter shape returned from 'get_filter_shape'
+    :return <str>
+    """
+    if not filter_shape:
+        return ''
+    conditions = [f'{column_name} {operator} ?' for column_name, operator in filter_shape]
+    return ' WHERE ' + ' AND '.join(conditions)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def select_statement(from_clause, columns, filter_shape=(), order_by=None):
+    """Returns 'SELECT' statement
+
+    :param from_clause <str> Table name or table name with joins
+    :param columns <tuple(<str>)> Column names
+    :param filter_shape <tuple> Filter shape returned from 'get_filter_shape'
+    :param order_by <str> or None Column name for ascending order
+    :return <str>
+    """
+    statement = f'SELECT {", ".join(columns)} FROM {from_clause}' + where_clause(filter_shape)
+    if order_by:
+        statement += f' ORDER BY {order_by} ASC'
+    return statement
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def update_statement(table_name, columns, key_column='id'):
+    """Returns 'UPDATE' statement for one row with given key column
+
+    Statement params are column values(in order of columns) and key value.
+
+    :param table_name <str>
+    :param columns <tuple(<str>)> Column names to update
+    :param key_column <str> Column name used to find updated row
+    :return <str>
+    """
+    set_segment = ', '.join(f'{column_name} = ?' for column_name in columns)
+    return f'UPDATE {table_name} SET {set_segment} WHERE {key_column} = ?'
+
+
+# ----- Tables used by statements -----
+
+_READ_TABLES_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)', re.IGNORECASE)
+_WRITTEN_TABLE_PATTERN = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def get_read_tables(statement):
+    """Returns names of tables that SELECT statement reads from
+
+    :param statement <str>
+    :return <tuple(<str>)>
+    """
+    return tuple(sorted(set(_READ_TABLES_PATTERN.findall(statement))))
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def get_written_table(statement):
+    """Returns name of table that INSERT, UPDATE or DELETE statement writes to
+
+    :param statement <str>
+    :return <str> or None If statement doesn't write to table
+    """
+    match = _WRITTEN_TABLE_PATTERN.match(statement)
+    return match.group(1) if match else None
@@ -0,0 +1,118 @@
+import threading
+
+from util.cache import LRUCache
+
+
+# ----- Constants -----
+
+QUERY_CACHE_MAX_SIZE = 512  # Max number of cached result sets
+QUERY_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Max sum of cached BLOB and text sizes
+
+
+def _get_result_set_cost(result_set):
+    """Returns approximate size(in bytes) of result set
+
+    Only BLOB and text values are counted(other values are small).
+
+    :param result_set <list(<tuple>)>
+    :return <int>
+    """
+    return sum(len(value) for row in result_set for value in row if isinstance(value, (bytes, str)))
+
+
+class QueryCache:
+    """Read-through cache of SELECT result sets, keyed by (statement, params)
+
+    Every table has a generation counter which is incremented on every
+    write(INSERT, UPDATE or DELETE) to that table. Cached result set is
+    stamped with generations of tables it was read from and it's returned
+    only if none of these tables was written to since then.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_MAX_SIZE, maxbytes=QUERY_CACHE_MAX_BYTES):
+        """
+        :param maxsize <int> Max number of cached result sets
+        :param maxbytes <int> Max sum of BLOB and text sizes in cached result sets
+        """
+        self._cache = LRUCache(maxsize=maxsize, maxbytes=maxbytes)
+        self._generations = {}  # Key=%table name%, Value=%generation%
+        # Incremented when any table may be changed(e.g. after schema migration)
+        self._global_generation = 0
+        # Statements are executed on GUI and worker threads
+        self._lock = threading.Lock()
+
+    def get(self, statement, params, tables):
+        """Returns cached result set or None if it's not cached(or it's stale)
+
+        :param statement <str>
+        :param params <tuple> or None
+        :param tables <tuple(<str>)> Tables that statement reads from
+        :return <list(<tuple>)> or None
+        """
+        with self._lock:
+            cached = self._cache.get((statement, params))
+            if cached is None:
+                return None
+            stamp, result_set = cached
+            if stamp != self._get_stamp(tables):
+                # Stale result set is counted as a miss
+                self._cache.hits -= 1
+                self._cache.misses += 1
+                self._cache.invalidate((statement, params))
+                return None
+            return list(result_set)
+
+    def get_stamp(self, tables):
+        """Returns current generations of tables
+
+        Stamp must be taken before statement is executed, so result set
+        is never stamped with generation of a write that happened later.
+
+        :param tables <tuple(<str>)>
+        :return <tuple(<int>)>
+        """
+        with self._lock:
+            return self._get_stamp(tables)
+
+    def put(self, statement, params, stamp, result_set):
+        """Caches result set with stamp(see 'get_stamp')
+
+        :param statement <str>
+        :param params <tuple> or None
+        :param stamp <tuple(<int>)>
+        :param result_set <list(<tuple>)>
+        """
+        with self._lock:
+            self._cache.put((statement, params), (stamp, tuple(result_set)),
+                            cost=_get_result_set_cost(result_set))
+
+    def tables_changed(self, table_names=None):
+        """Increments generations of changed tables(cached result sets read from them become stale)
+
+        :param table_names <Iterable(<str>)> or None If None, all tables may be changed
+        """
+        with self._lock:
+            if table_names is None:
+                self._global_generation += 1
+                self._cache.clear()
+                return
+            for table_name in table_names:
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self):
+        """Returns cache statistics(with hit rate)
+
+        :return <dict>
+        """
+        with self._lock:
+            stats = self._cache.get_stats()
+        numb_of_reads = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / numb_of_reads, 3) if numb_of_reads else 0.0
+        return stats
+
+    def _get_stamp(self, tables):
+        return (self._global_generation, ) + tuple(self._generations.get(table, 0) for table in tables)
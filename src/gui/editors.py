@@ -12,6 +12,8 @@ from config import DAYS, DAYS_TITLE, APP_MODE, AppMode
 from settings import Settings
 from ._delegates import TableEditorItemDelegate, TableViewerItemDelegate
 from database.db_obj import DB
+from database.catalog import ReferenceCatalog
+from database.exceptions import DuplicateNameError
 from database.data_model import (
     ExerciseListModel, ExerciseListRow, TableModel,
     EditableTableModel, ExerciseExecutionRow, SupersetRow,
@@ -42,6 +44,7 @@ from gui.dialogs import (
 from gui.flags import ImageFp, LayoutOrientation, SizePolicy, Orientation, Key, AlignFlag, MotType, TableRowType
 from gui.colors import Colors, ThemeType
 from gui.util import get_parent, set_value, get_value, find_widget_by_attr, set_widget_property
+from gui.workers import DebouncedQuery
 from util import images
 from util.obj import AttrObject
 from util.value import int_list_in_order
@@ -50,10 +53,17 @@ from workout import (
     get_available_generic_workout_name, get_default_exer_exec_data,
     get_default_col_value, calc_workout_time,
     PLAN_NAME_CHECK_ERROR_MSG, WORKOUT_NAME_CHECK_ERROR_MSG,
-    EXERCISE_FILTERED_NAME_CHECK_ERROR_MSG, filter_existing_exercise_row_data
+    EXERCISE_FILTERED_NAME_CHECK_ERROR_MSG, filter_existing_exercise_row_data,
+    get_exercise_ids_from_row_data,
 )
 
 
+# -------------- Constants -------------
+
+# Key in exercise filter dict for text searched in exercise names and instructions
+SEARCH_TEXT_FILTER_KEY = 'search_text'
+
+
 # -------------- Methods -------------
 
 
@@ -103,11 +113,27 @@ def table_altered(func):
     return check_table
 
 
+def _select_exercise_list_data(filters):
+    """Selects exercise list data for filters from <_FilterBox>
+
+    Used also on worker thread, so it returns only db values.
+
+    :param filters <dict> or None
+    :return list(<tuple(<int>, <str>)>) or False
+    """
+    filters = dict(filters or {})
+    search_text = filters.pop(SEARCH_TEXT_FILTER_KEY, None)
+    if search_text:
+        return DB().search_exercise_list_data(search_text, filters)
+    return DB().select_exercise_list_data(filters)
+
+
 # ----- Left pane -----
 
 
 class _FilterBox(QtWidgets.QWidget):
     signal_filter_activated = QtCore.pyqtSignal(dict)
+    signal_filter_changed = QtCore.pyqtSignal(dict)
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -147,6 +173,11 @@ class _FilterBox(QtWidgets.QWidget):
         # Connect events to slots
         self.bttn_reset.clicked.connect(self._bttn_reset_clicked)
         self.bttn_filter.clicked.connect(self._bttn_filter_clicked)
+        for cb in self.combo_boxes:
+            cb.currentIndexChanged.connect(self._filter_changed)
+        self.exer_name.signal_text_changed.connect(self._filter_changed)
+        self.rb_box_favorite.signal_rb_clicked.connect(self._filter_changed)
+        self.rb_box_user_exer.signal_rb_clicked.connect(self._filter_changed)
 
     def init_ui(self):
         self.label_exer_type = MyLabel(self, 'label_exer_type', 'Exercise type: ', FontFlag.NORMAL_TEXT)
@@ -156,16 +187,16 @@ class _FilterBox(QtWidgets.QWidget):
         self.label_name = MyLabel(self, 'label_name', 'Exercise name: ', FontFlag.NORMAL_TEXT)
         self.label_favorite = MyLabel(self, 'label_favorite', 'Favorite: ', FontFlag.NORMAL_TEXT)
         self.label_user_exer = MyLabel(self, 'label_user_exer', 'User exercise: ', FontFlag.NORMAL_TEXT)
-        _id_name_dict = dict(DB().select_from_table('exercise_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('exercise_type')
         self.cb_exer_type = FilterDBComboBox(
             self, 'cb_exer_type', _id_name_dict, 'exercises.type_id', first_item='All')
-        _id_name_dict = dict(DB().select_from_table('body_part', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('body_part')
         self.cb_body_part = FilterDBComboBox(
             self, 'cb_body_part', _id_name_dict, 'exercises.body_part_id', first_item='All')
-        _id_name_dict = dict(DB().select_from_table('muscle_group', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('muscle_group')
         self.cb_muscle_group = FilterDBComboBox(
             self, 'cb_muscle_group', _id_name_dict, 'exercises.main_muscle_group_id', first_item='All')
-        _id_name_dict = dict(DB().select_from_table('equipment', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('equipment')
         self.cb_equipment = FilterDBComboBox(
             self, 'cb_equipment', _id_name_dict, 'exercises.equipment_id', first_item='All')
         self.exer_name = ValidatedLineEdit(
@@ -221,28 +252,37 @@ class _FilterBox(QtWidgets.QWidget):
         set_value(self.rb_box_favorite, None)
         set_value(self.rb_box_user_exer, None)
 
-    def _bttn_filter_clicked(self):
-        # ----- Check exercise name -----
-        if not self.exer_name.valid:
-            _msg = 'Exercise name is not valid'
-            ErrorMessage('Filter exercises failed', _msg).exec()
-            return
-        # Create db filter dict
+    def get_db_filters(self):
+        """Returns db filter dict created from set filters
+
+        :return <dict>
+        """
         filters = {}
         for cb in self.combo_boxes:
             filters.update(cb.get_db_filter_dict())
         exer_name = get_value(self.exer_name)
-        # if exer_name and self.exer_name != self.filtered_name:
         if exer_name:
-            filters.update({'exercises.name': f'%{exer_name}%'})
+            filters.update({SEARCH_TEXT_FILTER_KEY: exer_name})
         favorite_value = self.rb_box_favorite.checked_value
-        # if favorite_value is not None and self.filtered_favorite != favorite_value:
         if favorite_value is not None:
             filters.update({'favorite': favorite_value})
         user_exer_value = self.rb_box_user_exer.checked_value
         if user_exer_value is not None:
             filters.update({'user_permission': user_exer_value})
-        self.signal_filter_activated.emit(filters)
+        return filters
+
+    def _filter_changed(self):
+        if not self.exer_name.valid:
+            return
+        self.signal_filter_changed.emit(self.get_db_filters())
+
+    def _bttn_filter_clicked(self):
+        # ----- Check exercise name -----
+        if not self.exer_name.valid:
+            _msg = 'Exercise name is not valid'
+            ErrorMessage('Filter exercises failed', _msg).exec()
+            return
+        self.signal_filter_activated.emit(self.get_db_filters())
 
 
 # noinspection PyTypeChecker
@@ -382,8 +422,9 @@ class _ExerciseListBox(QtWidgets.QFrame):
         super().__init__(parent)
         # Data
         self.exer_per_page = int(Settings().getValue('exer_per_page'))
+        # Only ids and names are loaded, icons are loaded by model for shown page
         self.exercises = DB().select_exercise_list_rows()
-        self.model = ExerciseListModel(self.exercises[:self.exer_per_page])
+        self.model = self._create_model(self.exercises[:self.exer_per_page])
         # Gui children
         self.title = None
         self.page_selector = None
@@ -426,43 +467,36 @@ class _ExerciseListBox(QtWidgets.QFrame):
         return True
 
     def change_selected_name(self, new_name):
-        sel_exer_id = self.list_exercises.get_selected_item_id()
         index = self.list_exercises.selectedIndexes()[0]
-        icon = self.model.rows[index.row()].icon
-        # TODO: fix this: must change only name and not create new row
-        new_row = ExerciseListRow(sel_exer_id, new_name, icon)
-        self.model.rows[index.row()] = new_row
+        self.model.rows[index.row()].name = new_name
 
     def reset_pages_and_exercise_list(self, exercises):
         self.exercises = exercises
         numb_of_pages = len(self.exercises) // self.exer_per_page + 1
         self.page_selector.reset_widgets(numb_of_pages)
-        self.model = ExerciseListModel(exercises[:self.exer_per_page])
+        self.model = self._create_model(exercises[:self.exer_per_page])
         self.list_exercises.setModel(self.model)
 
     def refresh_icon_name(self, exer_id):
-        icons_dict, name = DB().select_from_table('exercises', ('icons_dict', 'name'),
-                                                  filters={'id': exer_id})
-        icon_bytes = DB().get_icon_bytes_from_icons_dict(icons_dict)
+        name = DB().select_from_table('exercises', 'name', filters={'id': exer_id})
         for exer_row in self.exercises:
             if exer_row.exer_id == exer_id:
-                exer_row.icon_bytes = icon_bytes
                 exer_row.name = name
                 break
-        list_model = self.list_exercises.model()
-        for row, exer_row in enumerate(list_model.rows):
-            if exer_row.exer_id == exer_id:
-                new_row = ExerciseListRow(exer_id, name, icon_bytes)
-                list_model.setData(list_model.index(row), new_row,
-                                   QtCore.Qt.ItemDataRole.EditRole)
-                break
+        self.list_exercises.model().refresh_row(exer_id, name)
+
+    def _create_model(self, exercise_rows):
+        model = ExerciseListModel(exercise_rows, icon_loader=DB().select_exercise_icons)
+        # Icons of page are loaded before it's shown(not while list is painted)
+        model.prefetch_icons()
+        return model
 
     # ----- SLOTS -----
 
     def _page_changed(self, page_numb):
         first_index = self.exer_per_page * (page_numb - 1)
         last_index = first_index + self.exer_per_page
-        self.model = ExerciseListModel(self.exercises[first_index:last_index])
+        self.model = self._create_model(self.exercises[first_index:last_index])
         self.list_exercises.setModel(self.model)
         self.list_exercises.select_index(0)
 
@@ -482,6 +516,7 @@ class ExerciseListViewer(QtWidgets.QFrame):
         ''' % (str(Colors.CONTAINER_2.rgba), Colors.CONTAINER_1.hex))
         # ----- Data -----
         self.active_filters = None
+        self.filter_query = DebouncedQuery(self, _select_exercise_list_data)
         # ----- GUI children -----
         self.vbox_layout = None
         self.resize_pane = None
@@ -491,6 +526,8 @@ class ExerciseListViewer(QtWidgets.QFrame):
         self.init_ui()
         # ----- Connect events to slots -----
         self.filter_box.signal_filter_activated.connect(self._filter_clicked)
+        self.filter_box.signal_filter_changed.connect(self._filter_changed)
+        self.filter_query.signal_result.connect(self._filter_query_finished)
 
     def init_ui(self):
         self.filter_box = _FilterBox(self)
@@ -521,14 +558,20 @@ class ExerciseListViewer(QtWidgets.QFrame):
             list_exercises.select_index(row_to_select)
 
     def _filter_exercises(self, filters=None, show_msg=True):
-        exercises = DB().select_exercise_list_rows(filters)
-        if not exercises:
+        # Result of scheduled(or running) query would overwrite this one
+        self.filter_query.cancel()
+        exercises_data = _select_exercise_list_data(filters)
+        if not exercises_data:
             if show_msg:
                 InfoMessage('No exercises found!', 'Can\'t find any exercise using set filters!').exec()
             return False
+        self._set_exercises(exercises_data)
+        return True
+
+    def _set_exercises(self, exercises_data):
+        exercises = [ExerciseListRow(*row) for row in exercises_data]
         self.exercises_box.reset_pages_and_exercise_list(exercises)
         self.exercises_box.list_exercises.select_index(0)
-        return True
 
     # ----- SLOTS -----
 
@@ -537,6 +580,16 @@ class ExerciseListViewer(QtWidgets.QFrame):
         if filtered:
             self.active_filters = filters
 
+    def _filter_changed(self, filters):
+        self.filter_query.request(filters)
+
+    def _filter_query_finished(self, args, exercises_data):
+        if not exercises_data:
+            # List isn't changed when no exercises are found(same as with filter button)
+            return
+        self._set_exercises(exercises_data)
+        self.active_filters = args[0]
+
 
 # -------------- Table editors_NEW ---------------
 
@@ -622,7 +675,7 @@ class _WorkoutTableBase(QtWidgets.QTableView):
             if type(table_row) == ExerciseExecutionRow:
                 exer_name = table_row.icon_and_name[1]
                 if not links.get(exer_name):
-                    link = DB().select_from_table('exercises', 'link', {'id': table_row.exer_id})
+                    link = DB().select_from_table('exercises', 'link', {'id': table_row.exer_id}, cached=True)
                     if link:
                         links[exer_name] = link
         return links
@@ -953,7 +1006,7 @@ class _WorkoutEditorInfoRow(QtWidgets.QFrame, MouseMoveTracker):
             border_radius=4, text_color='white', align_flag=AlignFlag.Center,
             retain_msg_size=False, font_flag=FontFlag.NORMAL_TEXT)
         self.workout_name.setToolTip('Workout name')
-        _id_name_dict = dict(DB().select_from_table('plan_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('plan_type')
         self.workout_type = DBComboBox(
             self, 'cb_plan_type', _id_name_dict, font_flag=FontFlag.NORMAL_TEXT,
             tooltip='Workout type', size=(100, 20))
@@ -989,7 +1042,7 @@ class WorkoutViewerInfoRow(QtWidgets.QWidget, MouseMoveTracker):
             bg_color=Colors.WORKOUT_TITLE.hex
         )
         self.workout_name.setToolTip('Workout name')
-        _id_name_dict = dict(DB().select_from_table('plan_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('plan_type')
         self.workout_type = DBTitleLabel(
             self, 'workout_title', _id_name_dict, bg_color=Colors.PLAN_TYPE.hex,
             text_color='black', font_flag=FontFlag.SMALL_TEXT
@@ -1125,14 +1178,20 @@ class _WorkoutArea(QtWidgets.QFrame):
         else:
             workout_name = get_value(self.workout_info_row.workout_name)
             workout_type = get_value(self.workout_info_row.workout_type)
-            workout_type_icon_bytes = DB().select_from_table('plan_type', 'icon', {'name': workout_type})
+            workout_type_icon_bytes = ReferenceCatalog().get_plan_type_icon(workout_type)
             workout_pdf_data = WorkoutPdfData(
                 workout_name, workout_type, workout_type_icon_bytes, table_rows,
                 self.workout_time.time_min
             )
             return workout_pdf_data
 
-    def set_workout_from_data(self, workout_data):
+    def set_workout_from_data(self, workout_data, table_rows=None):
+        """Sets workout name, type, table rows and time
+
+        :param workout_data <WorkoutData> or None
+        :param table_rows list(<ExerciseExecutionRow> or <SupersetRow>) or None Rows already
+                          built from 'workout_data.rows_data'(built here if not given)
+        """
         if not workout_data:
             # No data is given(workout_data=None), so workout data is reset
             self.workout_info_row.reset_values()
@@ -1141,10 +1200,8 @@ class _WorkoutArea(QtWidgets.QFrame):
             return
         set_value(self.workout_info_row.workout_name, workout_data.name)
         self.workout_info_row.workout_type.set_text_by_id(workout_data.type_id)
-        table_rows = []
-        for row_data in workout_data.rows_data:
-            table_row = DB().get_table_row_obj_from_data(row_data)
-            table_rows.append(table_row)
+        if table_rows is None:
+            table_rows = DB().build_table_rows(workout_data.rows_data)
         self.table.setModel(self.class_table_data_model(table_rows))
         self.workout_time.set_workout_time(workout_data.workout_time)
 
@@ -1217,29 +1274,30 @@ class _WorkoutAreaEditor(_WorkoutArea):
         workout_rows_data = [row.to_data() for row in table_rows]
         workout_time = self.workout_time.time_min
         workout_data = WorkoutData(workout_name, workout_type_id, workout_rows_data, workout_time)
-        # ----- Save new/existing workout
-        existing_workout_id = DB().select_from_table('workout', 'id', {'name': workout_name},
-                                                     get_none=True)
-        if existing_workout_id:
+        # ----- Save new workout(or overwrite existing one) -----
+        user_permission = True
+        # Permission is asked only for workout which will be inserted(name isn't taken)
+        if APP_MODE == AppMode.DEVELOPMENT_MODE and \
+                not DB().select_id_by_name('workout', workout_name):
+            _msg = 'Save this workout as USER workout?\n' \
+                   'NOTE: Click "No" to save plan as SYSTEM workout.'
+            user_permission = QuestionDialog('Plan permission type(Development mode)',
+                                             _msg).exec()
+        try:
+            inserted = DB().insert_into_workout(workout_data, user_permission)
+            if inserted:
+                InfoMessage('Save new workout', f'New workout "{workout_name}" saved in App').exec()
+                logging.info(f'New workout "{workout_name}" inserted in DB.')
+        except DuplicateNameError:
             _msg = f'Workout "{workout_name}" already exist.\n\n' \
                    f'Do you want to overwrite it?'
             overwrite = QuestionDialog('Overwrite workout', _msg).exec()
             if overwrite:
+                existing_workout_id = DB().select_id_by_name('workout', workout_name)
                 updated = DB().update_workout(existing_workout_id, workout_data)
                 if updated:
                     InfoMessage(f'Save workout', f'Workout "{workout_name}" saved.').exec()
                     logging.info(f'Workout "{workout_name}" updated.')
-        else:
-            user_permission = True
-            if APP_MODE == AppMode.DEVELOPMENT_MODE:
-                _msg = 'Save this workout as USER workout?\n' \
-                       'NOTE: Click "No" to save plan as SYSTEM workout.'
-                user_permission = QuestionDialog('Plan permission type(Development mode)',
-                                                 _msg).exec()
-            inserted = DB().insert_into_workout(workout_data, user_permission)
-            if inserted:
-                InfoMessage('Save new workout', f'New workout "{workout_name}" saved in App').exec()
-                logging.info(f'New workout "{workout_name}" inserted in DB.')
         self.signal_workout_saved.emit()
 
     def load_workout(self, workout_row):
@@ -1253,9 +1311,7 @@ class _WorkoutAreaEditor(_WorkoutArea):
         # ----- Set workout data -----
         _rows_data = DB().select_workout_rows_data(workout_row.workout_id)
         rows_data, missing_exercises = filter_existing_exercise_row_data(_rows_data)
-        table_rows = []
-        for row_data in rows_data:
-            table_rows.append(DB().get_table_row_obj_from_data(row_data))
+        table_rows = DB().build_table_rows(rows_data)
         set_value(self.workout_info_row.workout_name, workout_row.name)
         set_value(self.workout_info_row.workout_type, workout_row.workout_type)
         self.table.setModel(EditableTableModel(table_rows))
@@ -1348,15 +1404,33 @@ class _PlanAreaBase(QtWidgets.QFrame):
         :param workouts_data: [<workout_data> or None, ...]
         """
         missing_exercises = []
-        for i, workout_area in enumerate(self.workout_areas):
+        plan_workouts_data = []
+        # Existence of exercises from all workouts is checked with one query
+        plan_exer_ids = set()
+        for workout_data in workouts_data:
+            if workout_data:
+                plan_exer_ids |= get_exercise_ids_from_row_data(workout_data.rows_data)
+        existing_exer_ids = DB().existing_exercise_ids(plan_exer_ids)
+        for i in range(len(self.workout_areas)):
             # --- Check if workout data exist ---
             workout_data = None
             if workouts_data[i]:
-                rows_data, missing_exers = filter_existing_exercise_row_data(workouts_data[i].rows_data)
+                rows_data, missing_exers = filter_existing_exercise_row_data(
+                    workouts_data[i].rows_data, existing_exer_ids)
                 workout_data = WorkoutData(workouts_data[i].name, workouts_data[i].type_id,
                                            tuple(rows_data), workouts_data[i].workout_time)
                 missing_exercises += missing_exers
-            workout_area.set_workout_from_data(workout_data)
+            plan_workouts_data.append(workout_data)
+        # Table rows of all workouts are built at once(icons are selected with one query)
+        plan_rows_data = [row_data for workout_data in plan_workouts_data if workout_data
+                          for row_data in workout_data.rows_data]
+        plan_table_rows = DB().build_table_rows(plan_rows_data)
+        for workout_area, workout_data in zip(self.workout_areas, plan_workouts_data):
+            table_rows = None
+            if workout_data:
+                table_rows = plan_table_rows[:len(workout_data.rows_data)]
+                plan_table_rows = plan_table_rows[len(workout_data.rows_data):]
+            workout_area.set_workout_from_data(workout_data, table_rows)
         if any(workouts_data) and type(self) == PlanAreaEditor:
             self.select_next_exercise()
         if missing_exercises:
@@ -1653,7 +1727,7 @@ class InfoGrid(QtWidgets.QFrame):
             self, 'label_type', self.label_texts.exercise_type, ThemeType.DARK)
         _view_widget_type_value = InfoGridLabel(
             self, 'label_type_value', exercise_data.exer_type, ThemeType.GREEN)
-        _id_name_dict = dict(DB().select_from_table('exercise_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('exercise_type')
         _edit_widget_type_value = DBComboBox(
             self, 'cb_type', _id_name_dict, tooltip='Exercise type')
         self.label_type_value = ExerciseDataViewEditWidget(
@@ -1664,7 +1738,7 @@ class InfoGrid(QtWidgets.QFrame):
             self, 'label_body_part', self.label_texts.body_part, ThemeType.DARK)
         _view_widget_body_value = InfoGridLabel(
             self, 'label_body_value', exercise_data.body_part, ThemeType.GREEN)
-        _id_name_dict = dict(DB().select_from_table('body_part', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('body_part')
         _edit_widget_body_value = DBComboBox(
             self, 'cb_body_part', _id_name_dict, tooltip='Body part')
         self.label_body_part_value = ExerciseDataViewEditWidget(
@@ -1675,7 +1749,7 @@ class InfoGrid(QtWidgets.QFrame):
             self, 'label_main_muscles', self.label_texts.main_mus_groups, ThemeType.DARK)
         _view_widget_main_mus_value = InfoGridLabel(
             self, 'label_main_mus_value', exercise_data.main_muscle_group, ThemeType.GREEN)
-        _id_name_dict = dict(DB().select_from_table('muscle_group', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('muscle_group')
         _edit_widget_main_mus_value = DBComboBox(
             self, 'cb_main_mus', _id_name_dict, tooltip='Main muscle group')
         self.label_main_muscles_value = ExerciseDataViewEditWidget(
@@ -1686,7 +1760,7 @@ class InfoGrid(QtWidgets.QFrame):
             self, 'label_minor_muscles', self.label_texts.minor_mus_groups, ThemeType.DARK)
         _view_widget_minor_mus_value = InfoGridLabel(
             self, 'label_minor_mus_value', exercise_data.minor_muscle_group, ThemeType.GREEN)
-        _id_name_dict = dict(DB().select_from_table('muscle_group', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('muscle_group')
         _edit_widget_minor_mus_value = DBComboBox(
             self, 'cb_minor_mus', _id_name_dict, first_item='-', tooltip='Minor muscle group')
         self.label_minor_muscles_value = ExerciseDataViewEditWidget(
@@ -1697,7 +1771,7 @@ class InfoGrid(QtWidgets.QFrame):
             self, 'label_equipment', self.label_texts.equipment, ThemeType.DARK)
         _view_widget_equipment = InfoGridLabel(
             self, 'label_equipment_value', exercise_data.equipment, ThemeType.GREEN)
-        _id_name_dict = dict(DB().select_from_table('equipment', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('equipment')
         _edit_widget_equipment = DBComboBox(
             self, 'cb_equipment', _id_name_dict, tooltip='Equipment')
         self.label_equipment_value = ExerciseDataViewEditWidget(
@@ -1866,8 +1940,8 @@ class ExerciseBasicInfoViewer(QtWidgets.QFrame):
         self.setLayout(self.vbox_layout)
 
     def set_data(self, exer_id=None):
-        self.exercise_data = DB().select_exercise_data(exer_id) if exer_id else \
-            ExerciseData.get_empty_exercise_data()
+        self.exercise_data = DB().select_exercise_data(exer_id, prefetch=('pos1_image', 'pos2_image')) \
+            if exer_id else ExerciseData.get_empty_exercise_data()
         self.title_row.set_data(self.exercise_data.name, self.exercise_data.favorite,
                                 self.exercise_data.user_permission)
         self.row.set_data(self.exercise_data)
@@ -1972,7 +2046,7 @@ class ExerciseDataViewer(QtWidgets.QFrame):
         """
         image_diagram = self.additional_info_row.muscle_diagram1 if is_main else \
             self.additional_info_row.muscle_diagram2
-        main_muscle_img_bytes = DB().select_from_table('muscle_group', 'image', {'id': table_id})
+        main_muscle_img_bytes = DB().select_muscle_group_image(table_id)
         image_diagram.set_data(main_muscle_img_bytes)
 
     def update_exercise(self):
@@ -1989,17 +2063,24 @@ class ExerciseDataViewer(QtWidgets.QFrame):
             'position_2': get_value(self.basic_info_row.row.pos2_image_text) if _pos2_image_set else None,
             'instructions': get_value(self.additional_info_row.instructions),
         }
-        updated = DB().update_exercise(self.exercise_data.exer_id, exer_db_col_values_dict)
+        try:
+            updated = DB().update_exercise(self.exercise_data.exer_id, exer_db_col_values_dict)
+        except DuplicateNameError:
+            _msg = f'Exercise name "{exer_db_col_values_dict["name"]}" already exist. Change the name.'
+            ErrorMessage('Edit Exercise failed', _msg).exec()
+            return False
         if not updated:
             ErrorMessage('Edit Exercise failed', 'Couldn\'t update exercise').exec()
-            return
+            return False
         self.info_dialog = InfoMessage('Exercise updated', 'Exercise was updated')
         self.info_dialog.exec()
         self.info_dialog = None
+        return True
 
     def set_data(self, exer_id=None):
-        self.exercise_data = DB().select_exercise_data(exer_id) if exer_id else \
-            ExerciseData.get_empty_exercise_data()
+        self.exercise_data = DB().select_exercise_data(
+            exer_id, prefetch=('main_muscle_group_image', 'minor_muscle_group_image')) \
+            if exer_id else ExerciseData.get_empty_exercise_data()
         self.basic_info_row.set_data(exer_id)
         self.additional_info_row.set_data(self.exercise_data)
 
@@ -10,6 +10,7 @@ from gui.widgets import (
     HBoxPane, RoundPushButton, ImageWithText, CropImageDialog, InputTextDialog
 )
 from gui.util import set_value, get_value
+from gui.workers import BackgroundTask
 
 
 class InputImageWithText(QtWidgets.QFrame):
@@ -25,6 +26,7 @@ class InputImageWithText(QtWidgets.QFrame):
         # ----- Data -----
         self.min_width = min_width
         self.min_height = min_height
+        self._format_task = BackgroundTask(self, images.crop_and_resize_image_bytes)
         # ----- GUI children -----
         self.vbox_layout = None
         self.bttn_import_pc = None
@@ -37,6 +39,7 @@ class InputImageWithText(QtWidgets.QFrame):
         self.bttn_import_url.clicked.connect(self._import_image_from_url)
         if create_bttn_delete:
             self.bttn_delete.clicked.connect(self._delete_image)
+        self._format_task.signal_result.connect(self._save_image)
 
     def _init_ui(self, text, image_bytes=None, create_bttn_delete=False):
         self.bttn_import_pc = RoundPushButton(
@@ -60,50 +63,57 @@ class InputImageWithText(QtWidgets.QFrame):
         self.setLayout(self.vbox_layout)
 
     def _check_format_and_save_image(self, image_bytes):
-        # ----- Check image size and type -----
-        _image_size = images.get_image_bytes_size(image_bytes)
-        if self.min_height and _image_size.height() < self.min_height:
+        # ----- Check image type and size -----
+        _image_info = images.verify_image_bytes(image_bytes)
+        if not _image_info:
+            _msg = f'Image type is not supported\n ' \
+                   f'Supported formats: {images.PROJ_SUPPORTED_IMG_EXTENSIONS}'
+            ErrorMessage('Import image failed', _msg).exec()
+            return
+        _image_width, _image_height = _image_info.size
+        if self.min_height and _image_height < self.min_height:
             _msg = f'Image height is too small\n' \
                    f'Minimum height must be: {self.min_height} pixels'
             ErrorMessage('Import image failed', _msg).exec()
             return
-        if self.min_width and _image_size.width() < self.min_width:
+        if self.min_width and _image_width < self.min_width:
             _msg = f'Image height is too small\n' \
                    f'Minimum height must be: {self.min_width} pixels'
             ErrorMessage('Import image failed', _msg).exec()
             return
-        if not images.verify_image_bytes(image_bytes):
-            _msg = f'Image type is not supported\n ' \
-                   f'Supported formats: {images.PROJ_SUPPORTED_IMG_EXTENSIONS}'
-            ErrorMessage('Import image failed', _msg).exec()
-            return
         # ----- Format image -----
-        resized_image_bytes = images.resize_image_bytes_prop(
-            image_bytes, images.ImageDim.HEIGHT, images.MAX_IMAGE_HEIGHT)
-        _resized_image_bytes_width = images.get_image_bytes_size(resized_image_bytes).width()
-        if _resized_image_bytes_width > images.MAX_IMAGE_WIDTH:
+        # Image is cropped(in original resolution) and resized on worker thread
+        crop_rect = None
+        if round(_image_width * images.MAX_IMAGE_HEIGHT / _image_height) > images.MAX_IMAGE_WIDTH:
             _msg = 'Imported image width is too big. Do you want to crop it?'
             crop = QuestionDialog('Crop imported image', _msg).exec()
             if not crop:
                 return
+            # Crop box(in original image) is resized to max image size
             crop_dialog = CropImageDialog(
-                'Crop position image', resized_image_bytes, images.MAX_IMAGE_WIDTH,
-                images.MAX_IMAGE_HEIGHT - 1)
+                'Crop position image', image_bytes,
+                images.MAX_IMAGE_WIDTH * _image_height // images.MAX_IMAGE_HEIGHT, _image_height)
             cropped = crop_dialog.exec()
             if not cropped:
                 return
-            new_image_bytes = crop_dialog.get_cropped_image_bytes()
-        else:
-            new_image_bytes = resized_image_bytes
-        # ----- Save image -----
-        set_value(self.image_with_text, new_image_bytes)
-        self.signal_image_set.emit()
+            crop_rect = crop_dialog.get_crop_rect()
+        # Editor is disabled until image is formatted
+        self.setEnabled(False)
+        self._format_task.start(image_bytes, crop_rect, images.MAX_IMAGE_HEIGHT)
 
     # ----- SLOTS -----
 
     def _delete_image(self):
         self.image_with_text.set_data()
 
+    def _save_image(self, new_image_bytes):
+        self.setEnabled(True)
+        if not new_image_bytes:
+            ErrorMessage('Import image failed', 'Image couldn\'t be formatted').exec()
+            return
+        set_value(self.image_with_text, new_image_bytes)
+        self.signal_image_set.emit()
+
     def _import_image_from_pc(self):
         image_fp = get_filepath_from_dialog(self, file_types='Image Files (*.jpg *.jpeg *.png)')
         if image_fp:
@@ -111,6 +121,7 @@ class InputImageWithText(QtWidgets.QFrame):
             if not image_bytes:
                 _msg = f'Can\'t import image motfile "{image_fp}"'
                 ErrorMessage('Import image failed', _msg).exec()
+                return
             self._check_format_and_save_image(image_bytes)
 
     def _import_image_from_url(self):
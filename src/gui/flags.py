@@ -14,6 +14,7 @@ def _get_path(dir_, *args):
 class ExitCode:
     RESTART = 1
     SHUTDOWN = 2
+    MIGRATION_FAILED = 3
 
 
 class MouseButton(Enum):
@@ -8,7 +8,7 @@ from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
-from config import APP_NAME, SRC_DIR, BOOKMARKS_FILE, APP_MODE, VERSION
+from config import APP_NAME, SRC_DIR, APP_MODE, VERSION
 from settings import Settings, ICON_SIZES, EXER_PER_PAGE, DEFAULT_PROPERTIES
 from session import Session
 from export.pdf import create_plan_pdf
@@ -1042,8 +1042,6 @@ class MainWindow(QtWidgets.QMainWindow):
 
         :return <None>
         """
-        # ----- Save session bookmarked exercises ----
-        self.tab_widget.tab_exercises.exercise_data_editor.bookmarks_bar.write_to_file()
         # ----- Save planner changes -----
         plan_editor = self.tab_widget.tab_planner.right.plan_editor
         if plan_editor.unsaved_changes:
@@ -1,5 +1,4 @@
 import pickle
-from pathlib import Path
 from enum import Enum
 from functools import partial
 
@@ -20,10 +19,12 @@ from gui.font import Font, FontFlag
 from gui.colors import Colors
 from gui.flags import ImageFp, AlignFlag, SizePolicy, Orientation, PermissionType
 from gui.util import get_value, set_value, find_widget_by_attr
+from gui.workers import BackgroundTask
 from database.db_obj import DB
 from database.data_model import ExerciseData, NewExerciseData
+from database.exceptions import DuplicateNameError
 from util import images
-from config import APP_MODE, AppMode, DAYS, BOOKMARKS_FILE
+from config import APP_MODE, AppMode, DAYS
 from settings import ICON_SIZES
 from workout import exercise_name_valid, EXERCISE_NAME_CHECK_ERROR_MSG, \
     get_available_generic_exer_name
@@ -31,6 +32,19 @@ from workout import exercise_name_valid, EXERCISE_NAME_CHECK_ERROR_MSG, \
 db = DB()
 
 
+def _create_icons_dict_bytes(pos_image_bytes, crop_rect):
+    """Crops icon image from position image and returns pickled icons dict
+
+    Called on worker thread(see 'BackgroundTask').
+
+    :param pos_image_bytes <bytes> Position image bytes
+    :param crop_rect <QtCore.QRect> Crop rect returned from 'CropImageDialog.get_crop_rect'
+    :return <bytes>
+    """
+    base_icon_bytes = images.crop_and_resize_image_bytes(pos_image_bytes, crop_rect, crop_rect.height())
+    return pickle.dumps(images.get_icons_dict(base_icon_bytes))
+
+
 class NewExerciseDialog(BaseDialog):
     def __init__(self):
         super().__init__('Create new Exercise', ImageFp.EXERCISE)
@@ -41,6 +55,9 @@ class NewExerciseDialog(BaseDialog):
         # ----- Data -----
         self.new_exer_id = None
         self.new_exer_name = None
+        # New exercise data is inserted when icons are created(on worker thread)
+        self._new_exer_data = None
+        self._icons_task = BackgroundTask(self, _create_icons_dict_bytes)
         # ----- GUI children -----
         self.vbox_layout = None
         self.rb_box_exer_permission = None
@@ -62,6 +79,7 @@ class NewExerciseDialog(BaseDialog):
         self.info_grid.label_minor_muscles_value.edit_widget.currentTextChanged.connect(
             partial(self._muscle_group_changed, False))
         self.image_pos1.signal_image_set.connect(self._pos1_image_set)
+        self._icons_task.signal_result.connect(self._icons_dict_created)
 
     def _init_ui(self):
         # ----- Title row -----
@@ -100,13 +118,11 @@ class NewExerciseDialog(BaseDialog):
         self.browser_editor = TextBrowserEditor(self, 'browser', 'Instructions', '')
         self.browser_editor.activate_edit_mode()
         _main_muscle_group_id = self.info_grid.label_main_muscles_value.edit_widget.get_item_db_id()
-        _main_muscle_image_bytes = db.select_from_table('muscle_group', 'image',
-                                                        {'id': _main_muscle_group_id})
+        _main_muscle_image_bytes = db.select_muscle_group_image(_main_muscle_group_id)
         self.diagram_main_muscle = ImageWithText(
             self, 'image_muscle1', 'Main muscle group', _main_muscle_image_bytes)
         _minor_muscle_group_id = self.info_grid.label_minor_muscles_value.edit_widget.get_item_db_id()
-        _minor_muscle_image_bytes = db.select_from_table('muscle_group', 'image',
-                                                         {'id': _minor_muscle_group_id}, get_none=True)
+        _minor_muscle_image_bytes = db.select_muscle_group_image(_minor_muscle_group_id)
         self.diagram_minor_muscle = ImageWithText(
             self, 'image_muscle2', 'Minor muscle group', _minor_muscle_image_bytes)
         additional_info_row = HBoxPane(
@@ -137,11 +153,6 @@ class NewExerciseDialog(BaseDialog):
             ErrorMessage('Create new exercise failed', _msg).exec()
             return False
         exer_name = get_value(self.edit_name)
-        all_exer_names = db.select_from_table('exercises', 'name')
-        if exer_name in all_exer_names:
-            _msg = f'Exercise name "{exer_name}" already exist. Change the name.'
-            ErrorMessage('Create new exercise failed', _msg).exec()
-            return False
         if not self.browser_editor.browser_edit.text_valid:
             _msg = 'Instructions text is not valid'
             ErrorMessage('Create new exercise failed', _msg).exec()
@@ -159,37 +170,53 @@ class NewExerciseDialog(BaseDialog):
         instructions = get_value(self.browser_editor)
         favorite = False  # A default value
         user_permission = self.rb_box_exer_permission.checked_value
-        # ----- Create base(bigger) icon -----
+        # ----- Choose base(bigger) icon -----
         crop_dialog = CropImageDialog(
-            'Crop icon image', get_value(self.image_pos1), images.MAX_IMAGE_HEIGHT - 1,
+            'Crop icon image', pos1_image, images.MAX_IMAGE_HEIGHT - 1,
             images.MAX_IMAGE_HEIGHT - 1, reject_bttn=False)
         crop_icon = crop_dialog.exec()
         if not crop_icon:
             return False  # Cropping icon cancelled
-        # ----- Create icons dict bytes(for DB) -----
-        base_icon_bytes = crop_dialog.get_cropped_image_bytes()
-        icons_dict = images.get_icons_dict(base_icon_bytes)
-        icons_dict_bytes = pickle.dumps(icons_dict)
-        # ----- Create new Exercise data object and insert into DB -----
-        new_exer_data = NewExerciseData(
+        # ----- Create icons dict bytes(for DB) on worker thread -----
+        self._new_exer_data = NewExerciseData(
             exer_name, exer_type_id, body_part_id, main_muscle_id, minor_muscle_id,
-            equipment_id, pos1_image, pos2_image, icons_dict_bytes, instructions,
+            equipment_id, pos1_image, pos2_image, None, instructions,
             favorite, link, user_permission
         )
-        inserted = db.insert_exercise(new_exer_data)
-        if not inserted:
+        # Dialog is disabled until icons are created
+        self.setEnabled(False)
+        self._icons_task.start(pos1_image, crop_dialog.get_crop_rect())
+        return True
+
+    def _insert_new_exer(self, icons_dict_bytes):
+        # ----- Insert new Exercise data into DB -----
+        new_exer_data = self._new_exer_data._replace(icons_dict_bytes=icons_dict_bytes)
+        exer_name = new_exer_data.name
+        try:
+            new_exer_id = db.insert_exercise(new_exer_data)
+        except DuplicateNameError:
+            _msg = f'Exercise name "{exer_name}" already exist. Change the name.'
+            ErrorMessage('Create new exercise failed', _msg).exec()
+            return False
+        if not new_exer_id:
             ErrorMessage('Create new exercise failed', 'New exercise couldnt be created').exec()
             return False
         # ----- Set new exer id and name(for bookmarks) -----
-        _new_exer_id = DB().select_from_table('exercises', 'id', {'name': exer_name})
-        self.new_exer_id = _new_exer_id
+        self.new_exer_id = new_exer_id
         self.new_exer_name = exer_name
         return True
 
     # ----- SLOTS -----
 
     def _create_new_exer_clicked(self):
-        new_exer_created = self._create_new_exer()
+        self._create_new_exer()
+
+    def _icons_dict_created(self, icons_dict_bytes):
+        self.setEnabled(True)
+        if not icons_dict_bytes:
+            ErrorMessage('Create new exercise failed', 'Exercise icon couldn\'t be created').exec()
+            return
+        new_exer_created = self._insert_new_exer(icons_dict_bytes)
         if new_exer_created:
             _msg = f'New exercise "{self.new_exer_name}" was created.\n\n ' \
                    f'NOTE: It was added in Bookmarks'
@@ -205,7 +232,7 @@ class NewExerciseDialog(BaseDialog):
             _muscle_image_bytes = None
         else:
             _muscle_group_id = cb.get_item_db_id()
-            _muscle_image_bytes = db.select_from_table('muscle_group', 'image', {'id': _muscle_group_id})
+            _muscle_image_bytes = db.select_muscle_group_image(_muscle_group_id)
         diagram = self.diagram_main_muscle if is_main else self.diagram_minor_muscle
         set_value(diagram, _muscle_image_bytes)
 
@@ -244,20 +271,26 @@ class BookmarkExercisesBar(QtWidgets.QFrame):
         self.hbox_layout.addWidget(self.bttn_active_exercise)
         self.hbox_layout.addWidget(self.vertical_line)
         self.hbox_layout.addWidget(self.label_bookmarks)
-        for _exer_id in self._get_bookmarked_exercises():
-            exer_name = db.select_from_table('exercises', 'name',
-                                             {'id': str(_exer_id)}, get_none=True)
-            if exer_name:
-                self.add_bookmark_bttn(_exer_id, exer_name)
+        # Bookmarks of deleted exercises are deleted with exercises(in DB)
+        for _exer_id, exer_name in db.select_bookmarks():
+            self.add_bookmark_bttn(_exer_id, exer_name, save=False)
         self.hbox_layout.setAlignment(AlignFlag.Left)
         self.setLayout(self.hbox_layout)
 
-    def add_bookmark_bttn(self, exer_id, exer_name):
+    def add_bookmark_bttn(self, exer_id, exer_name, save=True):
+        """Adds bookmark button(if exercise isn't bookmarked yet)
+
+        :param exer_id <int>
+        :param exer_name <str>
+        :param save <bool> If True, bookmark is saved in DB
+        """
         # Check if that bttn already exists; if not, just check it and return
         bookmark_bttn = find_widget_by_attr(self.bttns_exercises, 'exer_id', exer_id, get_none=True)
         if bookmark_bttn:
             self._set_bttns_checked(bookmark_bttn)
             return
+        if save:
+            db.insert_bookmark(exer_id)
         # Create new bookmark button
         bookmark_bttn = BookmarkButton(
             self, f'bttn_{str(exer_id)}', exer_id, exer_name)
@@ -271,6 +304,7 @@ class BookmarkExercisesBar(QtWidgets.QFrame):
         bttn = find_widget_by_attr(self.bttns_exercises, 'exer_id', exer_id)
         self.bttns_exercises.remove(bttn)
         bttn.deleteLater()
+        db.delete_bookmark(exer_id)
 
     def get_clicked_bttn(self):
         for bttn in self.bttns_exercises + [self.bttn_active_exercise]:
@@ -285,33 +319,6 @@ class BookmarkExercisesBar(QtWidgets.QFrame):
                 bttn.setEnabled(True)
         bttn_clicked.setEnabled(False)
 
-    @staticmethod
-    def _get_bookmarked_exercises():
-        if not Path(BOOKMARKS_FILE).exists():
-            # just create text file for bookmarks
-            with open(BOOKMARKS_FILE, 'w') as fwrite:
-                pass
-            return []
-        file_exer_ids = []
-        with open(BOOKMARKS_FILE, 'r') as file_open:
-            for line in file_open:
-                file_exer_ids.append(int(line.strip()))
-        exer_ids = []
-        for file_exer_id in file_exer_ids:
-            # Check if bookmarked exercise exist in DB
-            # It is possible that the exercise was deleted
-            db_exer_name = DB().select_from_table(
-                'exercises', 'name', filters={'id': file_exer_id}, get_none=True)
-            if db_exer_name:
-                exer_ids.append(file_exer_id)
-        return exer_ids
-
-    def write_to_file(self):
-        exer_ids = [bt.exer_id for bt in self.bttns_exercises]
-        with open(BOOKMARKS_FILE, 'w') as file_open:
-            for exer_id in exer_ids:
-                file_open.write(str(exer_id) + '\n')
-
     # ----- SLOTS -----
 
     def _bttn_clicked(self):
@@ -425,6 +432,9 @@ class ExerciseDataEditor(QtWidgets.QWidget):
         # ----- Data -----
         self.exer_id = None
         self.new_exer_dialog = None
+        # Id of exercise which icons are created(on worker thread)
+        self._icon_exer_id = None
+        self._icons_task = BackgroundTask(self, _create_icons_dict_bytes)
         # ----- GUI children -----
         self.vbox_layout = None
         self.bookmarks_bar = None
@@ -442,6 +452,7 @@ class ExerciseDataEditor(QtWidgets.QWidget):
         self.toolbar.bttn_save_changes.clicked.connect(self._bttn_save_clicked)
         self.toolbar.bttn_cancel_edit.clicked.connect(self._bttn_cancel_clicked)
         self.toolbar.bttn_del_exercise.clicked.connect(self._bttn_delete_clicked)
+        self._icons_task.signal_result.connect(self._icons_dict_created)
 
     def _init_ui(self):
         self.bookmarks_bar = BookmarkExercisesBar(self)
@@ -508,13 +519,20 @@ class ExerciseDataEditor(QtWidgets.QWidget):
         image_cropped = crop_dialog.exec()
         if not image_cropped:
             return False  # Cropping icon cancelled
-        cropped_pos_image = crop_dialog.get_cropped_image_bytes()
-        icons_dict = images.get_icons_dict(cropped_pos_image)
-        icons_dict_bytes = pickle.dumps(icons_dict)
+        # Editor is disabled until icons are created
+        self._icon_exer_id = self.exer_id
+        self.setEnabled(False)
+        self._icons_task.start(pos_image, crop_dialog.get_crop_rect())
+
+    def _icons_dict_created(self, icons_dict_bytes):
+        self.setEnabled(True)
+        if not icons_dict_bytes:
+            ErrorMessage('Exercise update failed', 'Exercise icon couldn\'t be created').exec()
+            return
         updated = DB().update_table(
-            'exercises', {'icons_dict': icons_dict_bytes}, self.exer_id)
+            'exercises', {'icons_dict': icons_dict_bytes}, self._icon_exer_id)
         if updated:
-            self.signal_refresh_exer_name_icon.emit(self.exer_id)
+            self.signal_refresh_exer_name_icon.emit(self._icon_exer_id)
             InfoMessage('Exercise update', 'Exercise icon updated.').exec()
 
     def _bttn_edit_clicked(self):
@@ -535,7 +553,8 @@ class ExerciseDataEditor(QtWidgets.QWidget):
                          'Instruction text is not valid').exec()
             return
         # ----- Update exercise data and activate view mode -----
-        self.exercise_data_viewer.update_exercise()
+        if not self.exercise_data_viewer.update_exercise():
+            return
         # --- If exercise name has changed, send signal to lists ---
         title = self.exercise_data_viewer.basic_info_row.title_row.title
         if get_value(title.view_widget) != get_value(title.edit_widget):
@@ -553,6 +572,9 @@ class ExerciseDataEditor(QtWidgets.QWidget):
         exer_name = get_value(self.exercise_data_viewer.basic_info_row.title_row.
                               title.view_widget)
         _msg = f'Are you sure you want to delete exercise "{exer_name}"?'
+        workout_names, plan_names = DB().select_exercise_usage(self.exer_id)
+        if workout_names or plan_names:
+            _msg += f'\n\nExercise is used in {len(workout_names)} workout(s) and {len(plan_names)} plan(s).'
         delete_exer = QuestionDialog('Delete exercise', _msg).exec()
         if delete_exer:
             deleted = DB().delete_exercise(self.exer_id)
@@ -16,6 +16,8 @@ from gui.widgets import (
 from gui.colors import Colors
 from gui.flags import ImageFp, LayoutOrientation, AlignFlag, SizePolicy
 from database.db_obj import DB
+from database.catalog import ReferenceCatalog
+from database.exceptions import DuplicateNameError
 from database.data_model import PlanData, ExerciseData, PlanPdfData
 from config import DAYS, AppMode, APP_MODE, PLAN_FILE_EXTENSION
 from settings import Settings
@@ -94,7 +96,7 @@ class _PlanEditorTopRow(QtWidgets.QFrame):
             align_flag=AlignFlag.Center)
         self.label_plan_type = MyLabel(self, 'label_cb_plan_type', 'Plan type ', FontFlag.SMALL_TEXT_BOLD,
                                        size_policy=(SizePolicy.MAXIMUM, SizePolicy.MAXIMUM))
-        _id_name_dict = dict(DB().select_from_table('plan_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('plan_type')
         self.cb_plan_type = DBComboBox(
             self, 'cb', _id_name_dict, first_item='-', font_flag=FontFlag.NORMAL_TEXT)
         plan_type_widget = HBoxPane(self, (self.label_plan_type, self.cb_plan_type),
@@ -190,7 +192,11 @@ class PlanEditor(QtWidgets.QWidget):
 
     def save_plan(self):
         plan_data = self._get_plan_data()
-        updated = db.update_week_plan(plan_data)
+        try:
+            updated = db.update_week_plan(plan_data)
+        except DuplicateNameError:
+            self._show_plan_name_exists_error('Save plan failed', plan_data.name)
+            return
         if not updated:
             _msg = f'Error occured. Plan "{plan_data.name}" wasnt saved.'
             ErrorMessage('Save plan error', _msg).exec()
@@ -203,19 +209,25 @@ class PlanEditor(QtWidgets.QWidget):
     def save_plan_as(self):
         plan_data = self._get_plan_data()
         user_permission = True
-        if APP_MODE == AppMode.DEVELOPMENT_MODE:
+        # Permission is asked only for plan which will be inserted(name isn't taken)
+        if APP_MODE == AppMode.DEVELOPMENT_MODE and \
+                not db.select_id_by_name('week_plan', plan_data.name):
             _msg = 'Save this plan as User plan?\n' \
                    'NOTE: Click "No" to save plan as System plan.'
             user_permission = QuestionDialog('Plan permission type(Development mode)',
                                              _msg).exec()
-        inserted = db.insert_into_week_plan(plan_data, user_permission)
-        if not inserted:
+        try:
+            new_plan_id = db.insert_into_week_plan(plan_data, user_permission)
+        except DuplicateNameError:
+            self._show_plan_name_exists_error('Save new plan failed', plan_data.name)
+            return
+        if not new_plan_id:
             ErrorMessage('Save new plan error', f'Error occured. Plan "{plan_data.name}" wasnt saved.').exec()
             return
         self.info_dialog = InfoMessage('New plan saved', f'New plan "{plan_data.name}" saved in App')
         self.info_dialog.exec()
         self.unsaved_changes = False
-        self.loaded_plan_id = db.select_from_table('week_plan', 'id', {'name': plan_data.name})
+        self.loaded_plan_id = new_plan_id
         self.top_row.toolbar.bttn_save.setEnabled(False)
         self.signal_plans_changed.emit()
         self.info_dialog = None
@@ -283,17 +295,17 @@ class PlanEditor(QtWidgets.QWidget):
             if self.loaded_plan_id:
                 _msg = f'Loaded plan "{plan_name}" was edited. Do you want to save it?'
                 save_changes_dialog = QuestionDialog('Unsaved changes in plan', _msg).exec()
-                if save_changes_dialog and self._plan_data_set('Save plan', check_plan_in_db=False):
+                if save_changes_dialog and self._plan_data_set('Save plan'):
                     self.save_plan()
                 save_changes_dialog = None
             else:
                 _msg = f'New plan "{plan_name}" is not saved. Do you want to save it?'
                 save_changes_dialog = QuestionDialog(f'New plan "{plan_name}" not saved', _msg).exec()
-                if save_changes_dialog and self._plan_data_set('Save new plan', check_plan_in_db=True):
+                if save_changes_dialog and self._plan_data_set('Save new plan'):
                     self.save_plan_as()
                 save_changes_dialog = None
 
-    def _plan_data_set(self, action_name, check_plan_in_db=False):
+    def _plan_data_set(self, action_name):
         """Checks if all data is set: plan name, plan type and any exercise"""
         error_dialog_title = f'{action_name} failed'
         if self.top_row.cb_plan_type.currentText() == '-':
@@ -304,16 +316,14 @@ class PlanEditor(QtWidgets.QWidget):
             return False
         if not self.plan_area.workout_data_set(action_name):
             return False
-        if check_plan_in_db:
-            plan_name = self.top_row.title.line_edit.text()
-            saved_plan_id = db.select_from_table('week_plan', 'id', {'name': plan_name}, get_none=True)
-            if saved_plan_id:
-                _msg = f'Plan with name "{plan_name}" already exists!\n ' \
-                       f'Rename plan name if you want to save it as a new project.'
-                ErrorMessage(error_dialog_title, _msg).exec()
-                return False
         return True
 
+    @staticmethod
+    def _show_plan_name_exists_error(dialog_title, plan_name):
+        _msg = f'Plan with name "{plan_name}" already exists!\n ' \
+               f'Rename plan name if you want to save it as a new project.'
+        ErrorMessage(dialog_title, _msg).exec()
+
     def _get_plan_data(self):
         plan_type_id = self.top_row.cb_plan_type.get_item_db_id()
         plan_name = self.top_row.title.line_edit.text()
@@ -345,12 +355,12 @@ class PlanEditor(QtWidgets.QWidget):
         self.top_row.toolbar.bttn_save.setEnabled(False)
 
     def _bttn_save_clicked(self):
-        if not self._plan_data_set('Save plan', check_plan_in_db=False):
+        if not self._plan_data_set('Save plan'):
             return
         self.save_plan()
 
     def _bttn_save_as_clicked(self):
-        if not self._plan_data_set('Save new plan', check_plan_in_db=True):
+        if not self._plan_data_set('Save new plan'):
             return
         self.save_plan_as()
 
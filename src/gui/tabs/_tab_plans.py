@@ -5,6 +5,7 @@ from PyQt5 import QtCore
 
 from config import APP_MODE, AppMode
 from database.db_obj import DB
+from database.catalog import ReferenceCatalog
 from database.data_model import PlanListRow, PlanData, PlanPdfData
 from gui.editors import PlanAreaViewer
 from gui.widgets import (
@@ -72,7 +73,7 @@ class _PlanViewerTopRow(QtWidgets.QFrame):
             self, 'plan_name', '-', font_flag=FontFlag.TITLE_BOLD,
             bg_color=Colors.PLAN_TITLE.hex,
             size_policy=(SizePolicy.MAXIMUM, SizePolicy.MAXIMUM))
-        _id_name_dict = dict(DB().select_from_table('plan_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('plan_type')
         self.label_plan_type = DBTitleLabel(
             self, 'plan_type', _id_name_dict, font_flag=FontFlag.NORMAL_TEXT_BOLD,
             bg_color=Colors.PLAN_TYPE.hex, text_color='black',
@@ -5,6 +5,7 @@ from PyQt5 import QtCore
 from PyQt5 import QtGui
 
 from database.db_obj import DB
+from database.catalog import ReferenceCatalog
 from database.data_model import \
     WorkoutListModel, TableModel, ExerciseData, WorkoutListRow, WorkoutData, WorkoutPdfData
 from gui.widgets import (
@@ -111,7 +112,7 @@ class _WorkoutViewerTopRow(QtWidgets.QFrame):
             self, 'title_name', '-', bg_color=Colors.WORKOUT_TITLE.hex,
             font_flag=FontFlag.BIG_TEXT_BOLD)
         self.toolbar = _WorkoutViewerToolbar(self)
-        _id_name_dict = dict(DB().select_from_table('plan_type', ('id', 'name')))
+        _id_name_dict = ReferenceCatalog().get_id_name_dict('plan_type')
         self.workout_type = DBTitleLabel(
             self, 'title_type', _id_name_dict, font_flag=FontFlag.NORMAL_TEXT_BOLD,
             bg_color=Colors.PLAN_TYPE.hex, text_color='black',
@@ -190,7 +191,7 @@ class WorkoutViewer(QtWidgets.QFrame):
             set_value(self.top_row.workout_type, workout_row.workout_type)
             _rows_data = DB().select_workout_rows_data(workout_row.workout_id)
             rows_data, missing_exercises = filter_existing_exercise_row_data(_rows_data)
-            table_rows = [DB().get_table_row_obj_from_data(row_data) for row_data in rows_data]
+            table_rows = DB().build_table_rows(rows_data)
             self.table.setModel(TableModel(table_rows))
             workout_time = DB().select_from_table('workout', 'workout_time',
                                                   filters={'id': workout_row.workout_id})
@@ -215,8 +216,7 @@ class WorkoutViewer(QtWidgets.QFrame):
         # ----- Get workout PDF data -----
         workout_name = get_value(self.top_row.workout_name)
         workout_type = get_value(self.top_row.workout_type)
-        workout_type_icon_bytes = DB().select_from_table(
-            'plan_type', 'icon', {'name': workout_type})
+        workout_type_icon_bytes = ReferenceCatalog().get_plan_type_icon(workout_type)
         workout_pdf_data = WorkoutPdfData(
             workout_name,
             workout_type,
@@ -331,7 +331,7 @@ class TabWorkouts(QtWidgets.QFrame):
                 self.signal_load_workout_to_planner.emit(table_name, workout_row)
 
     def _set_exercise_info(self, table_name, exer_id):
-        exercise_data = DB().select_exercise_data(exer_id)
+        exercise_data = DB().select_exercise_data(exer_id, prefetch=('pos1_image', 'pos2_image'))
         self.info_row.set_data(exercise_data)
 
     def _set_workout_data(self, perm_type, workout_row):
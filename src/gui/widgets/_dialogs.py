@@ -5,7 +5,7 @@ from PyQt5 import QtCore
 from util import images
 from web.mail import send_email, EMailType
 from gui.flags import ImageFp, SizePolicy, LayoutOrientation, ButtonType, AlignFlag
-from gui.dialogs import BaseDialog, BaseInfoDialog, InfoMessage
+from gui.dialogs import BaseDialog, BaseInfoDialog, InfoMessage, ErrorMessage
 from gui.util import find_button_by_text
 from ._buttons import RadiobuttonBox, DialogButtonBox, RoundPushButton
 from ._images import Image
@@ -13,13 +13,23 @@ from ._labels import MyLabel
 from ._panes import HBoxPane
 
 
+# ----- Constants -----
+
+# Maximum size of image preview in 'CropImageDialog'(larger images are downscaled)
+CROP_PREVIEW_MAX_SIZE = (900, 600)
+
+
 # ----- Dialogs -----
 # NOTE: these dialog classes are located in this module, and not in 'src.gui.dialogs',
 # because of their use of custom widgets.
 
 
 class CropImageDialog(BaseDialog):
-    """Dialog for cropping image
+    """Dialog for choosing crop rect of image
+
+    Crop rect is drawn on downscaled proxy of image, which is decoded only once,
+    so also large images(e.g. imported photos) can be cropped. Crop rect is in
+    coordinates of original image(see 'get_crop_rect').
 
     NOTE: this Dialog crops only LEFT, CENTER, RIGHT.
     """
@@ -29,9 +39,16 @@ class CropImageDialog(BaseDialog):
         super().__init__(title_text, icon_fp=ImageFp.EDIT)
         # ----- Data -----
         self._crop_rect = None
-        self._orig_image_bytes = image_bytes
         self._crop_box_width = crop_box_width
         self._crop_box_height = crop_box_height
+        image_info = images.probe_image(image_bytes)
+        proxy = images.get_image_proxy(image_bytes, CROP_PREVIEW_MAX_SIZE) if image_info else None
+        # Image which can't be read isn't shown(see 'exec')
+        self._image_valid = proxy is not None
+        self._orig_image_width = image_info.size[0] if image_info else 0
+        proxy_bytes, self._proxy_scale = proxy if proxy else (b'', 1.0)
+        self._proxy_pixmap = QtGui.QPixmap()
+        self._proxy_pixmap.loadFromData(proxy_bytes)
         # ----- GUI children -----
         self.label_cb = None
         self.rb_box_orien = None
@@ -39,7 +56,7 @@ class CropImageDialog(BaseDialog):
         self.button_box = None
         self.vbox_layout = None
         # ----- Init UI -----
-        self._init_ui(image_bytes, reject_bttn=reject_bttn)
+        self._init_ui(proxy_bytes, reject_bttn=reject_bttn)
         # ----- Connect events to slots -----
         self.rb_box_orien.signal_rb_clicked.connect(self._set_cropped_image)
         self.button_box.signal_accepted.connect(self.accept)
@@ -48,6 +65,12 @@ class CropImageDialog(BaseDialog):
         # ----- Post init actions -----
         self._set_cropped_image()
 
+    def exec(self):
+        if not self._image_valid:
+            ErrorMessage('Crop image failed', 'Image can\'t be read').exec()
+            return False
+        return super().exec()
+
     def _init_ui(self, image_bytes, reject_bttn=True):
         self.label_cb = MyLabel(self, 'label', 'Select crop orientation: ',
                                 size_policy=(SizePolicy.MAXIMUM, SizePolicy.MAXIMUM))
@@ -70,27 +93,33 @@ class CropImageDialog(BaseDialog):
         self.vbox_layout.addWidget(self.button_box)
         self.setLayout(self.vbox_layout)
 
-    def get_cropped_image_bytes(self):
-        cropped_image_bytes = images.crop_from_image_bytes(self._orig_image_bytes, self._crop_rect)
-        return cropped_image_bytes
+    def get_crop_rect(self):
+        """Returns chosen crop rect(in coordinates of original image)
+
+        :return <QtCore.QRect>
+        """
+        return QtCore.QRect(self._crop_rect)
 
     def _set_cropped_image(self):
-        # Load default image
-        pixmap = QtGui.QPixmap()
-        pixmap.loadFromData(self._orig_image_bytes)
-        # Set crop rect
+        # Set crop rect(in original image coordinates)
         crop_orien = self.rb_box_orien.checked_value
         if crop_orien == images.CropOrientation.LEFT:
             x = 0
         elif crop_orien == images.CropOrientation.CENTER:
-            x = pixmap.width() // 2 - self._crop_box_width // 2
+            x = self._orig_image_width // 2 - self._crop_box_width // 2
         else:
-            x = pixmap.width() - self._crop_box_width
+            x = self._orig_image_width - self._crop_box_width
         self._crop_rect = QtCore.QRect(x, 0, self._crop_box_width, self._crop_box_height)
-        # Set painter and draw rect
+        if not self._image_valid:
+            return
+        # Set painter and draw rect(scaled and kept inside proxy) on copy of proxy
+        pixmap = self._proxy_pixmap.copy()
+        proxy_crop_rect = QtCore.QRect(
+            *(round(value * self._proxy_scale) for value in self._crop_rect.getRect()))
+        proxy_crop_rect = proxy_crop_rect.intersected(pixmap.rect().adjusted(0, 0, -1, -1))
         painter = QtGui.QPainter(pixmap)
         painter.setPen(QtGui.QPen(QtCore.Qt.green, 1, QtCore.Qt.SolidLine))
-        painter.drawRect(self._crop_rect)
+        painter.drawRect(proxy_crop_rect)
         painter.end()
         self.image.setPixmap(pixmap)
 
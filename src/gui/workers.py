@@ -0,0 +1,133 @@
+import logging
+
+from PyQt5 import QtCore
+
+
+# ----- Constants -----
+
+# Time(in ms) without new request before query is run
+DEBOUNCE_INTERVAL_MS = 250
+
+
+class _QueryRunnable(QtCore.QRunnable):
+    """Runs query function on worker thread and sends result to <DebouncedQuery>"""
+
+    def __init__(self, debounced_query, generation, args):
+        super().__init__()
+        self.debounced_query = debounced_query
+        self.generation = generation
+        self.args = args
+
+    def run(self):
+        if self.generation != self.debounced_query.generation:
+            # Newer query was requested before this one started
+            return
+        try:
+            result = self.debounced_query.query_func(*self.args)
+        except Exception as ex:
+            logging.error(f'(Worker) Query "{self.debounced_query.query_func.__name__}" failed', exc_info=ex)
+            result = False
+        # Signal is queued to the thread of <DebouncedQuery>(GUI thread)
+        self.debounced_query.signal_query_finished.emit(self.generation, self.args, result)
+
+
+class DebouncedQuery(QtCore.QObject):
+    """Runs query function on worker thread after requests stop coming for a while
+
+    Every request restarts debounce timer. Only the newest request is
+    executed and only its result is emitted with 'signal_result', so
+    results of stale requests never reach the GUI.
+    Query function must not create Qt GUI objects(it runs on worker thread).
+    """
+
+    signal_result = QtCore.pyqtSignal(tuple, object)  # args, result
+    signal_query_finished = QtCore.pyqtSignal(int, tuple, object)  # generation, args, result
+
+    def __init__(self, parent, query_func, interval_ms=DEBOUNCE_INTERVAL_MS):
+        """
+        :param parent <QtCore.QObject>
+        :param query_func <function> Called on worker thread with request args
+        :param interval_ms <int> Debounce interval
+        """
+        super().__init__(parent)
+        self.query_func = query_func
+        # Incremented on every requested(or cancelled) query
+        self.generation = 0
+        self._args = ()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._thread_pool = QtCore.QThreadPool(self)
+        # Queries are executed one by one, stale queued queries are cleared
+        self._thread_pool.setMaxThreadCount(1)
+        # Connect events to slots
+        self._timer.timeout.connect(self._start_query)
+        self.signal_query_finished.connect(self._query_finished)
+
+    def request(self, *args):
+        """Schedules query with args
+
+        Replaces previous scheduled query and drops result of running query.
+        """
+        self.generation += 1
+        self._args = args
+        self._timer.start()
+
+    def cancel(self):
+        """Cancels scheduled query and drops result of running query"""
+        self._timer.stop()
+        self._thread_pool.clear()
+        self.generation += 1
+
+    def _start_query(self):
+        self._thread_pool.clear()
+        self._thread_pool.start(_QueryRunnable(self, self.generation, self._args))
+
+    def _query_finished(self, generation, args, result):
+        if generation != self.generation:
+            return
+        self.signal_result.emit(args, result)
+
+
+class _TaskRunnable(QtCore.QRunnable):
+    """Runs task function on worker thread and sends result to <BackgroundTask>"""
+
+    def __init__(self, background_task, args):
+        super().__init__()
+        self.background_task = background_task
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.background_task.task_func(*self.args)
+        except Exception as ex:
+            logging.error(f'(Worker) Task "{self.background_task.task_func.__name__}" failed', exc_info=ex)
+            result = False
+        # Signal is queued to the thread of <BackgroundTask>(GUI thread)
+        self.background_task.signal_result.emit(result)
+
+
+class BackgroundTask(QtCore.QObject):
+    """Runs task function on worker thread and emits its result with 'signal_result'
+
+    Result is False if task function raised an exception.
+    Task function must not create Qt GUI objects(it runs on worker thread).
+    """
+
+    signal_result = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent, task_func):
+        """
+        :param parent <QtCore.QObject>
+        :param task_func <function> Called on worker thread with start args
+        """
+        super().__init__(parent)
+        self.task_func = task_func
+        self._thread_pool = QtCore.QThreadPool(self)
+
+    def start(self, *args):
+        self._thread_pool.start(_TaskRunnable(self, args))
+
+    def wait(self):
+        """Blocks until started tasks are finished"""
+        self._thread_pool.waitForDone()
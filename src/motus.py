@@ -1,4 +1,5 @@
 import logging
+import sqlite3
 import sys
 
 from PyQt5 import QtWidgets
@@ -9,7 +10,9 @@ from session import Session
 from config import APP_MODE, AppMode
 from settings import Settings
 from log import run_logging_setup
+from database.db_obj import DB
 from gui.main_window import MainWindow
+from gui.dialogs import ErrorMessage
 from gui.flags import ExitCode, ImageFp
 from gui.util import get_center_pos
 from util.hooks import my_exception_hook
@@ -28,7 +31,12 @@ class App(QtWidgets.QApplication):
 
     def run(self):
         # ----- Preload GUI actions -----
-        Session.start_session()
+        if not Session.start_session():
+            _msg = f'Database couldn\'t be updated to the version used by this App\n' \
+                   f'(SQLite version: {sqlite3.sqlite_version}).\n\nSee log file for details.'
+            ErrorMessage('Start App failed', _msg).exec()
+            DB().close()
+            return ExitCode.MIGRATION_FAILED
         pixmap = QtGui.QPixmap(ImageFp.MOTUS_LOGO)
         splash = QtWidgets.QSplashScreen(pixmap)
         splash_pos = get_center_pos(splash)
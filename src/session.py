@@ -7,6 +7,8 @@ from enum import Enum
 from pathlib import Path
 
 from config import SESSION_JSON_FILE
+from database.db_obj import DB
+from database.data_model import icon_cache
 from util.obj import SingletonDecorator
 from settings import Settings
 
@@ -20,6 +22,10 @@ class Session:
 
     @staticmethod
     def start_session():
+        """Starts session and migrates database schema
+
+        :return <bool> False if database schema couldn't be migrated(App must not run)
+        """
         if not Path(SESSION_JSON_FILE).exists():
             # ----- Executed on initial run -----
             # Creates initial session dict and saves it
@@ -36,13 +42,23 @@ class Session:
         else:
             # ----- Executed on every(other) run -----
             Session.update_time(TimeType.START_APP)
+        if not DB().migrate_schema():
+            logging.error('(Database) Schema migration failed, App can\'t run on old schema')
+            return False
         logging.info('######### Session START ...\n')
+        return True
 
     @staticmethod
     def end_session():
         if not Path(SESSION_JSON_FILE).exists():
             return
         Session.update_time(TimeType.END_APP)
+        logging.info(f'(Query cache) Session stats: {DB().query_cache.get_stats()}')
+        # Images left by failed writes(see 'DB.delete_unreferenced_images')
+        DB().delete_unreferenced_images()
+        DB().close()
+        logging.info(f'(Icon cache) Session stats: {icon_cache.get_stats()}')
+        icon_cache.clear()
         SingletonDecorator.clean_instances()
         logging.info('... Session END #########\n\n')
 
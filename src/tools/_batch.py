@@ -0,0 +1,114 @@
+"""Helpers for maintenance tools which process rows of a table in pages
+
+Pages are processed by worker processes and written back by the main
+process. Key of the last written row is saved in state file, so an
+interrupted run can be resumed.
+"""
+import os
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+
+# ----- State -----
+
+def get_state_file(db_path, tool_name):
+    """Returns path of state file of tool(next to database file)
+
+    :param db_path <str>
+    :param tool_name <str>
+    :return <str>
+    """
+    return f'{db_path}.{tool_name}.json'
+
+
+def read_state(state_file, options):
+    """Returns key of the last written row of interrupted run with the same options
+
+    :param state_file <str>
+    :param options <dict> Options of the run(JSON serializable)
+    :return <int> 0 if there is no interrupted run
+    """
+    if not Path(state_file).exists():
+        return 0
+    with open(state_file, 'r') as file_open:
+        state = json.load(file_open)
+    if state.get('options') != options:
+        logging.warning(f'(Batch) State file "{state_file}" has different options; starting from the beginning')
+        return 0
+    return state['last_key']
+
+
+def write_state(state_file, options, last_key):
+    state_tmp_file = state_file + '.tmp'
+    with open(state_tmp_file, 'w') as file_open:
+        json.dump({'options': options, 'last_key': last_key}, file_open)
+    # Replace is atomic, so state file is never half written
+    os.replace(state_tmp_file, state_file)
+
+
+def delete_state(state_file):
+    Path(state_file).unlink(missing_ok=True)
+
+
+# ----- Runner -----
+
+class ProgressPrinter:
+    """Prints number of processed rows(and rate) to stderr"""
+
+    def __init__(self, numb_total, unit, enabled=True):
+        self.numb_total = numb_total
+        self.unit = unit
+        self.enabled = enabled
+        self.numb_done = 0
+        self.start_time = time.perf_counter()
+
+    def update(self, numb_done):
+        self.numb_done += numb_done
+        if self.enabled:
+            rate = self.numb_done / max(self.get_elapsed_time(), 1e-6)
+            print(f'\rProcessed {self.numb_done}/{self.numb_total} {self.unit} ({rate:.1f}/s)',
+                  end='', file=sys.stderr)
+
+    def finish(self):
+        if self.enabled:
+            print(file=sys.stderr)
+
+    def get_elapsed_time(self):
+        return time.perf_counter() - self.start_time
+
+
+def process_in_pages(select_page, worker, write_page, last_key=0, workers=None, page_written=None):
+    """Processes rows page by page in worker processes
+
+    Tasks of the next page are processed while results of the current page are written.
+
+    :param select_page <callable> Called with key of the last selected row, returns
+                       <list(<tuple(<int>, <object>)>)> Keys(ascending) and tasks of next page
+    :param worker <callable> Top level function(picklable) called with task in worker process
+    :param write_page <callable> Called with <list> of results of one page(in order of tasks)
+    :param last_key <int> Rows with key > 'last_key' are processed
+    :param workers <int> or None Number of worker processes(if None, number of CPUs)
+    :param page_written <callable> or None Called with key of the last row of written page
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending_page = None  # (key of the last row, results iterator)
+        while True:
+            keys_tasks = select_page(last_key)
+            if keys_tasks:
+                last_key = keys_tasks[-1][0]
+                # Tasks are submitted immediately, results are collected when page is written
+                page = (last_key, executor.map(worker, [task for _, task in keys_tasks]))
+            else:
+                page = None
+            if pending_page:
+                page_last_key, results = pending_page
+                write_page(list(results))
+                if page_written:
+                    page_written(page_last_key)
+            if not page:
+                break
+            pending_page = page
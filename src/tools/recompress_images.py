@@ -0,0 +1,182 @@
+"""Maintenance tool which re-encodes stored images with encoding policy
+
+Used when 'images.IMAGE_ENCODING' is changed. Images of table 'image'(position
+images, muscle group and body part diagrams) are read in pages(ordered by rowid),
+re-encoded in worker processes and written back in one transaction per page.
+Re-encoded image replaces the stored one only if it's smaller by at least
+'MIN_SAVING'. At the end database is vacuumed, and its size and average image
+decode time before and after are reported.
+
+Run from 'src' dir:
+    python -m tools.recompress_images [--format WEBP] [--quality 80] [--workers 4]
+"""
+import io
+import sys
+import time
+import logging
+import argparse
+
+from PIL import Image
+
+import config
+from util import images
+from tools import _batch
+
+
+# ----- Constants -----
+
+TOOL_NAME = 'recompress_images'
+PAGE_SIZE = 64  # Number of images read, re-encoded and written at once
+MIN_SAVING = 0.05  # Minimal relative size reduction for image to be replaced
+
+
+# ----- Worker -----
+
+def _get_decode_time(image_bytes):
+    """Returns time(in seconds) of decoding image
+
+    :param image_bytes <bytes>
+    :return <float>
+    """
+    start_time = time.perf_counter()
+    Image.open(io.BytesIO(image_bytes)).load()
+    return time.perf_counter() - start_time
+
+
+def _recompress_image(task):
+    """Re-encodes one image(executed in worker process)
+
+    :param task <tuple(<str>, <bytes>, <ImageEncoding>, <float>)> Image hash, image bytes,
+                encoding and minimal saving
+    :return <tuple(<str>, <bytes> or None, <int>, <int>, <float>, <float>, <str> or None)>
+            Image hash, new bytes(None if image isn't replaced), old and new size,
+            old and new decode time and error message(if image couldn't be re-encoded)
+    """
+    image_hash, image_bytes, encoding, min_saving = task
+    old_decode_time = _get_decode_time(image_bytes)
+    try:
+        new_bytes = images.encode_image(images.open_image(image_bytes), encoding)
+    except Exception as ex:
+        return image_hash, None, len(image_bytes), len(image_bytes), old_decode_time, old_decode_time, \
+            f'{type(ex).__name__}: {ex}'
+    if len(new_bytes) > len(image_bytes) * (1 - min_saving):
+        return image_hash, None, len(image_bytes), len(image_bytes), old_decode_time, old_decode_time, None
+    return image_hash, new_bytes, len(image_bytes), len(new_bytes), old_decode_time, \
+        _get_decode_time(new_bytes), None
+
+
+# ----- Runner -----
+
+def _get_db_size(db):
+    """Returns size of database in bytes(WAL file isn't included)
+
+    :return <int>
+    """
+    return db.execute_statement('SELECT page_count * page_size FROM pragma_page_count(), pragma_page_size()')[0][0]
+
+
+def recompress_images(db_path=None, encoding=images.IMAGE_ENCODING, min_saving=MIN_SAVING, workers=None,
+                      page_size=PAGE_SIZE, restart=False, show_progress=True):
+    """Re-encodes all stored images
+
+    :param db_path <str> or None If None, 'config.DB_PATH' is used
+    :param encoding <ImageEncoding>
+    :param min_saving <float> Minimal relative size reduction for image to be replaced
+    :param workers <int> or None Number of worker processes(if None, number of CPUs)
+    :param page_size <int> Number of images written in one transaction
+    :param restart <bool> If True, state of interrupted run is ignored
+    :param show_progress <bool>
+    :return <dict> Report: 'numb_replaced', 'failed_hashes', 'db_size_before', 'db_size_after',
+            'images_size_before', 'images_size_after', 'decode_ms_before', 'decode_ms_after'
+            (decode times are averages of processed images)
+    :raises RuntimeError If database schema can't be migrated or images can't be written
+    """
+    from database.db_obj import DB
+    db_path = db_path or config.DB_PATH
+    # Own instance(not singleton), so tool always works with database of given path
+    db = DB.cls(db_path)
+    try:
+        if not db.migrate_schema():
+            raise RuntimeError(f'Migrating schema of database "{db_path}" failed')
+        state_file = _batch.get_state_file(db_path, TOOL_NAME)
+        options = {'encoding': encoding._asdict(), 'min_saving': min_saving}
+        last_rowid = 0 if restart else _batch.read_state(state_file, options)
+        numb_total = db.execute_statement('SELECT COUNT(*) FROM image WHERE rowid > ?', params=(last_rowid, ))[0][0]
+        progress = _batch.ProgressPrinter(numb_total, 'images', enabled=show_progress)
+        report = {'numb_replaced': 0, 'failed_hashes': [], 'db_size_before': _get_db_size(db),
+                  'images_size_before': 0, 'images_size_after': 0, 'decode_ms_before': 0.0, 'decode_ms_after': 0.0}
+
+        def select_page(after_rowid):
+            # Replaced images keep their rowid, so no image is processed twice
+            stat = 'SELECT rowid, hash, bytes FROM image WHERE rowid > ? ORDER BY rowid LIMIT ?'
+            result_set = db.execute_statement(stat, params=(after_rowid, page_size)) or []
+            return [(rowid, (image_hash, image_bytes, encoding, min_saving))
+                    for rowid, image_hash, image_bytes in result_set]
+
+        def write_page(results):
+            new_images = {}
+            for image_hash, new_bytes, old_size, new_size, old_decode_time, new_decode_time, error in results:
+                if error:
+                    logging.error(f'(Recompress images) Image hash={image_hash} not re-encoded: {error}')
+                    report['failed_hashes'].append(image_hash)
+                elif new_bytes:
+                    new_images[image_hash] = new_bytes
+                report['images_size_before'] += old_size
+                report['images_size_after'] += new_size
+                report['decode_ms_before'] += old_decode_time * 1000
+                report['decode_ms_after'] += new_decode_time * 1000
+            if not db.replace_images(new_images):
+                raise RuntimeError('Writing re-encoded images to database failed')
+            report['numb_replaced'] += len(new_images)
+            progress.update(len(results))
+
+        _batch.process_in_pages(select_page, _recompress_image, write_page, last_rowid, workers,
+                                page_written=lambda rowid: _batch.write_state(state_file, options, rowid))
+        progress.finish()
+        _batch.delete_state(state_file)
+        # Space of replaced images is returned to file system
+        db.execute_statement('VACUUM')
+        report['db_size_after'] = _get_db_size(db)
+        numb_processed = max(progress.numb_done, 1)
+        report['decode_ms_before'] /= numb_processed
+        report['decode_ms_after'] /= numb_processed
+        logging.info(f'(Recompress images) Replaced {report["numb_replaced"]} of {progress.numb_done} images '
+                     f'in {progress.get_elapsed_time():.1f} s, failed: {report["failed_hashes"]}')
+        return report
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-encodes all stored images')
+    parser.add_argument('--db', default=config.DB_PATH, help='Database file')
+    parser.add_argument('--format', default=images.IMAGE_ENCODING.image_format,
+                        help='Image format, e.g. JPEG or WEBP')
+    parser.add_argument('--quality', type=int, default=images.IMAGE_ENCODING.quality,
+                        help='Quality of lossy image format')
+    parser.add_argument('--progressive', action='store_true', help='Progressive JPEG(slower decoding)')
+    parser.add_argument('--keep-metadata', action='store_true', help='Keep EXIF and ICC profile')
+    parser.add_argument('--min-saving', type=float, default=MIN_SAVING,
+                        help='Minimal relative size reduction for image to be replaced')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes(default: number of CPUs)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Images written in one transaction')
+    parser.add_argument('--restart', action='store_true', help='Ignore state of interrupted run')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    encoding = images.IMAGE_ENCODING._replace(image_format=args.format.upper(), quality=args.quality,
+                                              progressive=args.progressive,
+                                              strip_metadata=not args.keep_metadata)
+    try:
+        report = recompress_images(args.db, encoding, args.min_saving, args.workers, args.page_size, args.restart)
+    except RuntimeError as ex:
+        logging.error(f'(Recompress images) {ex}')
+        return 1
+    print(f'Database size: {report["db_size_before"] / 1024:.0f} KB -> {report["db_size_after"] / 1024:.0f} KB')
+    print(f'Images size: {report["images_size_before"] / 1024:.0f} KB -> '
+          f'{report["images_size_after"] / 1024:.0f} KB')
+    print(f'Average decode time: {report["decode_ms_before"]:.2f} ms -> {report["decode_ms_after"]:.2f} ms')
+    return 1 if report['failed_hashes'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""Maintenance tool which regenerates exercise icons of all exercises
+
+Used when 'settings.ICON_SIZES' or icon format/quality is changed. Exercises
+are read from DB in pages(ordered by id), icons are generated in worker
+processes and written back in one transaction per page. Id of the last
+written exercise is saved in state file, so interrupted run is resumed.
+
+Run from 'src' dir:
+    python -m tools.regenerate_icons [--source position] [--quality 85] [--workers 4]
+"""
+import io
+import sys
+import pickle
+import logging
+import argparse
+from enum import Enum
+
+from PIL import Image
+
+import config
+from util import images
+from tools import _batch
+
+
+# ----- Constants -----
+
+TOOL_NAME = 'regenerate_icons'
+PAGE_SIZE = 64  # Number of exercises read, regenerated and written at once
+
+
+class IconSource(Enum):
+    # Largest stored icon(keeps icon crop chosen by user; for smaller sizes or other quality)
+    ICON = 'icon'
+    # Center square of position 1 image(for larger icon sizes)
+    POSITION = 'position'
+
+
+# ----- Worker -----
+
+def _crop_center_square(image_bytes):
+    """Returns center square of image(as PNG bytes, so it's not compressed twice)
+
+    :param image_bytes <bytes>
+    :return <bytes>
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) // 2, (height - side) // 2
+    buf = io.BytesIO()
+    image.crop((left, top, left + side, top + side)).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _regenerate_exercise_icons(task):
+    """Generates icons dict of one exercise(executed in worker process)
+
+    :param task <tuple(<int>, <bytes>, <IconSource>, <str>, <int>)> Exercise id, source
+                image bytes, icon source, icon format and quality
+    :return <tuple(<int>, <bytes> or None, <str> or None)> Exercise id, serialized icons
+            dict and error message(if icons couldn't be generated)
+    """
+    exer_id, source_bytes, source, image_format, quality = task
+    if not source_bytes:
+        return exer_id, None, 'Source image not found'
+    try:
+        if source == IconSource.POSITION:
+            source_bytes = _crop_center_square(source_bytes)
+        icons_dict = images.get_icons_dict(source_bytes, image_format=image_format, quality=quality)
+    except Exception as ex:
+        return exer_id, None, f'{type(ex).__name__}: {ex}'
+    return exer_id, pickle.dumps(icons_dict), None
+
+
+# ----- Runner -----
+
+def _select_sources_page(db, source, after_exer_id, page_size):
+    """Selects source images of next page of exercises
+
+    :return <list(<tuple(<int>, <bytes> or None)>)> Exercise ids and source image bytes
+    """
+    if source == IconSource.POSITION:
+        stat = 'SELECT exercises.id, image.bytes FROM exercises ' \
+               'LEFT JOIN image ON image.hash = exercises.position_1_hash ' \
+               'WHERE exercises.id > ? ORDER BY exercises.id LIMIT ?'
+        return db.execute_statement(stat, params=(after_exer_id, page_size)) or []
+    stat = 'SELECT id, icons_dict FROM exercises WHERE id > ? ORDER BY id LIMIT ?'
+    result_set = db.execute_statement(stat, params=(after_exer_id, page_size)) or []
+    sources = []
+    for exer_id, icons_dict_bytes in result_set:
+        icons_dict = pickle.loads(icons_dict_bytes)
+        sources.append((exer_id, icons_dict[max(icons_dict)] if icons_dict else None))
+    return sources
+
+
+def _write_page(db, results):
+    """Writes regenerated icons of one page in one transaction
+
+    :param results <list(<tuple>)> Results of '_regenerate_exercise_icons'
+    :return <tuple(<int>, <list(<int>)>)> Number of written exercises and ids of failed exercises
+    """
+    exers_column_values, failed_ids = {}, []
+    for exer_id, icons_dict_bytes, error in results:
+        if error:
+            logging.error(f'(Regenerate icons) Icons of exercise id={exer_id} not regenerated: {error}')
+            failed_ids.append(exer_id)
+        else:
+            exers_column_values[exer_id] = {'icons_dict': icons_dict_bytes}
+    if exers_column_values and not all(db.update_exercises(exers_column_values)):
+        raise RuntimeError('Writing regenerated icons to database failed')
+    return len(exers_column_values), failed_ids
+
+
+def regenerate_icons(db_path=None, source=IconSource.ICON, image_format=images.ICON_FORMAT,
+                     quality=images.ICON_QUALITY, workers=None, page_size=PAGE_SIZE,
+                     restart=False, show_progress=True):
+    """Regenerates icons of all exercises
+
+    :param db_path <str> or None If None, 'config.DB_PATH' is used
+    :param source <IconSource>
+    :param image_format <str> Format of icons(PIL format name)
+    :param quality <int> Quality of icons in lossy format
+    :param workers <int> or None Number of worker processes(if None, number of CPUs)
+    :param page_size <int> Number of exercises written in one transaction
+    :param restart <bool> If True, state of interrupted run is ignored
+    :param show_progress <bool>
+    :return <tuple(<int>, <list(<int>)>)> Number of regenerated exercises and ids of failed exercises
+    :raises RuntimeError If database schema can't be migrated or icons can't be written
+    """
+    from database.db_obj import DB
+    db_path = db_path or config.DB_PATH
+    # Own instance(not singleton), so tool always works with database of given path
+    db = DB.cls(db_path)
+    try:
+        if not db.migrate_schema():
+            raise RuntimeError(f'Migrating schema of database "{db_path}" failed')
+        state_file = _batch.get_state_file(db_path, TOOL_NAME)
+        options = {'source': source.value, 'image_format': image_format, 'quality': quality,
+                   'icon_sizes': [list(icon_size) for icon_size in images.ICON_SIZES]}
+        last_exer_id = 0 if restart else _batch.read_state(state_file, options)
+        numb_total = db.execute_statement('SELECT COUNT(*) FROM exercises WHERE id > ?', params=(last_exer_id, ))[0][0]
+        progress = _batch.ProgressPrinter(numb_total, 'exercises', enabled=show_progress)
+        numb_done, failed_ids = 0, []
+
+        def select_page(after_exer_id):
+            return [(exer_id, (exer_id, source_bytes, source, image_format, quality))
+                    for exer_id, source_bytes in _select_sources_page(db, source, after_exer_id, page_size)]
+
+        def write_page(results):
+            nonlocal numb_done
+            numb_written, page_failed_ids = _write_page(db, results)
+            numb_done += numb_written
+            failed_ids.extend(page_failed_ids)
+            progress.update(len(results))
+
+        _batch.process_in_pages(select_page, _regenerate_exercise_icons, write_page, last_exer_id, workers,
+                                page_written=lambda exer_id: _batch.write_state(state_file, options, exer_id))
+        progress.finish()
+        _batch.delete_state(state_file)
+        logging.info(f'(Regenerate icons) Regenerated icons of {numb_done} exercises '
+                     f'in {progress.get_elapsed_time():.1f} s, failed: {failed_ids}')
+        return numb_done, failed_ids
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Regenerates icons of all exercises')
+    parser.add_argument('--db', default=config.DB_PATH, help='Database file')
+    parser.add_argument('--source', choices=[icon_source.value for icon_source in IconSource],
+                        default=IconSource.ICON.value,
+                        help='"icon" - largest stored icon, "position" - center square of position 1 image')
+    parser.add_argument('--format', default=images.ICON_FORMAT, help='Icon format, e.g. JPEG, PNG or WEBP')
+    parser.add_argument('--quality', type=int, default=images.ICON_QUALITY, help='Quality of lossy icon format')
+    parser.add_argument('--workers', type=int, default=None, help='Number of processes(default: number of CPUs)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Exercises written in one transaction')
+    parser.add_argument('--restart', action='store_true', help='Ignore state of interrupted run')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    try:
+        _, failed_ids = regenerate_icons(args.db, IconSource(args.source), args.format, args.quality,
+                                         args.workers, args.page_size, args.restart)
+    except RuntimeError as ex:
+        logging.error(f'(Regenerate icons) {ex}')
+        return 1
+    return 1 if failed_ids else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Dict-like cache with least recently used eviction
+
+    Cache can be bounded by number of items('maxsize') and/or by sum of
+    item costs('maxbytes'). When a bound is exceeded, the least recently
+    used items are evicted. Hits and misses are counted.
+    """
+
+    def __init__(self, maxsize=None, maxbytes=None):
+        """
+        :param maxsize <int> or None Max number of cached items
+        :param maxbytes <int> or None Max sum of item costs(in bytes)
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.numb_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # Key=%key%, Value=(%value%, %cost%)
+
+    def get(self, key, default=None):
+        """Returns cached value(and marks it as recently used)
+
+        :param key <hashable>
+        :param default <object> Returned if key is not cached
+        :return <object>
+        """
+        if key not in self._items:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._items.move_to_end(key)
+        return self._items[key][0]
+
+    def put(self, key, value, cost=0):
+        """Caches value and evicts the least recently used items if cache is full
+
+        Value which costs more than 'maxbytes' is not cached(it would evict
+        all other items).
+
+        :param key <hashable>
+        :param value <object>
+        :param cost <int> Size of value in bytes(used with 'maxbytes')
+        """
+        self.invalidate(key)
+        if self.maxbytes is not None and cost > self.maxbytes:
+            return
+        self._items[key] = (value, cost)
+        self.numb_bytes += cost
+        while self._is_full():
+            _, (_, evicted_cost) = self._items.popitem(last=False)
+            self.numb_bytes -= evicted_cost
+
+    def invalidate(self, key):
+        """Removes value from cache(if it's cached)
+
+        :param key <hashable>
+        """
+        if key in self._items:
+            _, cost = self._items.pop(key)
+            self.numb_bytes -= cost
+
+    def clear(self):
+        self._items.clear()
+        self.numb_bytes = 0
+
+    def get_stats(self):
+        """Returns cache statistics
+
+        :return <dict>
+        """
+        return {
+            'items': len(self._items),
+            'bytes': self.numb_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _is_full(self):
+        if self.maxsize is not None and len(self._items) > self.maxsize:
+            return True
+        return self.maxbytes is not None and self.numb_bytes > self.maxbytes
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
@@ -1,9 +1,10 @@
 import io
+import math
+import hashlib
 import logging
 from enum import Enum
-from PIL import Image, ImageFile, UnidentifiedImageError
-
-from PyQt5 import QtCore
+from collections import namedtuple
+from PIL import Image, ImageOps, UnidentifiedImageError
 
 from settings import ICON_SIZES
 from gui.flags import ImageFp
@@ -14,6 +15,30 @@ PROJ_SUPPORTED_IMG_EXTENSIONS = ('jpg', 'jpeg', 'png')
 MIN_IMAGE_HEIGHT = 250  # For importing
 MAX_IMAGE_WIDTH = 450
 MAX_IMAGE_HEIGHT = 250
+# Icons
+ICON_FORMAT = 'JPEG'
+ICON_QUALITY = 75  # Used by lossy formats(JPEG, WEBP)
+# Image is first reduced(fast, by integer factor) to at least this many times the icon size
+ICON_REDUCING_GAP = 2.0
+
+# Encoding policy of stored images(position images and muscle group diagrams)
+# 'image_format' - PIL format name(e.g. 'JPEG' or 'WEBP')
+# 'quality' - quality of lossy formats
+# 'optimize' - optimal JPEG Huffman tables(smaller file, same decode time)
+# 'progressive' - progressive JPEG(slightly smaller file, but ~2x slower decoding)
+# 'strip_metadata' - EXIF and ICC profile are not stored
+ImageEncoding = namedtuple('ImageEncoding', ('image_format', 'quality', 'optimize', 'progressive', 'strip_metadata'))
+IMAGE_ENCODING = ImageEncoding(image_format='JPEG', quality=75, optimize=True, progressive=False, strip_metadata=True)
+# Transparent images are put on this background when encoded in format without alpha channel
+IMAGE_BACKGROUND_COLOR = (255, 255, 255)
+# Header info of image returned by 'probe_image'
+# 'format' - PIL format name(e.g. 'JPEG' or 'PNG')
+# 'size' - (width, height) of image as displayed(EXIF orientation is applied)
+# 'mode' - PIL mode(e.g. 'RGB', 'RGBA' or 'L')
+ImageInfo = namedtuple('ImageInfo', ('format', 'size', 'mode'))
+# Values of EXIF orientation tag of images rotated by 90 or 270 degrees
+EXIF_ORIENTATIONS_TRANSPOSED = (5, 6, 7, 8)
+EXIF_ORIENTATION_TAG = 0x0112
 
 
 class CropOrientation(Enum):
@@ -33,35 +58,196 @@ class ImageDim(Enum):
 
 
 def _to_image_bytes(image):
-    """Converts Image to bytes and returns it
+    """Converts Image to bytes(encoded with 'IMAGE_ENCODING') and returns it
+
+    :param image <PIL.Image>
+    :return <bytes> Image bytes
+    """
+    return encode_image(image, IMAGE_ENCODING)
+
+
+def encode_image(image, encoding=IMAGE_ENCODING):
+    """Encodes image with encoding policy
 
     :param image <PIL.Image>
+    :param encoding <ImageEncoding>
     :return <bytes> Image bytes
     """
+    if encoding.image_format == 'JPEG':
+        image = _remove_alpha(image)
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+    save_kwargs = {'format': encoding.image_format, 'quality': encoding.quality}
+    if encoding.image_format == 'JPEG':
+        save_kwargs.update(optimize=encoding.optimize, progressive=encoding.progressive)
+    elif encoding.image_format == 'WEBP':
+        save_kwargs['method'] = 6  # Slowest encoding, smallest file
+    if not encoding.strip_metadata:
+        for key in ('exif', 'icc_profile'):
+            if image.info.get(key):
+                save_kwargs[key] = image.info[key]
     buf = io.BytesIO()
-    format_ = image.format if image.format else 'JPEG'
-    image.save(buf, format=format_)
+    image.save(buf, **save_kwargs)
     return buf.getvalue()
 
 
-def get_image_bytes_size(image_bytes):
+def _remove_alpha(image):
+    """Returns image in mode RGB(transparent pixels are put on 'IMAGE_BACKGROUND_COLOR')
+
+    :param image <PIL.Image>
+    :return <PIL.Image>
+    """
+    if image.mode == 'RGB':
+        return image
+    if _has_alpha(image):
+        rgba_image = image.convert('RGBA')
+        background = Image.new('RGB', rgba_image.size, IMAGE_BACKGROUND_COLOR)
+        background.paste(rgba_image, mask=rgba_image.getchannel('A'))
+        background.info = image.info
+        return background
+    return image.convert('RGB')
+
+
+def _has_alpha(image):
+    return 'A' in image.getbands() or 'transparency' in image.info
+
+
+def open_image(image_bytes):
+    """Opens image and rotates it as set in its EXIF orientation tag
+
+    Orientation has to be applied before metadata is stripped(see 'IMAGE_ENCODING').
+
+    :param image_bytes <bytes>
+    :return <PIL.Image>
+    """
     image = Image.open(io.BytesIO(image_bytes))
-    return QtCore.QSize(*image.size)
+    return ImageOps.exif_transpose(image)
+
+
+class _BufferReader(io.RawIOBase):
+    """Read-only file object over a buffer(bytes, bytearray or memoryview)
+
+    Unlike 'io.BytesIO', buffer isn't copied; only read parts of it are.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes() if end > self._pos else b''
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def probe_image(image_source):
+    """Reads only header of image and returns its format, size and mode
+
+    Image isn't decoded, so probing is fast also for large images.
+
+    :param image_source <bytes>, <bytearray>, <memoryview> or <str> Image bytes or image filepath
+    :return <ImageInfo> or None If image can't be read or its format isn't recognized
+    """
+    try:
+        if isinstance(image_source, str):
+            with open(image_source, 'rb') as file:
+                return _probe_image_file(file)
+        return _probe_image_file(_BufferReader(image_source))
+    except (OSError, UnidentifiedImageError, SyntaxError, ValueError):
+        # SyntaxError and ValueError are raised by some PIL plugins on corrupted headers
+        logging.error('Image header can\'t be read', exc_info=True)
+        return None
+
+
+def _probe_image_file(file):
+    """Returns header info of image in opened file
+
+    :param file <file object>
+    :return <ImageInfo>
+    """
+    with Image.open(file) as image:
+        size = image.size
+        if _get_exif_orientation(image) in EXIF_ORIENTATIONS_TRANSPOSED:
+            size = size[::-1]
+        return ImageInfo(image.format, size, image.mode)
+
+
+def _get_exif_orientation(image):
+    """Returns EXIF orientation of opened image, read only from its header
+
+    'Image.getexif' isn't used, because it decodes PNG without eXIf chunk.
+
+    :param image <PIL.Image> Opened(not loaded) image
+    :return <int> or None
+    """
+    # EXIF found in header(e.g. APP1 segment of JPEG, eXIf chunk of PNG before image data)
+    exif_bytes = image.info.get('exif')
+    if not exif_bytes:
+        return None
+    exif = Image.Exif()
+    exif.load(exif_bytes)
+    return exif.get(EXIF_ORIENTATION_TAG)
+
+
+def get_image_hash(image_bytes):
+    """Returns content hash of image(key of image in DB table 'image')
+
+    :param image_bytes <bytes> Image bytes
+    :return <str> Hex digest
+    """
+    return hashlib.sha256(image_bytes).hexdigest()
 
 
-def get_icons_dict(image_bytes):
-    """Returns 3 image icons(as dict) in 3 sizes defined in module 'config'
+def get_icons_dict(image_bytes, image_format=ICON_FORMAT, quality=ICON_QUALITY):
+    """Returns image icons(as dict) in all sizes defined in 'settings.ICON_SIZES'
 
     Returned dict format is e.g. {50: %image bytes%, 60: %image bytes%, ...}
 
+    Image is decoded only once(JPEG in reduced scale, see 'Image.draft') and
+    resized to the largest icon size. Smaller icons are resized from the
+    largest icon, not from the original image.
+
     :param image_bytes <bytes> Image bytes
+    :param image_format <str> Format of icons(PIL format name)
+    :param quality <int> Quality of icons in lossy format
     :return <dict>
     """
-    icons_dict = {}
-    for icon_size in ICON_SIZES:
-        width, height = icon_size[0], icon_size[1]
-        icons_dict[width] = resize_image_bytes(image_bytes, (width, height))
-    return icons_dict
+    icon_sizes = sorted(ICON_SIZES, reverse=True)
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == 'JPEG':
+        # Decodes JPEG in scale 1/2, 1/4 or 1/8, if it's still larger than the largest icon
+        image.draft('RGB', icon_sizes[0])
+    icon = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+    icon = icon.resize(icon_sizes[0], Image.LANCZOS, reducing_gap=ICON_REDUCING_GAP)
+    icons = {icon_sizes[0][0]: icon}
+    for icon_size in icon_sizes[1:]:
+        icons[icon_size[0]] = icon.resize(icon_size, Image.LANCZOS)
+    encoding = IMAGE_ENCODING._replace(image_format=image_format, quality=quality)
+    return {width: encode_image(icons[width], encoding) for width, _ in ICON_SIZES}
 
 
 def get_file_binary(filepath):
@@ -79,22 +265,21 @@ def get_file_binary(filepath):
     return blob_data
 
 
-def verify_image_bytes(image_bytes):
-    """Verifies if image format is supported and returns bool
+def verify_image_bytes(image_source):
+    """Verifies if image format is supported and returns its header info
 
-    :param image_bytes <bytes> Image bytes
-    :return <bool>
+    :param image_source <bytes>, <memoryview> or <str> Image bytes or image filepath(see 'probe_image')
+    :return <ImageInfo> or False
     """
-    try:
-        image = Image.open(io.BytesIO(image_bytes))
-    except PIL.UnidentifiedImageError:
-        logging.error('File is not a supported image for this App.', exc_info=True)
+    image_info = probe_image(image_source)
+    if not image_info:
+        logging.error('File is not a supported image for this App.')
         return False
-    if image.format.lower() not in PROJ_SUPPORTED_IMG_EXTENSIONS:
+    if image_info.format.lower() not in PROJ_SUPPORTED_IMG_EXTENSIONS:
         logging.error(f'Image format is not supported for this App.\n'
                       f'Supported image formats: {PROJ_SUPPORTED_IMG_EXTENSIONS}.')
         return False
-    return True
+    return image_info
 
 
 def import_image_from_pc(image_fp):
@@ -108,10 +293,10 @@ def import_image_from_pc(image_fp):
         logging.error(f'Image "{image_fp}" format is not supported in App\n'
                       f'Supported image extensions: {PROJ_SUPPORTED_IMG_EXTENSIONS}')
         return False
-    image_bytes = get_file_binary(image_fp)
-    if verify_image_bytes(image_bytes):
-        return image_bytes
-    return False
+    # Header is checked before the whole file is read
+    if not verify_image_bytes(image_fp):
+        return False
+    return get_file_binary(image_fp)
 
 
 def _crop_from_image(image, rect):
@@ -121,12 +306,20 @@ def _crop_from_image(image, rect):
     :param rect <QtCore.QRect> or tuple(x1, y1, x2, y2)
     :return <PIL.Image>
     """
-    crop_box = rect if type(rect) == tuple else \
-        (rect.x(), rect.y(), rect.x() + rect.width(), rect.y() + rect.height())
-    cropped_image = image.crop(crop_box)
+    cropped_image = image.crop(_get_crop_box(rect))
     return cropped_image
 
 
+def _get_crop_box(rect):
+    """Returns crop box of rect
+
+    :param rect <QtCore.QRect> or tuple(x1, y1, x2, y2)
+    :return <tuple(<int>, <int>, <int>, <int>)> (x1, y1, x2, y2)
+    """
+    return rect if type(rect) == tuple else \
+        (rect.x(), rect.y(), rect.x() + rect.width(), rect.y() + rect.height())
+
+
 def crop_from_image_bytes(image_bytes, rect):
     """Crops image with given rect
 
@@ -134,12 +327,68 @@ def crop_from_image_bytes(image_bytes, rect):
     :param rect: <QtCore.QRect> Rect object with attributes: x, y, width and height.
     :return <bytes> Image bytes
     """
-    image = Image.open(io.BytesIO(image_bytes))
+    image = open_image(image_bytes)
     cropped_image = _crop_from_image(image, rect)
     cropped_image_bytes = _to_image_bytes(cropped_image)
     return cropped_image_bytes
 
 
+def get_image_proxy(image_bytes, max_size):
+    """Returns downscaled copy of image for preview(e.g. in crop dialog)
+
+    JPEG is decoded in reduced scale(see 'Image.draft'), so it's fast also for
+    large photos. Proxy is encoded in BMP(no compression, fast to load).
+
+    :param image_bytes <bytes> Image bytes
+    :param max_size <tuple(<int>, <int>)> Maximum (width, height) of proxy
+    :return <tuple(<bytes>, <float>)> or None Proxy bytes and scale of proxy(proxy / original);
+            None if image can't be decoded
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        transposed = _get_exif_orientation(image) in EXIF_ORIENTATIONS_TRANSPOSED
+        # Size of original as displayed, and max size of image as stored
+        orig_width = image.size[1] if transposed else image.size[0]
+        image.draft('RGB', max_size[::-1] if transposed else max_size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(max_size, Image.LANCZOS)
+        buf = io.BytesIO()
+        _remove_alpha(image).save(buf, format='BMP')
+    except (OSError, SyntaxError, ValueError):
+        logging.error('Image proxy can\'t be created', exc_info=True)
+        return None
+    return buf.getvalue(), image.width / orig_width
+
+
+def crop_and_resize_image_bytes(image_bytes, rect, height):
+    """Crops image in original resolution and proportionally resizes it to height
+
+    Image is decoded only once, JPEG in reduced scale if it's much larger than
+    the result(see 'Image.draft'). Used for importing large images(e.g. photos).
+
+    :param image_bytes <bytes> Image bytes
+    :param rect <QtCore.QRect> or tuple(x1, y1, x2, y2) or None Crop rect in coordinates of
+                original image(EXIF orientation applied); if None, image isn't cropped
+    :param height <int> Height of returned image
+    :return <bytes> Image bytes
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    transposed = _get_exif_orientation(image) in EXIF_ORIENTATIONS_TRANSPOSED
+    # Size of original as displayed
+    orig_width, orig_height = image.size[::-1] if transposed else image.size
+    crop_box = _get_crop_box(rect) if rect else (0, 0, orig_width, orig_height)
+    scale = height / (crop_box[3] - crop_box[1])
+    if scale < 1:
+        # Scale is the same in both dimensions, so draft size isn't transposed
+        image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    image = ImageOps.exif_transpose(image)
+    # Crop box is scaled to decoded(possibly reduced) image
+    decode_scale = image.width / orig_width
+    image = image.crop(tuple(round(value * decode_scale) for value in crop_box))
+    image = image.resize((max(round(image.width * height / image.height), 1), height), Image.LANCZOS)
+    return _to_image_bytes(image)
+
+
 def _resize_image_prop(orig_image, image_dim, dimension_size):
     """ Proportionally(in aspect ratio) resizes image and returns it
 
@@ -153,9 +402,9 @@ def _resize_image_prop(orig_image, image_dim, dimension_size):
         int(orig_image_width * (dimension_size / orig_image_height))
     new_height = dimension_size if image_dim == ImageDim.HEIGHT else \
         int(orig_image_height * (dimension_size / orig_image_width))
-    new_image = orig_image.resize((new_width, new_height), Image.LANCZOS)
-    mode = 'RGBA' if new_image.format == 'PNG' else 'RGB'
-    new_image = new_image.convert(mode)
+    # Alpha channel is kept(removed when image is encoded, see 'encode_image')
+    new_image = orig_image.convert('RGBA' if _has_alpha(orig_image) else 'RGB')
+    new_image = new_image.resize((new_width, new_height), Image.LANCZOS)
     return new_image
 
 
@@ -167,7 +416,7 @@ def resize_image_bytes_prop(orig_image_bytes, image_dim, dimension_size):
     :param dimension_size <int> - Image width or height size
     :return: <PIL.Image> - resized image
     """
-    orig_image = Image.open(io.BytesIO(orig_image_bytes))
+    orig_image = open_image(orig_image_bytes)
     resized_image = _resize_image_prop(orig_image, image_dim, dimension_size)
     resized_image_bytes = _to_image_bytes(resized_image)
     return resized_image_bytes
@@ -202,22 +451,13 @@ def resize_image_bytes(orig_image_bytes, new_size):
 
 
 def get_image_size(image_fp):
-    """Returns image size in bytes
+    """Returns image size(width, height)
 
     :param image_fp <str>  Image filepath
-    :return <int>
+    :return <tuple(<int>, <int>)> or None
     """
-    im_par = ImageFile.Parser()
-    with open(image_fp, "rb") as f:
-        chunk = f.read(2048)
-        count = 2048
-        while chunk != "":
-            im_par.feed(chunk)
-            if im_par.image:
-                break
-            chunk = f.read(2048)
-            count += 2048
-    return im_par.image.size
+    image_info = probe_image(image_fp)
+    return image_info.size if image_info else None
 
 
 def crop_square_from_image(orig_image, crop_orientation=CropOrientation.CENTER):
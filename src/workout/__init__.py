@@ -1,6 +1,7 @@
 from ._execution import (
     calc_workout_time, get_default_exer_exec_data, execution_data_valid,
     get_error_msg_for_col, get_default_col_value, filter_existing_exercise_row_data,
+    get_exercise_ids_from_row_data,
 )
 from ._names import (
     exercise_name_valid, workout_name_valid, plan_name_valid, exercise_filtered_name_valid,
@@ -131,21 +131,31 @@ def calc_workout_time(table_rows):
     return total_workout_time_sec // 60
 
 
-def filter_existing_exercise_row_data(rows_data):
+def get_exercise_ids_from_row_data(rows_data):
+    """Returns set of exercise ids used in rows data
+
+    :param rows_data <list(row_data)> See 'filter_existing_exercise_row_data'
+    :return <set(<int>)>
+    """
+    return {row_data[1] for row_data in rows_data if row_data[0] == str(TableRowType.EXER_EXEC)}
+
+
+def filter_existing_exercise_row_data(rows_data, existing_exer_ids=None):
     """Checks if exercise exists in DB and returns existing and missing exercises
 
     :param rows_data <list(row_data)> Row data is a tuple that contains data get from calling
                                       method 'to_data' from object instance from '_TableRow'
-    :return <tuple(<list(row_data)>, <list(exercise_id)>)>
+    :param existing_exer_ids <set(<int>)> or None Ids of existing exercises. If not given,
+                             they are selected(with one query) for exercises in 'rows_data'
+    :return <tuple(<list(row_data)>, <list(exercise_name)>)>
     """
+    if existing_exer_ids is None:
+        existing_exer_ids = DB().existing_exercise_ids(get_exercise_ids_from_row_data(rows_data))
     exist_rows_data = []
     missing_exercises = []
     for row_data in rows_data:
-        if row_data[0] == str(TableRowType.EXER_EXEC):
-            # --- Check if exercise exists in DB ---
-            exer_data = DB().select_exercise_data(row_data[1], get_none=True)
-            if not exer_data:
-                missing_exercises.append(row_data[2])
-                continue
+        if row_data[0] == str(TableRowType.EXER_EXEC) and row_data[1] not in existing_exer_ids:
+            missing_exercises.append(row_data[2])
+            continue
         exist_rows_data.append(row_data)
     return exist_rows_data, missing_exercises
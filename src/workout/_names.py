@@ -64,18 +64,33 @@ INSTRUCTION_STEP_TEXT_CHECK_ERROR_MSG = \
 
 # ----- Methods -----
 
+def _get_available_generic_name(table_name, name_base, numbered_only=False):
+    """Returns first available name in sequence: name_base, name_base 1, name_base 2, ...
+
+    All used names that start with 'name_base' are selected with one query
+    and the first free number is found in memory. Name is not reserved, but
+    unique name index on table makes sure it's not inserted twice.
+
+    :param table_name <str> Table with unique names
+    :param name_base <str>
+    :param numbered_only <bool> If True, 'name_base' alone is skipped
+    :return <str>
+    """
+    used_names = DB().select_names_with_prefix(table_name, name_base)
+    if not numbered_only and name_base.lower() not in used_names:
+        return name_base
+    numb = 1
+    while f'{name_base} {numb}'.lower() in used_names:
+        numb += 1
+    return f'{name_base} {numb}'
+
+
 def get_available_generic_exer_name():
     """Returns available exercise name by checking used names in DB
 
     :return <str>
     """
-    name_base = 'Exercise'
-    exer_name = name_base
-    for numb in range(1, 1000):
-        if not DB().select_from_table('exercises', 'name', {'name': exer_name}, get_none=True):
-            break
-        exer_name = name_base + f' {numb}'
-    return exer_name
+    return _get_available_generic_name('exercises', 'Exercise')
 
 
 def get_available_generic_workout_name(table_name=''):
@@ -85,12 +100,7 @@ def get_available_generic_workout_name(table_name=''):
     :return <str>
     """
     name_base = f'Workout for {table_name}'if table_name else 'Workout'
-    workout_name = name_base
-    for numb in range(1, 1000):
-        if not DB().select_from_table('workout', 'id', {'name': workout_name}, get_none=True):
-            break
-        workout_name = name_base + f' {numb}'
-    return workout_name
+    return _get_available_generic_name('workout', name_base)
 
 
 def get_available_generic_plan_name(prefix=''):
@@ -99,13 +109,7 @@ def get_available_generic_plan_name(prefix=''):
     :param prefix <str> Plan name prefix
     :return <str>
     """
-    name_base = f'{prefix}Plan'
-    plan_name = name_base
-    for numb in range(1, 1000):
-        plan_name = name_base + f' {numb}'
-        if not DB().select_from_table('week_plan', 'id', {'name': plan_name}, get_none=True):
-            break
-    return plan_name
+    return _get_available_generic_name('week_plan', f'{prefix}Plan', numbered_only=True)
 
 
 def _text_validator(regex_pattern, text):
@@ -0,0 +1,61 @@
+"""Microbenchmark: per-query latency of a new connection per query(old 'DB.execute_statement')
+vs. a long-lived connection from <ConnectionManager>.
+
+Run from project dir:
+    python -m test.benchmark.bench_db_connection
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from database.connection import ConnectionManager
+from util.timing import Timer
+
+
+NUMB_OF_QUERIES = 2000
+STATEMENT = 'SELECT id, name FROM equipment WHERE id = ?'
+
+
+def _create_test_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE equipment(id INTEGER PRIMARY KEY, name TEXT NOT NULL)')
+    conn.executemany('INSERT INTO equipment(id, name) VALUES(?, ?)',
+                     [(i, f'Equipment {i}') for i in range(1, 18)])
+    conn.commit()
+    conn.close()
+
+
+def _query_with_new_connection(db_path, params):
+    conn = sqlite3.connect(db_path)
+    try:
+        result_set = conn.execute(STATEMENT, params).fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    return result_set
+
+
+def _query_with_pooled_connection(conn_manager, params):
+    return conn_manager.get_connection().execute(STATEMENT, params).fetchall()
+
+
+def run_benchmark(numb_of_queries=NUMB_OF_QUERIES):
+    timer = Timer()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir, 'bench.db'))
+        _create_test_db(db_path)
+        conn_manager = ConnectionManager(db_path)
+        for i in range(numb_of_queries):
+            params = (i % 17 + 1,)
+            with timer.time_code_block('new connection per query'):
+                _query_with_new_connection(db_path, params)
+            with timer.time_code_block('pooled connection'):
+                _query_with_pooled_connection(conn_manager, params)
+        conn_manager.close_all()
+    for timed_code in timer.code_blocks.values():
+        print(f'{timed_code.get_name():>25}: {timed_code.avg_time * 1e6:8.1f} us/query '
+              f'({timed_code.n_timed} queries)')
+
+
+if __name__ == '__main__':
+    run_benchmark()
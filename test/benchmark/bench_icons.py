@@ -0,0 +1,54 @@
+"""Microbenchmark: generating exercise icons(all sizes from 'ICON_SIZES') with one
+decode and resize per icon size(old 'get_icons_dict') vs. single-decode pyramid
+('images.get_icons_dict'), for different source image sizes.
+
+Run from project dir:
+    python -m test.benchmark.bench_icons
+"""
+import io
+
+from PIL import Image, ImageDraw
+
+
+SOURCE_SIZES = (250, 500, 1000, 2000, 4000)  # Width and height of square source image
+SOURCE_FORMATS = ('JPEG', 'PNG')
+NUMB_OF_RUNS = 10
+
+
+def _get_source_image_bytes(size, image_format):
+    # Gradient with shapes, so image is not trivially compressible
+    image = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for i in range(0, size, max(size // 20, 1)):
+        draw.ellipse((i, i // 2, i + size // 10, i // 2 + size // 10), fill=(i % 256, 90, 160))
+    buf = io.BytesIO()
+    image.save(buf, format=image_format)
+    return buf.getvalue()
+
+
+def _get_icons_dict_per_size(image_bytes):
+    # Old way: source image is decoded and resized for every icon size
+    from settings import ICON_SIZES
+    from util.images import resize_image_bytes
+    return {width: resize_image_bytes(image_bytes, (width, height)) for width, height in ICON_SIZES}
+
+
+def run_benchmark():
+    from util import images
+    from util.timing import Timer
+    timer = Timer()
+    for image_format in SOURCE_FORMATS:
+        for size in SOURCE_SIZES:
+            image_bytes = _get_source_image_bytes(size, image_format)
+            for _ in range(NUMB_OF_RUNS):
+                with timer.time_code_block(f'{image_format:>4} {size:>4}px, decode per size'):
+                    _get_icons_dict_per_size(image_bytes)
+                with timer.time_code_block(f'{image_format:>4} {size:>4}px, get_icons_dict'):
+                    images.get_icons_dict(image_bytes)
+    for timed_code in timer.code_blocks.values():
+        print(f'{timed_code.get_name():>32}: {timed_code.avg_time * 1e3:8.2f} ms/exercise '
+              f'({timed_code.n_timed} runs)')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,84 @@
+"""Microbenchmark: building workout table rows with one icon query per row(old
+'DB.get_table_row_obj_from_data' loop) vs. one query per plan('DB.build_table_rows').
+
+Run from project dir:
+    python -m test.benchmark.bench_table_rows
+"""
+import pickle
+import tempfile
+from pathlib import Path
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+import config
+
+
+NUMB_OF_EXERCISES = 200
+PLAN_SIZES = (7, 35, 70, 140)  # Number of exercise rows in plan
+NUMB_OF_RUNS = 20
+
+
+def _get_png_bytes(color):
+    image = QtGui.QImage(70, 70, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(color, color, color))
+    byte_array = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(byte_array)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    image.save(buffer, 'PNG')
+    return bytes(byte_array)
+
+
+def _create_test_db(db):
+    from database.data_model import NewExerciseData
+    db.migrate_schema()
+    exers_data = []
+    for i in range(NUMB_OF_EXERCISES):
+        icon_bytes = _get_png_bytes(i % 256)
+        icons_dict_bytes = pickle.dumps({50: icon_bytes, 60: icon_bytes, 70: icon_bytes})
+        exers_data.append(NewExerciseData(f'Exercise {i}', 1, 1, 1, None, 1, icon_bytes, None,
+                                          icons_dict_bytes, '', 0, None, 1))
+    return db.insert_exercises(exers_data)
+
+
+def _build_rows_per_row(db, rows_data):
+    # Old way: one icon query per exercise row
+    from database.data_model import ExerciseExecutionRow
+    return [ExerciseExecutionRow(row_data[1], db.select_exercise_icons([row_data[1]])[row_data[1]], *row_data[2:])
+            for row_data in rows_data]
+
+
+def run_benchmark():
+    from database.db_obj import DB
+    from database.data_model import icon_cache
+    from util.timing import Timer
+    timer = Timer()
+    db = DB(config.DB_PATH)
+    exer_ids = _create_test_db(db)
+    for plan_size in PLAN_SIZES:
+        rows_data = [('TableRowType.EXER_EXEC', exer_ids[i % len(exer_ids)], f'Exercise {i}',
+                      '3', '10', '2', True) for i in range(plan_size)]
+        for cache_state in ('cold', 'warm'):
+            for _ in range(NUMB_OF_RUNS):
+                # Cold - icons are decoded in every run, warm - icons are in icon cache
+                if cache_state == 'cold':
+                    icon_cache.clear()
+                with timer.time_code_block(f'{plan_size:>3} rows, {cache_state}, query per row'):
+                    _build_rows_per_row(db, rows_data)
+                if cache_state == 'cold':
+                    icon_cache.clear()
+                with timer.time_code_block(f'{plan_size:>3} rows, {cache_state}, build_table_rows'):
+                    db.build_table_rows(rows_data)
+    db.close()
+    for timed_code in timer.code_blocks.values():
+        print(f'{timed_code.get_name():>36}: {timed_code.avg_time * 1e3:8.2f} ms/plan '
+              f'({timed_code.n_timed} runs)')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.DB_PATH = str(Path(tmp_dir, 'bench.db'))
+        config.SETTINGS_FILE = str(Path(tmp_dir, 'settings.json'))
+        app = QtWidgets.QApplication([])
+        from settings import Settings
+        Settings([QtCore.QRect(0, 0, 1920, 1080)])
+        run_benchmark()
@@ -0,0 +1,114 @@
+import pickle
+import sqlite3
+
+import pytest
+
+from database import migration, data_model
+from database.db_obj import DB
+from settings import ICON_SIZES
+from util.obj import SingletonDecorator
+
+
+# Icon size of exercise icons in tests(must be one of set sizes, see 'invalidate_exercise_icon')
+ICON_SIZE = ICON_SIZES[0][0]
+# Column values of inserted exercises which are not given
+EXERCISE_DEFAULT_VALUES = {
+    'type_id': 1,
+    'body_part_id': 1,
+    'main_muscle_group_id': 1,
+    'equipment_id': 1,
+    'icons_dict': pickle.dumps({}),
+    'instructions': '',
+}
+
+
+def _insert_exercises(conn, exercises, legacy_schema=False):
+    default_values = dict(EXERCISE_DEFAULT_VALUES)
+    if legacy_schema:
+        # Position image was stored inline(and required) before migration 9
+        default_values['position_1'] = b'\x00'
+    for exer_id, exercise in enumerate(exercises, start=1):
+        column_values = {'name': exercise} if isinstance(exercise, str) else exercise
+        column_values = {'id': exer_id, **default_values, **column_values}
+        conn.execute(f'INSERT INTO exercises({", ".join(column_values)}) '
+                     f'VALUES({", ".join("?" * len(column_values))})', tuple(column_values.values()))
+
+
+@pytest.fixture
+def make_db_file(tmp_path):
+    """Returns function which creates migrated test database file
+
+    Function is called with function which inserts test rows(called with
+    <sqlite3.Connection>) and returns path of database file. Singleton
+    instances(DB, Settings, ...) are cleaned before and after test.
+    """
+    def _make_db_file(insert_rows=None, db_name='test.db'):
+        db_path = str(tmp_path.joinpath(db_name))
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        assert migration.run_migrations(conn), 'Migrations failed'
+        if insert_rows:
+            insert_rows(conn)
+        conn.close()
+        SingletonDecorator.clean_instances()
+        return db_path
+
+    yield _make_db_file
+    SingletonDecorator.clean_instances()
+
+
+@pytest.fixture
+def make_db(make_db_file):
+    """Returns function which creates migrated test database and opens it with <DB>
+
+    Function is called like function of fixture 'make_db_file'. Opened
+    database is closed after test.
+    """
+    opened_dbs = []
+
+    def _make_db(insert_rows=None, db_name='test.db'):
+        opened_dbs.append(DB(make_db_file(insert_rows, db_name)))
+        return opened_dbs[-1]
+
+    yield _make_db
+    for db in opened_dbs:
+        db.close()
+
+
+@pytest.fixture
+def insert_exercises():
+    """Returns function which inserts exercises into test database
+
+    Function is called with <sqlite3.Connection> and list of exercises, given
+    as names or as dicts of column values. Exercise ids are 1, 2, ... and other
+    columns get values from 'EXERCISE_DEFAULT_VALUES', if they are not given.
+    With 'legacy_schema=True' exercises are inserted in schema before migration 9.
+    """
+    return _insert_exercises
+
+
+@pytest.fixture
+def icon_size(monkeypatch):
+    """Sets icon size of exercise icons(Settings are not created without screens)
+
+    :return <int> Icon size
+    """
+    monkeypatch.setattr(DB.cls, 'get_icon_size', staticmethod(lambda: ICON_SIZE))
+    monkeypatch.setattr(data_model, 'exercise_icon_key', lambda exer_id: ('exercise', exer_id, ICON_SIZE))
+    return ICON_SIZE
+
+
+@pytest.fixture
+def record_statements(monkeypatch):
+    """Returns function which starts recording of statements executed by DB
+
+    Function returns list, to which every executed statement is appended.
+    """
+    def _record_statements():
+        statements = []
+        execute_statement = DB.cls.execute_statement
+        monkeypatch.setattr(DB.cls, 'execute_statement',
+                            lambda self, stat, *args, **kwargs: statements.append(stat) or
+                            execute_statement(self, stat, *args, **kwargs))
+        return statements
+
+    return _record_statements
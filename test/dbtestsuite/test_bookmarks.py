@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+import config
+from database import migration
+from database.db_obj import DB
+from util.obj import SingletonDecorator
+
+
+def _open_db(db_path):
+    SingletonDecorator.clean_instances()
+    return DB(db_path)
+
+
+@pytest.fixture
+def db(make_db, insert_exercises, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'BOOKMARKS_FILE', str(tmp_path.joinpath('bookmarks.txt')))
+    return make_db(lambda conn: insert_exercises(conn, ['Squat', 'Deadlift', 'Bench press']))
+
+
+def test_bookmarks_are_ordered(db):
+    assert DB().select_bookmarks() == []
+    for exer_id in (3, 1, 2):
+        assert DB().insert_bookmark(exer_id)
+    # Already bookmarked exercise keeps its position
+    assert not DB().insert_bookmark(3)
+    assert [exer_id for exer_id, _ in DB().select_bookmarks()] == [3, 1, 2]
+    assert DB().delete_bookmark(1)
+    assert not DB().delete_bookmark(1)
+    assert DB().insert_bookmark(1)
+    assert [name for _, name in DB().select_bookmarks()] == ['Bench press', 'Deadlift', 'Squat']
+
+
+def test_deleted_exercise_is_unbookmarked(db):
+    assert DB().insert_bookmark(1)
+    assert DB().insert_bookmark(2)
+    assert DB().delete_exercise(1)
+    assert [exer_id for exer_id, _ in DB().select_bookmarks()] == [2]
+
+
+def test_migration_imports_bookmarks_file(tmp_path, monkeypatch, insert_exercises):
+    bookmarks_file = tmp_path.joinpath('bookmarks.txt')
+    # Exercise 7 was deleted(and remained in file)
+    bookmarks_file.write_text('2\n7\n1\n2\n')
+    monkeypatch.setattr(config, 'BOOKMARKS_FILE', str(bookmarks_file))
+    db_path = str(tmp_path.joinpath('legacy.db'))
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    assert migration.run_migrations(conn, [m for m in migration.MIGRATIONS if m.version < 8])
+    insert_exercises(conn, ['Squat', 'Deadlift'], legacy_schema=True)
+    assert migration.run_migrations(conn)
+    conn.close()
+    try:
+        assert [exer_id for exer_id, _ in _open_db(db_path).select_bookmarks()] == [2, 1]
+    finally:
+        DB().close()
+        SingletonDecorator.clean_instances()
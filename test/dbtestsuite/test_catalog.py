@@ -0,0 +1,43 @@
+import pytest
+
+from database.catalog import ReferenceCatalog
+from database.db_obj import DB
+
+
+def _insert_reference_rows(conn):
+    conn.executemany('INSERT INTO equipment(id, name) VALUES(?, ?)', [(1, 'Barbell'), (2, 'Cable')])
+    conn.executemany("INSERT INTO plan_type(id, name, icon) VALUES(?, ?, ?)",
+                     [(1, 'cardio', b'icon1'), (2, 'hiit', b'icon2')])
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(_insert_reference_rows)
+
+
+def test_tables_are_selected_once(db, monkeypatch):
+    catalog = ReferenceCatalog()
+    assert catalog.get_id_name_dict('equipment') == {1: 'Barbell', 2: 'Cable'}
+    monkeypatch.setattr(DB.cls, 'select_from_table', lambda *args, **kwargs: pytest.fail('Table selected again'))
+    assert catalog.get_name('equipment', 2) == 'Cable'
+    assert catalog.get_id('equipment', 'Barbell') == 1
+    assert catalog.get_id('equipment', 'Plate') is None
+
+
+def test_returned_dict_is_copy(db):
+    ReferenceCatalog().get_id_name_dict('equipment')[3] = 'Plate'
+    assert ReferenceCatalog().get_id_name_dict('equipment') == {1: 'Barbell', 2: 'Cable'}
+
+
+def test_invalidated_on_update(db):
+    catalog = ReferenceCatalog()
+    assert catalog.get_plan_type_icon('hiit') == b'icon2'
+    assert db.update_table('equipment', {'name': 'Bar'}, 1)
+    assert catalog.get_name('equipment', 1) == 'Bar'
+    assert db.update_table('plan_type', {'icon': b'new'}, 2)
+    assert catalog.get_plan_type_icon('hiit') == b'new'
+
+
+def test_not_reference_table(db):
+    with pytest.raises(ValueError):
+        ReferenceCatalog().get_id_name_dict('exercises')
@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database.connection import ConnectionManager
+
+
+@pytest.fixture
+def connection_manager(tmp_path):
+    connection_manager = ConnectionManager(str(tmp_path.joinpath('test.db')))
+    yield connection_manager
+    connection_manager.close_all()
+
+
+def _get_thread_connection(connection_manager):
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(connection_manager.get_connection()))
+    thread.start()
+    thread.join()
+    return connections[0]
+
+
+def test_connection_is_reused_in_thread(connection_manager):
+    conn = connection_manager.get_connection()
+    assert connection_manager.get_connection() is conn
+    thread_conn = _get_thread_connection(connection_manager)
+    assert thread_conn is not conn
+    assert _get_thread_connection(connection_manager) not in (conn, thread_conn)
+
+
+def test_connection_pragmas(connection_manager):
+    conn = connection_manager.get_connection()
+    assert conn.isolation_level is None
+    assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal', )
+    # Statement is committed without explicit transaction
+    conn.execute('CREATE TABLE item(name TEXT)')
+    conn.execute("INSERT INTO item(name) VALUES('a')")
+    assert not conn.in_transaction
+    assert _get_thread_connection(connection_manager).execute('SELECT name FROM item').fetchall() == [('a', )]
+
+
+def test_close_all_closes_connections_of_all_threads(connection_manager):
+    conn = connection_manager.get_connection()
+    thread_conn = _get_thread_connection(connection_manager)
+    connection_manager.close_all()
+    for closed_conn in (conn, thread_conn):
+        with pytest.raises(sqlite3.ProgrammingError):
+            closed_conn.execute('SELECT 1')
+    # New connection is opened on next use
+    new_conn = connection_manager.get_connection()
+    assert new_conn is not conn
+    assert new_conn.execute('SELECT 1').fetchone() == (1, )
+    connection_manager.close_all()
+    connection_manager.close_all()
+    assert connection_manager.get_connection().execute('SELECT 1').fetchone() == (1, )
@@ -0,0 +1,52 @@
+import pytest
+
+from gui.flags import TableRowType
+from workout import filter_existing_exercise_row_data, get_exercise_ids_from_row_data
+
+
+EXER = str(TableRowType.EXER_EXEC)
+SS_TOP = str(TableRowType.SS_TOP)
+SS_BOTTOM = str(TableRowType.SS_BOTTOM)
+
+# Exercise 4('Deadlift') was deleted
+ROWS_DATA = [
+    (EXER, 1, 'Squat', 3, 10, 2, True),
+    (SS_TOP, 1),
+    (EXER, 4, 'Deadlift', 4, 8, 2, True),
+    (EXER, 2, 'Bench press', 4, 8, 2, True),
+    (SS_BOTTOM, 1, 3, 2),
+    (EXER, 1, 'Squat', 2, 12, 1, True),
+]
+
+
+@pytest.fixture
+def db(make_db, insert_exercises):
+    return make_db(lambda conn: insert_exercises(conn, ['Squat', 'Bench press']))
+
+
+def test_exercise_ids_from_row_data():
+    assert get_exercise_ids_from_row_data(ROWS_DATA) == {1, 2, 4}
+    assert get_exercise_ids_from_row_data([(SS_TOP, 1), (SS_BOTTOM, 1, 3, 2)]) == set()
+
+
+def test_missing_exercises_are_filtered_with_one_query(db, record_statements):
+    statements = record_statements()
+    rows_data, missing_exercises = filter_existing_exercise_row_data(ROWS_DATA)
+    assert rows_data == [row_data for row_data in ROWS_DATA if row_data[1:3] != (4, 'Deadlift')]
+    assert missing_exercises == ['Deadlift']
+    assert len(statements) == 1
+
+
+def test_existing_exercises_are_kept(db):
+    rows_data = [row_data for row_data in ROWS_DATA if row_data[1:3] != (4, 'Deadlift')]
+    assert filter_existing_exercise_row_data(rows_data) == (rows_data, [])
+    assert filter_existing_exercise_row_data([]) == ([], [])
+
+
+def test_given_existing_ids_are_not_selected(db, record_statements):
+    statements = record_statements()
+    # Exercise 2 is treated as missing, exercise 4 as existing
+    rows_data, missing_exercises = filter_existing_exercise_row_data(ROWS_DATA, existing_exer_ids={1, 4})
+    assert [row_data[1] for row_data in rows_data if row_data[0] == EXER] == [1, 4, 1]
+    assert missing_exercises == ['Bench press']
+    assert statements == []
@@ -0,0 +1,56 @@
+import io
+
+import pytest
+from PIL import Image
+from PyQt5.QtCore import Qt
+
+from database.data_model import ExerciseListModel, ExerciseListRow, icon_cache
+
+
+def _get_icon_bytes(icon_size):
+    buf = io.BytesIO()
+    Image.new('RGB', (icon_size, icon_size), (120, 60, 30)).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+@pytest.fixture
+def icon_loader(icon_size, qapp):
+    icon_cache.clear()
+    calls = []
+    icon_bytes = _get_icon_bytes(icon_size)
+
+    def load_icons(exer_ids):
+        # Exercise 2 has no icon
+        calls.append(list(exer_ids))
+        return {exer_id: icon_bytes for exer_id in exer_ids if exer_id != 2}
+
+    load_icons.calls = calls
+    yield load_icons
+    icon_cache.clear()
+
+
+def _get_icons(model):
+    return [model.data(model.index(row), Qt.ItemDataRole.DecorationRole) for row in range(model.rowCount())]
+
+
+def test_icons_are_loaded_once(icon_loader):
+    model = ExerciseListModel([ExerciseListRow(exer_id, f'Exercise {exer_id}') for exer_id in (1, 2, 3)],
+                              icon_loader=icon_loader)
+    for _ in range(3):
+        icons = _get_icons(model)
+    assert icon_loader.calls == [[1, 2, 3]]
+    # Exercise without icon gets null icon(cached, not loaded again)
+    assert [icon.isNull() for icon in icons] == [False, True, False]
+
+
+def test_prefetched_icons_are_not_loaded_on_paint(icon_loader):
+    model = ExerciseListModel([ExerciseListRow(exer_id, f'Exercise {exer_id}') for exer_id in (1, 2, 3)],
+                              icon_loader=icon_loader)
+    model.prefetch_icons()
+    _get_icons(model)
+    _get_icons(model)
+    assert icon_loader.calls == [[1, 2, 3]]
+    # Icon of exercise is loaded again after it's changed
+    model.refresh_row(2, 'Exercise 2')
+    _get_icons(model)
+    assert icon_loader.calls == [[1, 2, 3], [2]]
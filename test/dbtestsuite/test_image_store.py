@@ -0,0 +1,67 @@
+import pickle
+import sqlite3
+
+import pytest
+
+from database import migration
+from database.data_model import NewExerciseData
+from util.images import get_image_hash
+
+
+def _new_exercise_data(name, pos1, pos2=None):
+    return NewExerciseData(name, 1, 1, 1, None, 1, pos1, pos2, pickle.dumps({50: b'icon'}), '', 0, None, 1)
+
+
+def _get_ref_counts(db):
+    return dict(db.execute_statement('SELECT hash, ref_count FROM image'))
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db()
+
+
+def test_migration_dedupes_images(tmp_path, insert_exercises):
+    conn = sqlite3.connect(str(tmp_path.joinpath('inline_images.db')), isolation_level=None)
+    assert migration.run_migrations(conn, [m for m in migration.MIGRATIONS if m.version < 9])
+    conn.executemany('INSERT INTO muscle_group(id, name, image) VALUES(?, ?, ?)',
+                     [(1, 'quads', b'diagram'), (2, 'glutes', b'diagram')])
+    insert_exercises(conn, [{'name': 'Squat', 'position_1': b'photo', 'position_2': b'photo'},
+                            {'name': 'Lunge', 'position_1': b'photo'}, {'name': 'Plank', 'position_1': b'plank'}],
+                     legacy_schema=True)
+    assert migration.run_migrations(conn)
+    ref_counts = dict(conn.execute('SELECT hash, ref_count FROM image'))
+    assert ref_counts == {get_image_hash(b'diagram'): 2, get_image_hash(b'photo'): 3, get_image_hash(b'plank'): 1}
+    assert conn.execute('SELECT position_2_hash FROM exercises WHERE id = 1').fetchone()[0] == \
+        get_image_hash(b'photo')
+    # Rebuilt tables keep indexes and triggers of earlier migrations
+    exercises_columns = [column[1] for column in conn.execute('PRAGMA table_info(exercises)')]
+    assert 'position_1' not in exercises_columns and 'position_2' not in exercises_columns
+    exercises_schema_objects = {name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE tbl_name = 'exercises' AND type IN ('index', 'trigger')")}
+    assert {'idx_exercises_name', 'idx_exercises_name_nocase', 'trg_exercises_fts_insert',
+            'trg_exercises_delete_bookmark'} <= exercises_schema_objects
+    assert conn.execute("SELECT rowid FROM exercises_fts WHERE exercises_fts MATCH 'plank'").fetchall() == [(3, )]
+    conn.close()
+
+
+def test_images_are_stored_once(db):
+    exer_id = db.insert_exercise(_new_exercise_data('Squat', b'photo', b'photo'))
+    assert db.insert_exercises([_new_exercise_data('Lunge', b'photo'), _new_exercise_data('Plank', b'plank')])
+    assert _get_ref_counts(db) == {get_image_hash(b'photo'): 3, get_image_hash(b'plank'): 1}
+    assert db.select_image(get_image_hash(b'photo')) == b'photo'
+    assert db.select_from_table('exercises', 'position_2_hash', {'id': exer_id}) == get_image_hash(b'photo')
+
+
+def test_unreferenced_images_are_deleted(db):
+    exer_id = db.insert_exercise(_new_exercise_data('Squat', b'photo', b'other photo'))
+    plank_id = db.insert_exercise(_new_exercise_data('Plank', b'plank'))
+    assert db.update_exercise(exer_id, {'position_1': b'new photo', 'position_2': None})
+    assert _get_ref_counts(db) == {get_image_hash(b'new photo'): 1, get_image_hash(b'plank'): 1}
+    assert db.update_exercises({plank_id: {'position_1': b'new photo'}}) == [True]
+    assert db.delete_exercise(exer_id)
+    assert _get_ref_counts(db) == {get_image_hash(b'new photo'): 1}
+    # Image of failed write stays unreferenced until garbage collection
+    assert db.execute_statement("INSERT INTO image(hash, bytes) VALUES('orphan', x'00')")
+    assert db.delete_unreferenced_images()
+    assert _get_ref_counts(db) == {get_image_hash(b'new photo'): 1}
@@ -0,0 +1,59 @@
+from functools import partial
+
+import pytest
+
+from database.data_model import LazyBlob
+from util.images import get_image_hash
+
+
+def _insert_rows(conn, insert_exercises, icon_size):
+    images_bytes = (b'quads image', b'glutes image', b'squat 1', b'squat 2', b'lunge 1')
+    conn.executemany('INSERT INTO image(hash, bytes) VALUES(?, ?)',
+                     [(get_image_hash(image_bytes), image_bytes) for image_bytes in images_bytes])
+    quads, glutes, squat1, squat2, lunge1 = (get_image_hash(image_bytes) for image_bytes in images_bytes)
+    conn.execute("INSERT INTO exercise_type(id, name) VALUES(1, 'strength')")
+    conn.execute("INSERT INTO body_part(id, name) VALUES(1, 'legs')")
+    conn.executemany('INSERT INTO muscle_group(id, name, image_hash) VALUES(?, ?, ?)',
+                     [(1, 'quads', quads), (2, 'glutes', glutes)])
+    conn.execute("INSERT INTO equipment(id, name) VALUES(1, 'barbell')")
+    insert_exercises(conn, [
+        {'name': 'Squat', 'minor_muscle_group_id': 2, 'position_1_hash': squat1, 'position_2_hash': squat2},
+        {'name': 'Lunge', 'position_1_hash': lunge1},
+    ])
+    conn.executemany("INSERT INTO exercise_icon(exercise_id, size, bytes) VALUES(?, ?, x'00')",
+                     [(1, icon_size), (2, icon_size)])
+
+
+@pytest.fixture
+def db(make_db, insert_exercises, icon_size, qapp):
+    return make_db(partial(_insert_rows, insert_exercises=insert_exercises, icon_size=icon_size))
+
+
+def test_images_are_read_on_first_access(db, record_statements):
+    exercise_data = db.select_exercise_data(1)
+    assert exercise_data.name == 'Squat'
+    assert isinstance(exercise_data._pos1_image, LazyBlob)
+    statements = record_statements()
+    assert exercise_data.pos1_image == b'squat 1'
+    assert exercise_data.pos1_image == b'squat 1'
+    assert len(statements) == 1
+    assert exercise_data.pos2_image == b'squat 2'
+    assert exercise_data.main_muscle_group_image == b'quads image'
+    assert exercise_data.minor_muscle_group_image == b'glutes image'
+
+
+def test_missing_images_are_none(db):
+    exercise_data = db.select_exercise_data(2)
+    assert exercise_data.minor_muscle_group_image is None
+    assert exercise_data.pos2_image is None
+
+
+def test_prefetched_images(db, record_statements):
+    exercise_data = db.select_exercise_data(1, prefetch=('pos1_image', 'pos2_image'))
+    statements = record_statements()
+    assert (exercise_data.pos1_image, exercise_data.pos2_image) == (b'squat 1', b'squat 2')
+    assert statements == []
+    assert exercise_data.main_muscle_group_image == b'quads image'
+    assert len(statements) == 1
+    with pytest.raises(ValueError):
+        db.select_exercise_data(1, prefetch=('icon', ))
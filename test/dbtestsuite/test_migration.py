@@ -0,0 +1,18 @@
+import sqlite3
+
+from database import migration
+
+
+def test_supported_sqlite_has_no_missing_features():
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    assert migration.get_unsupported_features(conn) == []
+    conn.close()
+
+
+def test_migrations_are_not_started_on_unsupported_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(migration, 'MIN_SQLITE_VERSION', (99, 0, 0))
+    conn = sqlite3.connect(str(tmp_path.joinpath('old_sqlite.db')), isolation_level=None)
+    assert not migration.run_migrations(conn)
+    assert migration.get_schema_version(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+    conn.close()
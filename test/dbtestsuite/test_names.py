@@ -0,0 +1,78 @@
+import sqlite3
+
+import pytest
+
+from database import migration
+from database.data_model import WorkoutData, PlanData
+from database.db_obj import DB
+from database.exceptions import DuplicateNameError
+from workout import (
+    get_available_generic_exer_name, get_available_generic_workout_name, get_available_generic_plan_name
+)
+
+
+def _insert_names(conn, table_name, names):
+    if table_name == 'workout':
+        stat = 'INSERT INTO workout(name, type_id, workout_time) VALUES(?, 1, 0)'
+    else:
+        stat = 'INSERT INTO week_plan(name, plan_type_id) VALUES(?, 1)'
+    conn.executemany(stat, [(name, ) for name in names])
+
+
+@pytest.fixture
+def conn(make_db):
+    # Test rows are inserted with connection of opened DB
+    return make_db().connection_manager.get_connection()
+
+
+def test_generic_names_in_empty_db(conn):
+    assert get_available_generic_exer_name() == 'Exercise'
+    assert get_available_generic_workout_name() == 'Workout'
+    assert get_available_generic_workout_name('monday') == 'Workout for monday'
+    assert get_available_generic_plan_name() == 'Plan 1'
+
+
+def test_first_free_number(conn):
+    _insert_names(conn, 'workout', ['Workout', 'workout 1', 'Workout 3', 'Workout for monday'])
+    _insert_names(conn, 'week_plan', ['Plan 1', 'Plan 2', 'Plan_3'])
+    assert get_available_generic_workout_name() == 'Workout 2'
+    assert get_available_generic_workout_name('monday') == 'Workout for monday 1'
+    # '_' in name is not a wildcard
+    assert get_available_generic_plan_name() == 'Plan 3'
+
+
+def test_names_with_prefix_is_one_query(conn, record_statements):
+    _insert_names(conn, 'workout', ['Workout'] + [f'Workout {numb}' for numb in range(1, 300)])
+    statements = record_statements()
+    assert get_available_generic_workout_name() == 'Workout 300'
+    assert len(statements) == 1
+
+
+def test_unique_name_index(conn):
+    _insert_names(conn, 'workout', ['Legs'])
+    with pytest.raises(sqlite3.IntegrityError):
+        _insert_names(conn, 'workout', ['LEGS'])
+
+
+def test_migration_renames_duplicates(tmp_path):
+    conn = sqlite3.connect(str(tmp_path.joinpath('duplicates.db')), isolation_level=None)
+    assert migration.run_migrations(conn, [m for m in migration.MIGRATIONS if m.version < 7])
+    _insert_names(conn, 'week_plan', ['Push', 'push', 'PUSH', 'Push (2)'])
+    assert migration.run_migrations(conn)
+    names = [name for name, in conn.execute('SELECT name FROM week_plan ORDER BY id')]
+    assert names == ['Push', 'push (3)', 'PUSH (4)', 'Push (2)']
+    conn.close()
+
+
+def test_duplicate_name_raises_typed_error(conn):
+    workout_id = DB().insert_into_workout(WorkoutData('Legs', 1, (('TableRowType.SS_TOP', 1), ), 60), 0)
+    assert workout_id == DB().select_id_by_name('workout', 'LEGS')
+    with pytest.raises(DuplicateNameError) as exc_info:
+        DB().insert_into_workout(WorkoutData('legs', 1, (('TableRowType.SS_TOP', 1), ), 60), 0)
+    assert exc_info.value.table_name == 'workout'
+    # Failed insert is rolled back(with its rows)
+    assert conn.execute('SELECT COUNT(*) FROM workout_row').fetchone()[0] == 1
+    plan_id = DB().insert_into_week_plan(PlanData(None, 'Push', 1, [None] * 7), 0)
+    assert DB().insert_into_week_plan(PlanData(None, 'Pull', 1, [None] * 7), 0) == plan_id + 1
+    with pytest.raises(DuplicateNameError):
+        DB().update_week_plan(PlanData(plan_id, 'PULL', 1, [None] * 7))
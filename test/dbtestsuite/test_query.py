@@ -0,0 +1,54 @@
+import pytest
+
+from database import query
+from database.db_obj import MAX_IN_PARAMS
+
+
+@pytest.fixture
+def db(make_db, insert_exercises):
+    return make_db(lambda conn: insert_exercises(conn, ['Squat', 'Deadlift', 'Bench press']))
+
+
+def test_filter_shape_is_canonical():
+    filter_shape, params = query.get_filter_shape({'name': 'Squat%', 'type_id': 1})
+    assert filter_shape == (('name', query.LIKE_OPERATOR), ('type_id', query.EQUAL_OPERATOR))
+    assert query.get_filter_shape({'type_id': 1, 'name': 'Squat%'}) == (filter_shape, params)
+    assert params == ('Squat%', 1)
+    assert query.select_statement('exercises', ('id', ), filter_shape, 'name') == \
+        'SELECT id FROM exercises WHERE name LIKE ? AND type_id = ? ORDER BY name ASC'
+    assert query.get_filter_shape(None) == ((), ())
+    assert query.update_statement('exercises', ('name', 'link')) == \
+        'UPDATE exercises SET name = ?, link = ? WHERE id = ?'
+
+
+def test_quoted_values_are_bound_unchanged(db):
+    assert db.update_table('exercises', {'name': "O'Neil's squat", 'instructions': 'Say "down"'}, 1)
+    assert db.select_from_table('exercises', ['name', 'instructions'], {'id': 1}) == \
+        ("O'Neil's squat", 'Say "down"')
+    assert db.select_from_table('exercises', 'id', {'name': "O'Neil's squat"}) == 1
+    assert db.update_exercise(2, {'name': "Farmer's deadlift"})
+    assert db.select_from_table('exercises', 'name', {'id': 2}) == "Farmer's deadlift"
+
+
+def test_null_values_are_bound(db):
+    assert db.update_table('exercises', {'link': 'https://example.com', 'minor_muscle_group_id': 1}, 1)
+    assert db.update_table('exercises', {'link': None, 'minor_muscle_group_id': None}, 1)
+    assert db.select_from_table('exercises', ['link', 'minor_muscle_group_id'], {'id': 1}) == (None, None)
+    assert db.execute_statement('SELECT COUNT(*) FROM exercises WHERE link IS NULL') == [(3, )]
+
+
+def test_like_filter(db):
+    assert db.select_from_table('exercises', 'name', {'name': '%squat%'}) == 'Squat'
+    assert db.select_from_table('exercises', 'name', {'name': 'b%'}) == 'Bench press'
+    # Value without '%' is compared for equality
+    assert db.select_from_table('exercises', 'name', {'name': 'Squa'}, get_none=True) is None
+    assert db.update_table('exercises', {'name': "Squat 'low'"}, 1)
+    assert db.select_from_table('exercises', 'id', {'name': "%'low'%"}) == 1
+
+
+def test_in_filter_is_chunked(db, record_statements):
+    statements = record_statements()
+    exer_ids = list(range(1, MAX_IN_PARAMS * 2 + 2))
+    assert db.existing_exercise_ids(exer_ids) == {1, 2, 3}
+    assert len(statements) == 3
+    assert db.existing_exercise_ids([]) == set()
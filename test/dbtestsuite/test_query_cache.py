@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from database import query
+from database.data_model import WorkoutData
+from database.query_cache import QueryCache
+
+
+WORKOUT_INFO_STAT = 'SELECT workout.name, plan_type.name FROM workout ' \
+                    'LEFT JOIN plan_type ON workout.type_id = plan_type.id ORDER BY workout.name'
+
+
+def _insert_plan_types(conn):
+    conn.executemany("INSERT INTO plan_type(id, name, icon) VALUES(?, ?, x'00')", [(1, 'cardio'), (2, 'hiit')])
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(_insert_plan_types)
+
+
+def test_statement_tables():
+    assert query.get_read_tables('SELECT a FROM workout LEFT JOIN plan_type ON x = y') == ('plan_type', 'workout')
+    assert query.get_written_table('INSERT OR REPLACE INTO exercise_icon(a) VALUES(?)') == 'exercise_icon'
+    assert query.get_written_table('UPDATE workout SET name = ? WHERE id = ?') == 'workout'
+    assert query.get_written_table('DELETE FROM week_plan WHERE id = ?') == 'week_plan'
+    assert query.get_written_table('SELECT id FROM workout') is None
+
+
+def test_repeated_read_is_cached(db):
+    assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Legs', 'cardio')]
+    hits = db.query_cache.get_stats()['hits']
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Legs', 'cardio')]
+    assert db.query_cache.get_stats()['hits'] == hits + 1
+
+
+def test_write_invalidates_cached_read(db):
+    assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Legs', 'cardio')]
+    assert db.insert_into_workout(WorkoutData('Arms', 2, (), 60), 0)
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Arms', 'hiit'), ('Legs', 'cardio')]
+    # Write to joined table also invalidates cached read
+    assert db.update_table('plan_type', {'name': 'run'}, 1)
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Arms', 'hiit'), ('Legs', 'run')]
+
+
+def test_write_through_trigger_invalidates_cached_read(db):
+    assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+    stat = 'SELECT id FROM workout_row WHERE workout_id = ?'
+    workout_id = db.select_from_table('workout', 'id')
+    assert db.update_workout(workout_id, WorkoutData('Legs', 1, (('TableRowType.SS_TOP', 1), ), 60))
+    assert len(db.execute_statement(stat, (workout_id, ), cached=True)) == 1
+    assert db.delete_workout(workout_id)
+    assert db.execute_statement(stat, (workout_id, ), cached=True) == []
+
+
+def test_read_during_transaction_is_invalidated_at_commit(db):
+    results = []
+
+    def read_workouts():
+        # Other connection reads data committed before transaction
+        results.append(db.execute_statement(WORKOUT_INFO_STAT, cached=True))
+
+    with db.transaction():
+        assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+        reader = threading.Thread(target=read_workouts)
+        reader.start()
+        reader.join()
+    assert results == [[]]
+    assert db.execute_statement(WORKOUT_INFO_STAT, cached=True) == [('Legs', 'cardio')]
+
+
+def test_cache_bounds():
+    cache = QueryCache(maxsize=2)
+    for i in range(3):
+        cache.put(f'SELECT {i}', None, cache.get_stamp(()), [(i, )])
+    assert cache.get('SELECT 0', None, ()) is None
+    assert cache.get('SELECT 2', None, ()) == [(2, )]
+    stats = cache.get_stats()
+    assert (stats['items'], stats['hits'], stats['misses'], stats['hit_rate']) == (2, 1, 1, 0.5)
@@ -0,0 +1,77 @@
+import sqlite3
+from itertools import combinations
+
+import pytest
+
+from database import migration
+from database.db_obj import DB
+from util.obj import SingletonDecorator
+
+
+# Filter keys(and values) that '_FilterBox' can put in db filter dict
+# (searched text is not a column filter, it's tested with 'search_exercises')
+FILTER_BOX_FILTERS = {
+    'exercises.type_id': 1,
+    'exercises.body_part_id': 1,
+    'exercises.main_muscle_group_id': 1,
+    'exercises.equipment_id': 1,
+    'favorite': 1,
+    'user_permission': 1,
+}
+EXERCISE_COLUMNS = ('exercises.id', 'exercises.name')
+
+
+def _all_filter_dicts():
+    filter_keys = list(FILTER_BOX_FILTERS.keys())
+    for numb_of_keys in range(len(filter_keys) + 1):
+        for keys in combinations(filter_keys, numb_of_keys):
+            yield {key: FILTER_BOX_FILTERS[key] for key in keys}
+
+
+@pytest.fixture(scope='module')
+def db_conn(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp('db').joinpath('query_plan.db'))
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    assert migration.run_migrations(conn), 'Migrations failed'
+    SingletonDecorator.clean_instances()
+    DB(db_path)
+    yield conn
+    DB().close()
+    SingletonDecorator.clean_instances()
+    conn.close()
+
+
+def _get_table_steps(plan, table_name):
+    return [step for step in plan if step.split(' ')[1] == table_name]
+
+
+@pytest.mark.parametrize('icon_size', [None, 50])
+@pytest.mark.parametrize('filters', list(_all_filter_dicts()), ids=lambda f: '+'.join(f) or 'no_filters')
+def test_select_exercises_uses_index(db_conn, filters, icon_size):
+    columns = EXERCISE_COLUMNS + ('exercise_icon.bytes', ) if icon_size else EXERCISE_COLUMNS
+    statement, params = DB().get_select_exercises_statement(
+        columns, filters, order_by='exercises.name', icon_size=icon_size)
+    plan = [row[3] for row in db_conn.execute(f'EXPLAIN QUERY PLAN {statement}', params)]
+    # All filters are on table 'exercises', which is searched with one of them
+    exercise_steps = _get_table_steps(plan, 'exercises')
+    if filters:
+        assert len(exercise_steps) == 1 and exercise_steps[0].startswith('SEARCH exercises USING INDEX'), \
+            f'Filtered table is not searched for filters={filters}: {plan}'
+    else:
+        assert exercise_steps == ['SCAN exercises USING INDEX idx_exercises_name'], plan
+    # Joined tables are searched by key
+    scans = [step for step in plan if step.startswith('SCAN') and step not in exercise_steps]
+    assert not scans, f'Joined table scanned for filters={filters}: {plan}'
+
+
+@pytest.mark.parametrize('filters', list(_all_filter_dicts()), ids=lambda f: '+'.join(f) or 'no_filters')
+def test_search_exercises_uses_index(db_conn, filters):
+    statement, params = DB().get_search_exercises_statement('"squat"*', filters)
+    plan = [row[3] for row in db_conn.execute(f'EXPLAIN QUERY PLAN {statement}', params)]
+    # Matched rows are found with full-text index, filtered rows are searched by rowid
+    fts_steps = _get_table_steps(plan, 'exercises_fts')
+    assert len(fts_steps) == 1 and ':M' in fts_steps[0], f'Full-text index is not used: {plan}'
+    assert _get_table_steps(plan, 'exercises') == ['SEARCH exercises USING INTEGER PRIMARY KEY (rowid=?)'], \
+        f'Filtered table is not searched for filters={filters}: {plan}'
+    scans = [step for step in plan if step.startswith('SCAN') and step not in fts_steps]
+    assert not scans, f'Full table scan for filters={filters}: {plan}'
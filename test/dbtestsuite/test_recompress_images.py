@@ -0,0 +1,96 @@
+import io
+import sqlite3
+from functools import partial
+
+import pytest
+from PIL import Image
+
+from database.db_obj import DB
+from tools import recompress_images
+from util import images
+from util.images import get_image_hash
+
+
+def _get_noise_image_bytes(seed, quality=95):
+    image = Image.frombytes('RGB', (300, 200), bytes((i * seed * 7919) % 251 for i in range(300 * 200 * 3)))
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=quality)
+    return buf.getvalue()
+
+
+# Image re-encoded with default policy(must be replaced)
+LARGE_IMAGE = _get_noise_image_bytes(1)
+# Result of re-encoding 'LARGE_IMAGE'(already stored, must not be replaced)
+ENCODED_IMAGE = images.encode_image(images.open_image(LARGE_IMAGE))
+# Image which is replaced with new(not stored) image
+OTHER_IMAGE = _get_noise_image_bytes(3)
+
+
+def _insert_images(conn, insert_exercises):
+    large_hash, encoded_hash, other_hash = map(get_image_hash, (LARGE_IMAGE, ENCODED_IMAGE, OTHER_IMAGE))
+    insert_exercises(conn, [{'name': 'Exercise 1', 'position_1_hash': large_hash, 'position_2_hash': encoded_hash},
+                            {'name': 'Exercise 2', 'position_1_hash': other_hash, 'position_2_hash': large_hash}])
+    conn.execute('INSERT INTO muscle_group(id, name, image_hash) VALUES(1, ?, ?)', ('Chest', large_hash))
+    conn.executemany('INSERT INTO image(hash, bytes) VALUES(?, ?)',
+                     [(get_image_hash(image_bytes), image_bytes)
+                      for image_bytes in (LARGE_IMAGE, ENCODED_IMAGE, OTHER_IMAGE)])
+    # Images were inserted after references, so reference counts are set here
+    conn.execute('UPDATE image SET ref_count = ? WHERE hash = ?', (3, large_hash))
+    conn.execute('UPDATE image SET ref_count = ? WHERE hash = ?', (1, encoded_hash))
+    conn.execute('UPDATE image SET ref_count = ? WHERE hash = ?', (1, other_hash))
+
+
+@pytest.fixture
+def db_path(make_db_file, insert_exercises):
+    return make_db_file(partial(_insert_images, insert_exercises=insert_exercises))
+
+
+def test_images_are_replaced_and_references_moved(db_path):
+    report = recompress_images.recompress_images(db_path, workers=2, page_size=2, show_progress=False)
+    assert report['numb_replaced'] == 2
+    assert report['failed_hashes'] == []
+    assert report['images_size_after'] < report['images_size_before']
+    conn = sqlite3.connect(db_path)
+    encoded_hash = get_image_hash(ENCODED_IMAGE)
+    other_row = conn.execute('SELECT position_1_hash FROM exercises WHERE id = 2').fetchone()
+    new_other_hash = other_row[0]
+    assert new_other_hash != get_image_hash(OTHER_IMAGE)
+    assert conn.execute('SELECT position_1_hash, position_2_hash FROM exercises ORDER BY id').fetchall() == \
+        [(encoded_hash, encoded_hash), (new_other_hash, encoded_hash)]
+    assert conn.execute('SELECT image_hash FROM muscle_group').fetchall() == [(encoded_hash, )]
+    # Duplicate created by re-encoding is deleted, reference counts are correct
+    assert dict(conn.execute('SELECT hash, ref_count FROM image').fetchall()) == \
+        {encoded_hash: 4, new_other_hash: 1}
+    image_bytes, = conn.execute('SELECT bytes FROM image WHERE hash = ?', (new_other_hash, )).fetchone()
+    assert get_image_hash(image_bytes) == new_other_hash
+    conn.close()
+
+
+def test_images_without_saving_are_kept(db_path):
+    report = recompress_images.recompress_images(db_path, min_saving=0.99, workers=1, show_progress=False)
+    assert report['numb_replaced'] == 0
+    assert report['images_size_after'] == report['images_size_before']
+    conn = sqlite3.connect(db_path)
+    assert {image_hash for image_hash, in conn.execute('SELECT hash FROM image')} == \
+        set(map(get_image_hash, (LARGE_IMAGE, ENCODED_IMAGE, OTHER_IMAGE)))
+    conn.close()
+
+
+def test_given_database_is_used_and_closed(db_path, make_db, monkeypatch):
+    # Database opened by application(singleton) is not used by tool
+    other_db = make_db(db_name='other.db')
+    closed_db_paths = []
+    close = DB.cls.close
+    monkeypatch.setattr(DB.cls, 'close', lambda db: closed_db_paths.append(db.db_path) or close(db))
+    assert recompress_images.recompress_images(db_path, workers=1, show_progress=False)['numb_replaced'] == 2
+    assert closed_db_paths == [db_path]
+    assert DB() is other_db
+
+
+def test_failed_migration_stops_run(db_path, monkeypatch):
+    monkeypatch.setattr(DB.cls, 'migrate_schema', lambda db: False)
+    assert recompress_images.main(['--db', db_path, '--workers', '1']) == 1
+    conn = sqlite3.connect(db_path)
+    assert {image_hash for image_hash, in conn.execute('SELECT hash FROM image')} == \
+        set(map(get_image_hash, (LARGE_IMAGE, ENCODED_IMAGE, OTHER_IMAGE)))
+    conn.close()
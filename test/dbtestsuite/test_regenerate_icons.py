@@ -0,0 +1,88 @@
+import io
+import pickle
+import sqlite3
+from functools import partial
+
+import pytest
+from PIL import Image
+
+from database.db_obj import DB
+from settings import ICON_SIZES
+from tools import _batch, regenerate_icons
+from tools.regenerate_icons import IconSource
+from util.images import get_image_hash
+
+
+NUMB_OF_EXERCISES = 5
+
+
+def _get_image_bytes(size, image_format='JPEG'):
+    buf = io.BytesIO()
+    Image.new('RGB', size, (120, 60, 30)).save(buf, format=image_format)
+    return buf.getvalue()
+
+
+def _insert_rows(conn, insert_exercises):
+    position_bytes = _get_image_bytes((400, 250))
+    conn.execute('INSERT INTO image(hash, bytes) VALUES(?, ?)', (get_image_hash(position_bytes), position_bytes))
+    # Old icons have only one(larger) size
+    icons_dict_bytes = pickle.dumps({100: _get_image_bytes((100, 100), 'PNG')})
+    insert_exercises(conn, [{'name': f'Exercise {i}', 'position_1_hash': get_image_hash(position_bytes),
+                             'icons_dict': icons_dict_bytes} for i in range(1, NUMB_OF_EXERCISES + 1)])
+    conn.executemany('INSERT INTO exercise_icon(exercise_id, size, bytes) VALUES(?, 100, x\'00\')',
+                     [(i, ) for i in range(1, NUMB_OF_EXERCISES + 1)])
+
+
+@pytest.fixture
+def db_path(make_db_file, insert_exercises):
+    return make_db_file(partial(_insert_rows, insert_exercises=insert_exercises))
+
+
+def _get_icon_sizes(db_path):
+    conn = sqlite3.connect(db_path)
+    icon_sizes = {}
+    for exer_id, size, icon_bytes in conn.execute('SELECT exercise_id, size, bytes FROM exercise_icon'):
+        icon_sizes.setdefault(exer_id, {})[size] = Image.open(io.BytesIO(icon_bytes)).size
+    conn.close()
+    return icon_sizes
+
+
+@pytest.mark.parametrize('source', list(IconSource))
+def test_icons_are_regenerated(db_path, source):
+    numb_done, failed_ids = regenerate_icons.regenerate_icons(
+        db_path, source=source, workers=2, page_size=2, show_progress=False)
+    assert (numb_done, failed_ids) == (NUMB_OF_EXERCISES, [])
+    expected_sizes = {width: (width, height) for width, height in ICON_SIZES}
+    assert _get_icon_sizes(db_path) == {i: expected_sizes for i in range(1, NUMB_OF_EXERCISES + 1)}
+
+
+def test_interrupted_run_is_resumed(db_path):
+    options = {'source': 'icon', 'image_format': 'JPEG', 'quality': 75,
+               'icon_sizes': [list(icon_size) for icon_size in ICON_SIZES]}
+    _batch.write_state(_batch.get_state_file(db_path, regenerate_icons.TOOL_NAME), options, 3)
+    numb_done, _ = regenerate_icons.regenerate_icons(db_path, workers=1, page_size=2, show_progress=False)
+    assert numb_done == NUMB_OF_EXERCISES - 3
+    conn = sqlite3.connect(db_path)
+    assert [exer_id for exer_id, in conn.execute('SELECT exercise_id FROM exercise_icon WHERE size = 100')] == \
+        [1, 2, 3]
+    conn.close()
+
+
+def test_given_database_is_used_and_closed(db_path, make_db, monkeypatch):
+    # Database opened by application(singleton) is not used by tool
+    other_db = make_db(db_name='other.db')
+    closed_db_paths = []
+    close = DB.cls.close
+    monkeypatch.setattr(DB.cls, 'close', lambda db: closed_db_paths.append(db.db_path) or close(db))
+    numb_done, _ = regenerate_icons.regenerate_icons(db_path, workers=1, show_progress=False)
+    assert numb_done == NUMB_OF_EXERCISES
+    assert closed_db_paths == [db_path]
+    assert DB() is other_db
+
+
+def test_failed_migration_stops_run(db_path, monkeypatch):
+    monkeypatch.setattr(DB.cls, 'migrate_schema', lambda db: False)
+    assert regenerate_icons.main(['--db', db_path, '--workers', '1']) == 1
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT DISTINCT size FROM exercise_icon').fetchall() == [(100, )]
+    conn.close()
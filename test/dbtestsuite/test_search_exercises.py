@@ -0,0 +1,62 @@
+from functools import partial
+
+import pytest
+
+
+# (id, name, type id, favorite, instructions)
+EXERCISES = (
+    (1, 'Squat', 1, 1, 'Keep your back straight.'),
+    (2, 'Front squat', 1, 0, 'Hold the bar on your shoulders.'),
+    (3, 'Lunge', 1, 0, 'Step forward and squat down until knee touches the floor.'),
+    (4, 'Bench press', 2, 1, 'Press the bar up from your chest.'),
+    (5, 'Plank', 2, 0, 'Hold your body straight.'),
+    (6, 'Push up', 2, 0, 'Lower your chest to the floor, then press up.'),
+)
+
+
+def _insert_rows(conn, insert_exercises):
+    # Exercise list rows are joined with reference tables
+    conn.executemany('INSERT INTO exercise_type(id, name) VALUES(?, ?)', [(1, 'strength'), (2, 'core')])
+    conn.execute("INSERT INTO body_part(id, name) VALUES(1, 'legs')")
+    conn.execute("INSERT INTO muscle_group(id, name) VALUES(1, 'quads')")
+    conn.execute("INSERT INTO equipment(id, name) VALUES(1, 'barbell')")
+    insert_exercises(conn, [{'name': name, 'type_id': type_id, 'favorite': favorite, 'instructions': instructions}
+                            for _, name, type_id, favorite, instructions in EXERCISES])
+
+
+@pytest.fixture
+def db(make_db, insert_exercises):
+    return make_db(partial(_insert_rows, insert_exercises=insert_exercises))
+
+
+def _get_ids(result_set):
+    return [exer_id for exer_id, _ in result_set]
+
+
+def test_words_are_matched_as_prefixes(db):
+    assert _get_ids(db.search_exercise_list_data('ben')) == [4]
+    assert _get_ids(db.search_exercise_list_data('BENCH pr')) == [4]
+    # All words must match(in name or instructions)
+    assert _get_ids(db.search_exercise_list_data('hold bar')) == [2]
+    assert db.search_exercise_list_data('squat deadlift') == []
+
+
+def test_name_match_is_ranked_above_instructions_match(db):
+    # Exercise 3 matches only in instructions
+    assert _get_ids(db.search_exercise_list_data('squat'))[-1] == 3
+    assert set(_get_ids(db.search_exercise_list_data('squat'))) == {1, 2, 3}
+    # Exercise 4 matches in name and instructions
+    assert _get_ids(db.search_exercise_list_data('press')) == [4, 6]
+
+
+def test_search_is_combined_with_filters(db):
+    assert _get_ids(db.search_exercise_list_data('squat', {'exercises.type_id': 1, 'favorite': 1})) == [1]
+    assert _get_ids(db.search_exercise_list_data('press', {'exercises.type_id': 1})) == []
+    assert _get_ids(db.search_exercise_list_data('hold', {'exercises.type_id': 2})) == [5]
+    assert _get_ids(db.search_exercise_list_data('press', {'exercises.type_id': 2, 'favorite': 0})) == [6]
+    rows = db.search_exercises('bench', {'favorite': 1})
+    assert [(row.exer_id, row.name) for row in rows] == [(4, 'Bench press')]
+
+
+def test_text_without_words_selects_filtered_exercises(db):
+    assert db.search_exercise_list_data('  "*', {'favorite': 1}) == [(4, 'Bench press'), (1, 'Squat')]
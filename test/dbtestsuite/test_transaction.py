@@ -0,0 +1,83 @@
+import pickle
+
+import pytest
+
+from database.data_model import NewExerciseData, WorkoutData
+from database.exceptions import DuplicateNameError
+
+
+def _new_exercise_data(name):
+    return NewExerciseData(name, 1, 1, 1, None, 1, None, None, pickle.dumps({50: b'icon'}), '', 0, None, 1)
+
+
+def _select_names(db, table_name):
+    return sorted(name for name, in db.execute_statement(f'SELECT name FROM {table_name}'))
+
+
+@pytest.fixture
+def db(make_db, insert_exercises):
+    return make_db(lambda conn: insert_exercises(conn, ['Squat', 'Deadlift']))
+
+
+def test_failed_statement_rolls_back_transaction(db):
+    with db.transaction():
+        assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+        assert db.update_table('exercises', {'name': 'Front squat'}, 1)
+        assert db.execute_statement('INSERT INTO missing_table(name) VALUES(?)', ('Legs', )) is False
+    assert _select_names(db, 'workout') == []
+    assert _select_names(db, 'exercises') == ['Deadlift', 'Squat']
+    # Exception raised in block rolls back transaction too
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+            raise RuntimeError
+    assert _select_names(db, 'workout') == []
+    assert not db.connection_manager.get_connection().in_transaction
+
+
+def test_nested_transaction_is_joined(db):
+    with db.transaction() as is_outer:
+        assert is_outer
+        assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+        with db.transaction() as is_outer:
+            assert not is_outer
+            assert db.insert_into_workout(WorkoutData('Arms', 1, (), 60), 0)
+        # Inner block doesn't commit
+        assert db.connection_manager.get_connection().in_transaction
+    assert _select_names(db, 'workout') == ['Arms', 'Legs']
+    # Failure in inner block rolls back whole transaction
+    with db.transaction():
+        assert db.insert_into_workout(WorkoutData('Back', 1, (), 60), 0)
+        with db.transaction():
+            assert db.execute_statement('INSERT INTO missing_table(name) VALUES(?)', ('Back', )) is False
+    assert _select_names(db, 'workout') == ['Arms', 'Legs']
+
+
+def test_insert_exercises_returns_ids_of_rows(db):
+    assert db.delete_exercises([2]) == [True]
+    exer_ids = db.insert_exercises([_new_exercise_data('Lunge'), _new_exercise_data('Plank')])
+    assert [db.select_from_table('exercises', 'name', {'id': exer_id}) for exer_id in exer_ids] == ['Lunge', 'Plank']
+    assert db.execute_statement('SELECT DISTINCT exercise_id FROM exercise_icon ORDER BY exercise_id') == \
+        [(exer_id, ) for exer_id in exer_ids]
+    assert db.insert_exercises([]) == []
+
+
+def test_batch_with_duplicate_name_writes_nothing(db):
+    with pytest.raises(DuplicateNameError):
+        db.insert_exercises([_new_exercise_data('Lunge'), _new_exercise_data('squat')])
+    assert _select_names(db, 'exercises') == ['Deadlift', 'Squat']
+    assert db.execute_statement('SELECT exercise_id FROM exercise_icon') == []
+    with pytest.raises(DuplicateNameError):
+        db.update_exercises({2: {'name': 'Romanian deadlift'}, 1: {'name': 'Romanian Deadlift'}})
+    assert _select_names(db, 'exercises') == ['Deadlift', 'Squat']
+
+
+def test_batch_with_missing_ids(db):
+    assert db.update_exercises({1: {'name': 'Front squat'}, 3: {'name': 'Lunge'}}) == [True, False]
+    assert _select_names(db, 'exercises') == ['Deadlift', 'Front squat']
+    assert db.delete_exercises([2, 3]) == [True, False]
+    assert _select_names(db, 'exercises') == ['Front squat']
+    assert db.insert_into_workout(WorkoutData('Legs', 1, (), 60), 0)
+    workout_id = db.select_from_table('workout', 'id')
+    assert db.delete_workouts([workout_id, workout_id + 1]) == [True, False]
+    assert _select_names(db, 'workout') == []
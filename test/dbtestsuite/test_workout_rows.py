@@ -0,0 +1,127 @@
+import pickle
+import sqlite3
+
+import pytest
+
+from database import migration
+from database.data_model import WorkoutData, PlanData
+from database.db_obj import DB
+from gui.flags import TableRowType
+from util.obj import SingletonDecorator
+
+
+EXER = str(TableRowType.EXER_EXEC)
+SS_TOP = str(TableRowType.SS_TOP)
+SS_BOTTOM = str(TableRowType.SS_BOTTOM)
+
+WORKOUT_ROWS_DATA = (
+    (EXER, 1, 'Squat', 3, 10, 2, True),
+    (SS_TOP, 1),
+    (EXER, 2, 'Bench press', 4, 8, 2, True),
+    (EXER, 3, 'Plank', 3, 1, 1, False),
+    (SS_BOTTOM, 1, 3, 2),
+)
+
+
+EXERCISE_NAMES = ['Exercise 1', 'Exercise 2', 'Exercise 3']
+
+
+@pytest.fixture
+def db(make_db, insert_exercises):
+    return make_db(lambda conn: insert_exercises(conn, EXERCISE_NAMES))
+
+
+def test_migration_moves_pickled_rows(tmp_path, insert_exercises):
+    conn = sqlite3.connect(str(tmp_path.joinpath('old.db')), isolation_level=None)
+    assert migration.run_migrations(conn, [m for m in migration.MIGRATIONS if m.version < 6])
+    insert_exercises(conn, EXERCISE_NAMES, legacy_schema=True)
+    workout_data = WorkoutData('Legs', 1, WORKOUT_ROWS_DATA, 3600)
+    conn.execute("INSERT INTO workout(id, name, type_id, data, workout_time) VALUES(1, 'Legs', 1, ?, 3600)",
+                 (pickle.dumps(WORKOUT_ROWS_DATA),))
+    workouts_data = [workout_data, None, WorkoutData('Empty', 2, (), 0), None, None, None, None]
+    conn.execute("INSERT INTO week_plan(id, name, plan_type_id, workouts) VALUES(1, 'Plan', 1, ?)",
+                 (pickle.dumps(workouts_data),))
+    assert migration.run_migrations(conn)
+    assert migration.get_schema_version(conn) == migration.MIGRATIONS[-1].version
+    assert 'data' not in [column[1] for column in conn.execute('PRAGMA table_info(workout)')]
+    assert 'workouts' not in [column[1] for column in conn.execute('PRAGMA table_info(week_plan)')]
+    SingletonDecorator.clean_instances()
+    DB(str(tmp_path.joinpath('old.db')))
+    try:
+        assert DB().select_workout_rows_data(1) == WORKOUT_ROWS_DATA
+        assert DB().select_plan_workouts_data(1) == workouts_data
+    finally:
+        DB().close()
+        SingletonDecorator.clean_instances()
+        conn.close()
+
+
+def test_workout_insert_update(db):
+    assert db.insert_into_workout(WorkoutData('Legs', 1, WORKOUT_ROWS_DATA, 3600), 0)
+    workout_id = db.select_from_table('workout', 'id', {'name': 'Legs'})
+    assert db.select_workout_rows_data(workout_id) == WORKOUT_ROWS_DATA
+    # Change one row and remove last two
+    rows_data = ((EXER, 1, 'Squat', 5, 5, 3, True), ) + WORKOUT_ROWS_DATA[1:3]
+    assert db.update_workout(workout_id, WorkoutData('Legs 2', 1, rows_data, 1800))
+    assert db.select_workout_rows_data(workout_id) == rows_data
+    # Add rows back
+    assert db.update_workout(workout_id, WorkoutData('Legs 2', 1, WORKOUT_ROWS_DATA, 1800))
+    assert db.select_workout_rows_data(workout_id) == WORKOUT_ROWS_DATA
+
+
+def test_plan_insert_update_delete(db):
+    workouts_data = [WorkoutData('Legs', 1, WORKOUT_ROWS_DATA, 3600)] + [None] * 6
+    assert db.insert_into_week_plan(PlanData(None, 'Plan', 1, workouts_data), 0)
+    plan_id = db.select_from_table('week_plan', 'id', {'name': 'Plan'})
+    assert db.select_plan_workouts_data(plan_id) == workouts_data
+    workouts_data = [None, WorkoutData('Arms', 2, WORKOUT_ROWS_DATA[1:], 600)] + [None] * 5
+    assert db.update_week_plan(PlanData(plan_id, 'Plan', 1, workouts_data))
+    assert db.select_plan_workouts_data(plan_id) == workouts_data
+    assert db.delete_week_plan(plan_id)
+    assert db.select_from_table('plan_day', 'id', get_none=True) is None
+    assert db.select_from_table('workout_row', 'id', get_none=True) is None
+
+
+def test_deleted_exercise_rows(db):
+    assert db.insert_into_workout(WorkoutData('Legs', 1, WORKOUT_ROWS_DATA, 3600), 0)
+    workouts_data = [WorkoutData('Day', 1, WORKOUT_ROWS_DATA[:1], 60)] + [None] * 6
+    assert db.insert_into_week_plan(PlanData(None, 'Plan', 1, workouts_data), 0)
+    assert db.select_exercise_usage(1) == (['Legs'], ['Plan'])
+    assert db.delete_exercise(1)
+    assert db.select_exercise_usage(1) == ([], [])
+    workout_id = db.select_from_table('workout', 'id', {'name': 'Legs'})
+    # Row of deleted exercise is kept with its name(and reported as missing)
+    assert db.select_workout_rows_data(workout_id)[0] == (EXER, None, 'Squat', 3, 10, 2, True)
+    assert db.delete_workout(workout_id)
+    assert db.select_exercise_usage(2) == ([], [])
+
+
+def test_drop_columns_keeps_schema_objects(tmp_path):
+    conn = sqlite3.connect(str(tmp_path.joinpath('rebuild.db')), isolation_level=None)
+    conn.execute('CREATE TABLE parent(id INTEGER PRIMARY KEY)')
+    conn.execute('CREATE TABLE item(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, '
+                 "data BLOB DEFAULT NULL, parent_id INTEGER DEFAULT 0, note TEXT DEFAULT 'x', "
+                 'FOREIGN KEY (parent_id) REFERENCES parent(id) ON DELETE CASCADE)')
+    conn.execute('CREATE INDEX idx_item_name ON item(name)')
+    conn.execute('CREATE TRIGGER trg_parent_delete AFTER DELETE ON parent '
+                 'BEGIN DELETE FROM item WHERE parent_id = old.id; END')
+    conn.execute('CREATE TRIGGER trg_item_delete AFTER DELETE ON item BEGIN DELETE FROM parent WHERE id = -1; END')
+    conn.execute('INSERT INTO parent(id) VALUES(1)')
+    conn.executemany("INSERT INTO item(id, name, data, parent_id) VALUES(?, ?, x'00', 1)", [(1, 'a'), (5, 'b')])
+    conn.execute('DELETE FROM item WHERE id = 5')
+    conn.execute('BEGIN')
+    migration._drop_columns(conn, 'item', ('data', ))
+    conn.execute('COMMIT')
+    assert [column[1] for column in conn.execute('PRAGMA table_info(item)')] == ['id', 'name', 'parent_id', 'note']
+    assert conn.execute('SELECT id, name, parent_id, note FROM item').fetchall() == [(1, 'a', 1, 'x')]
+    assert conn.execute('PRAGMA foreign_key_list(item)').fetchone()[2:7] == \
+        ('parent', 'parent_id', 'id', 'NO ACTION', 'CASCADE')
+    assert {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')")} \
+        == {'idx_item_name', 'trg_parent_delete', 'trg_item_delete'}
+    # Id of deleted row is not reused
+    conn.execute("INSERT INTO item(name) VALUES('c')")
+    assert conn.execute("SELECT id FROM item WHERE name = 'c'").fetchone() == (6, )
+    # Trigger of other table still works with rebuilt table
+    conn.execute('DELETE FROM parent')
+    assert conn.execute('SELECT COUNT(*) FROM item WHERE parent_id = 1').fetchone() == (0, )
+    conn.close()
@@ -1,5 +1,6 @@
 import datetime
 import pdb
+import sqlite3
 from tkinter import Tk
 from os import remove
 from pathlib import Path
@@ -16,7 +17,7 @@ from session import Session
 from settings import Settings
 import config
 
-from conftest import BOOKMARKS_FILE, SETTINGS_FILE, EXPORTS_DIR
+from conftest import BOOKMARKS_FILE, SETTINGS_FILE, EXPORTS_DIR, TEST_DB_PATH
 
 
 def files_cleanup():
@@ -24,6 +25,11 @@ def files_cleanup():
     for config_fp in (BOOKMARKS_FILE, SETTINGS_FILE):
         if Path(config_fp).exists():
             remove(config_fp)
+    # Remove bookmarks saved in DB
+    conn = sqlite3.connect(TEST_DB_PATH)
+    with conn:
+        conn.execute('DELETE FROM bookmark')
+    conn.close()
     # Remove all exported files - PDFs and motfiles
     for export_dir in Path(EXPORTS_DIR).iterdir():
         for export_fp in Path(export_dir).iterdir():
@@ -37,7 +43,7 @@ def window(qtbot):
                                        _root.winfo_screenheight()), ]
     # pdb.set_trace()
     Settings(screens_geometries)
-    Session.start_session()
+    assert Session.start_session()
     window = MainWindow()
     window.init_ui()
     qtbot.addWidget(window)
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from PIL import Image
+from PyQt5 import QtCore
+
+import settings
+from util import images
+from util.obj import SingletonDecorator
+from gui.widgets._dialogs import CropImageDialog, CROP_PREVIEW_MAX_SIZE
+from gui.editors_NEW._image import InputImageWithText
+
+
+@pytest.fixture
+def app_settings(tmp_path, monkeypatch):
+    # Widgets read font from settings, which are created in temporary file
+    monkeypatch.setattr(settings, 'SETTINGS_FILE', str(tmp_path.joinpath('settings.json')))
+    SingletonDecorator.clean_instances()
+    settings.Settings([QtCore.QRect(0, 0, 1920, 1080)])
+    yield
+    SingletonDecorator.clean_instances()
+
+
+def _get_image_bytes(size, orientation=None):
+    image = Image.new('RGB', size, (200, 20, 20))
+    # Right half of image is green, so crops are distinguishable
+    image.paste((20, 200, 20), (size[0] // 2, 0, size[0], size[1]))
+    buf = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[images.EXIF_ORIENTATION_TAG] = orientation
+        image.save(buf, format='JPEG', exif=exif)
+    else:
+        image.save(buf, format='JPEG')
+    return buf.getvalue()
+
+
+def test_proxy_is_downscaled():
+    proxy_bytes, scale = images.get_image_proxy(_get_image_bytes((4000, 3000)), CROP_PREVIEW_MAX_SIZE)
+    proxy_size = Image.open(io.BytesIO(proxy_bytes)).size
+    assert proxy_size == (800, 600)
+    assert scale == pytest.approx(0.2)
+
+
+def test_proxy_of_rotated_image():
+    proxy_bytes, scale = images.get_image_proxy(_get_image_bytes((4000, 3000), orientation=6), (900, 600))
+    assert Image.open(io.BytesIO(proxy_bytes)).size == (450, 600)
+    assert scale == pytest.approx(0.15)
+
+
+@pytest.mark.parametrize('orientation_index, expected_color', [(0, (200, 20, 20)), (2, (20, 200, 20))])
+def test_crop_rect_is_in_original_resolution(qtbot, app_settings, orientation_index, expected_color):
+    image_bytes = _get_image_bytes((4000, 3000))
+    dialog = CropImageDialog('Crop', image_bytes, 1000, 3000)
+    qtbot.addWidget(dialog)
+    # Preview is drawn on proxy
+    assert dialog.image.pixmap().size().width() == 800
+    dialog.rb_box_orien.radiobuttons[orientation_index].click()
+    crop_rect = dialog.get_crop_rect()
+    assert (crop_rect.width(), crop_rect.height()) == (1000, 3000)
+    cropped_image = Image.open(io.BytesIO(images.crop_and_resize_image_bytes(image_bytes, crop_rect, 250)))
+    assert cropped_image.size == (83, 250)
+    assert all(abs(a - b) < 10 for a, b in zip(cropped_image.getpixel((40, 125)), expected_color))
+
+
+def test_image_is_cropped_and_resized():
+    cropped_image_bytes = images.crop_and_resize_image_bytes(
+        _get_image_bytes((4000, 3000)), (3000, 0, 4000, 3000), 300)
+    cropped_image = Image.open(io.BytesIO(cropped_image_bytes))
+    assert cropped_image.size == (100, 300)
+    assert all(abs(a - b) < 10 for a, b in zip(cropped_image.getpixel((50, 150)), (20, 200, 20)))
+    # Rotated image is cropped in displayed coordinates
+    resized_image_bytes = images.crop_and_resize_image_bytes(
+        _get_image_bytes((4000, 3000), orientation=6), None, 400)
+    assert Image.open(io.BytesIO(resized_image_bytes)).size == (300, 400)
+
+
+def test_unreadable_image_is_not_shown(qtbot, app_settings, monkeypatch):
+    error_messages = []
+    monkeypatch.setattr('gui.widgets._dialogs.ErrorMessage',
+                        lambda title, msg: error_messages.append(title) or _Dialog())
+    dialog = CropImageDialog('Crop', b'not an image', 1000, 3000)
+    qtbot.addWidget(dialog)
+    assert not dialog.exec()
+    assert error_messages == ['Crop image failed']
+
+
+class _Dialog:
+    def exec(self):
+        return True
+
+
+def test_imported_image_is_cropped_on_worker_thread(qtbot, app_settings, monkeypatch):
+    monkeypatch.setattr('gui.editors_NEW._image.QuestionDialog', lambda title, msg: _Dialog())
+    monkeypatch.setattr(CropImageDialog, 'exec', lambda dialog: True)
+    editor = InputImageWithText(None, 'image', 'Position')
+    qtbot.addWidget(editor)
+    with qtbot.waitSignal(editor.signal_image_set, timeout=10000):
+        editor._check_format_and_save_image(_get_image_bytes((6000, 2000)))
+    # Editor(only weakly referenced by qtbot) is not deleted while worker thread is finishing
+    editor._format_task.wait()
+    assert editor.isEnabled()
+    image_size = Image.open(io.BytesIO(editor.image_with_text.get_data())).size
+    assert image_size == (images.MAX_IMAGE_WIDTH, images.MAX_IMAGE_HEIGHT)
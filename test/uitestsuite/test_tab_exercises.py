@@ -26,15 +26,18 @@ def test_tab_exercises(window, qtbot):
     # ----- Step 2: Check exercise parameters in list -----
     list_exercises = tab_exercises.list_exercises
     basic_info_row = tab_exercises.exercise_data_editor.exercise_data_viewer.basic_info_row
+    additional_info_row = tab_exercises.exercise_data_editor.exercise_data_viewer.additional_info_row
     for row in range(list_exercises.model().rowCount()):
         list_exercises.select_index(row)
         exer_type = get_value(basic_info_row.row.info_grid.label_type_value)
         body_part = get_value(basic_info_row.row.info_grid.label_body_part_value)
         exer_name = get_value(basic_info_row.title_row.title)
         favorite = get_value(basic_info_row.title_row.bttn_favorite)
+        instructions = get_value(additional_info_row.instructions)
         assert exer_type == 'Strength', 'Exercise type is not correct'
         assert body_part == 'Legs', 'Body part is not correct'
-        assert 'squat' in exer_name.lower(), 'Exercise name is not correct'
+        assert 'squat' in exer_name.lower() or 'squat' in instructions.lower(), \
+            'Exercise name or instructions are not correct'
         assert favorite is False, 'Favorite is not correct'
     filter_box.bttn_reset.click()
     filter_box.bttn_filter.click()
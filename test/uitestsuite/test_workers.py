@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from gui.workers import DebouncedQuery
+
+
+INTERVAL_MS = 20
+
+
+class _Query:
+    """Query function(of debounced query) which records its calls and can be blocked until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.results = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.released.set()
+        self.debounced_query = DebouncedQuery(None, self, interval_ms=INTERVAL_MS)
+        self.debounced_query.signal_result.connect(lambda args, result: self.results.append((args, result)))
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        self.started.set()
+        self.released.wait(5)
+        return f'result of {args}'
+
+
+@pytest.fixture
+def query(qtbot):
+    query = _Query()
+    yield query
+    query.released.set()
+    # Worker thread is not left running when <DebouncedQuery> is deleted
+    query.debounced_query._thread_pool.waitForDone()
+
+
+def test_burst_of_requests_runs_last_query(qtbot, query):
+    with qtbot.waitSignal(query.debounced_query.signal_result, timeout=1000):
+        for text in ('s', 'sq', 'squ'):
+            query.debounced_query.request(text, 1)
+    qtbot.wait(INTERVAL_MS * 5)
+    assert query.calls == [('squ', 1)]
+    assert query.results == [(('squ', 1), "result of ('squ', 1)")]
+
+
+def test_stale_result_is_dropped(qtbot, query):
+    query.released.clear()
+    query.debounced_query.request('sq')
+    qtbot.waitUntil(query.started.is_set, timeout=1000)
+    # Newer request is made while query is running
+    query.debounced_query.request('squat')
+    query.released.set()
+    with qtbot.waitSignal(query.debounced_query.signal_result, timeout=1000):
+        pass
+    qtbot.wait(INTERVAL_MS * 5)
+    assert query.calls == [('sq', ), ('squat', )]
+    assert query.results == [(('squat', ), "result of ('squat',)")]
+
+
+def test_cancel_drops_pending_result(qtbot, query):
+    # Query is cancelled before it's started
+    query.debounced_query.request('sq')
+    query.debounced_query.cancel()
+    qtbot.wait(INTERVAL_MS * 5)
+    assert query.calls == []
+    # Query is cancelled while it's running
+    query.released.clear()
+    query.debounced_query.request('squat')
+    qtbot.waitUntil(query.started.is_set, timeout=1000)
+    query.debounced_query.cancel()
+    query.released.set()
+    query.debounced_query._thread_pool.waitForDone()
+    qtbot.wait(INTERVAL_MS * 5)
+    assert query.calls == [('squat', )]
+    assert query.results == []
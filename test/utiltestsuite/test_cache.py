@@ -0,0 +1,64 @@
+from database.data_model import icon_cache, invalidate_exercise_icon
+from settings import ICON_SIZES
+from util.cache import LRUCache
+
+
+def test_least_recently_used_items_are_evicted_by_bytes():
+    cache = LRUCache(maxbytes=100)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper(), cost=30)
+    # 'a' is used, so 'b' is the least recently used item
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D', cost=30)
+    assert 'b' not in cache
+    assert cache.get_stats()['bytes'] == 90
+    # Replaced item is not counted twice
+    cache.put('c', 'C', cost=50)
+    assert [key for key in ('a', 'c', 'd') if key in cache] == ['c', 'd']
+    assert cache.get_stats()['bytes'] == 80
+
+
+def test_items_are_evicted_by_number():
+    cache = LRUCache(maxsize=2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    assert len(cache) == 2
+    assert 'a' not in cache
+
+
+def test_oversized_item_is_not_cached():
+    cache = LRUCache(maxbytes=100)
+    cache.put('a', 'A', cost=60)
+    cache.put('b', 'B', cost=101)
+    assert 'b' not in cache
+    assert cache.get('a') == 'A'
+    assert cache.get_stats()['bytes'] == 60
+    # Oversized value also replaces cached value of key
+    cache.put('a', 'AA', cost=200)
+    assert 'a' not in cache
+    assert cache.get_stats() == {'items': 0, 'bytes': 0, 'hits': 1, 'misses': 0}
+
+
+def test_hits_and_misses_are_counted():
+    cache = LRUCache()
+    assert cache.get('a') is None
+    assert cache.get('a', default='default') == 'default'
+    cache.put('a', 'A')
+    assert cache.get('a') == 'A'
+    assert cache.get_stats() == {'items': 1, 'bytes': 0, 'hits': 1, 'misses': 2}
+    cache.invalidate('a')
+    cache.invalidate('a')
+    assert cache.get('a') is None
+    assert cache.get_stats() == {'items': 0, 'bytes': 0, 'hits': 1, 'misses': 3}
+
+
+def test_exercise_icons_of_all_sizes_are_invalidated():
+    icon_cache.clear()
+    for exer_id in (1, 2):
+        for icon_width, _ in ICON_SIZES:
+            icon_cache.put(('exercise', exer_id, icon_width), f'icon {exer_id}', cost=10)
+    invalidate_exercise_icon(1)
+    assert not any(('exercise', 1, icon_width) in icon_cache for icon_width, _ in ICON_SIZES)
+    assert all(('exercise', 2, icon_width) in icon_cache for icon_width, _ in ICON_SIZES)
+    assert icon_cache.get_stats()['bytes'] == 10 * len(ICON_SIZES)
+    icon_cache.clear()
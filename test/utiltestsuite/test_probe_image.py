@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from PIL import Image, ImageFile
+
+from util import images
+from util.images import ImageInfo, probe_image
+
+
+def _get_image_bytes(size, image_format, mode='RGB', orientation=None):
+    image = Image.new(mode, size)
+    buf = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[images.EXIF_ORIENTATION_TAG] = orientation
+        image.save(buf, format=image_format, exif=exif)
+    else:
+        image.save(buf, format=image_format)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize('image_format, mode', [('JPEG', 'RGB'), ('PNG', 'RGBA'), ('PNG', 'L')])
+def test_header_info_is_returned(image_format, mode):
+    image_bytes = _get_image_bytes((40, 30), image_format, mode)
+    assert probe_image(image_bytes) == ImageInfo(image_format, (40, 30), mode)
+
+
+def test_memoryview_and_filepath_are_probed(tmp_path):
+    image_bytes = _get_image_bytes((40, 30), 'PNG')
+    # Image inside larger buffer is probed without copying the buffer
+    buffer = bytearray(b'\x00' * 10 + image_bytes)
+    assert probe_image(memoryview(buffer)[10:]) == ImageInfo('PNG', (40, 30), 'RGB')
+    image_fp = tmp_path.joinpath('image.png')
+    image_fp.write_bytes(image_bytes)
+    assert probe_image(str(image_fp)) == ImageInfo('PNG', (40, 30), 'RGB')
+    assert images.get_image_size(str(image_fp)) == (40, 30)
+
+
+def test_truncated_image_is_probed_from_header():
+    image_bytes = _get_image_bytes((400, 300), 'JPEG')
+    assert probe_image(image_bytes[:len(image_bytes) // 2]).size == (400, 300)
+
+
+def test_png_pixels_are_not_decoded(monkeypatch):
+    image_bytes = _get_image_bytes((2000, 2000), 'PNG')
+    # Truncated image data can't be decoded, header can
+    assert probe_image(image_bytes[:100]) == ImageInfo('PNG', (2000, 2000), 'RGB')
+
+    def load(image):
+        raise AssertionError('Image pixels decoded')
+
+    monkeypatch.setattr(ImageFile.ImageFile, 'load', load)
+    assert probe_image(image_bytes) == ImageInfo('PNG', (2000, 2000), 'RGB')
+    assert probe_image(_get_image_bytes((40, 30), 'PNG', orientation=8)).size == (30, 40)
+
+
+def test_exif_orientation_is_applied_to_size():
+    assert probe_image(_get_image_bytes((40, 30), 'JPEG', orientation=6)).size == (30, 40)
+    assert probe_image(_get_image_bytes((40, 30), 'JPEG', orientation=3)).size == (40, 30)
+
+
+def test_unsupported_image_is_rejected():
+    assert probe_image(b'not an image') is None
+    assert images.verify_image_bytes(b'not an image') is False
+    assert images.verify_image_bytes(_get_image_bytes((40, 30), 'GIF', mode='P')) is False
+    assert images.verify_image_bytes(_get_image_bytes((40, 30), 'PNG')) == ImageInfo('PNG', (40, 30), 'RGB')